@@ -0,0 +1,313 @@
+"""批量执行：从 JSONL 文件流式读取请求，用线程池或异步工作协程并发执行流程图，结果逐条写入输出 JSONL
+
+用法: python -m agent.batch INPUT OUTPUT [--workers N] [--mode thread|async] [--ordered]
+      [--id-field NAME] [--input-field NAME]
+
+每行输入是一个 JSON 对象，ID 取 id / request_id 字段（都没有时用行号），请求文本取 input / body 字段。
+重新运行时跳过输出文件中已成功完成的请求，失败的请求会重新执行。
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from agent.graph_builder import build_agent_graph
+from agent.runner import create_initial_state
+from agent.tools.http_client import aclose_shared_clients, close_shared_clients
+from config import Config
+
+ID_FIELDS = ("id", "request_id")
+INPUT_FIELDS = ("input", "body")
+DEFAULT_WORKERS = 4
+MODES = ("thread", "async")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """线性插值的分位数（q 为 0~1）"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _first_field(item: Dict[str, Any], fields: Sequence[str]) -> Any:
+    for field in fields:
+        if item.get(field) not in (None, ""):
+            return item[field]
+    return None
+
+
+def read_requests(path: str, id_fields: Sequence[str] = ID_FIELDS,
+                  input_fields: Sequence[str] = INPUT_FIELDS) -> Iterator[Dict[str, Any]]:
+    """逐行读取请求，产出 {"id", "input"}；无法解析的行产出 {"id", "error"}，不会中断整个批次"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield {"id": f"line-{line_number}", "error": f"无效的JSON: {e}"}
+                continue
+            if not isinstance(item, dict):
+                yield {"id": f"line-{line_number}", "error": "每行必须是JSON对象"}
+                continue
+            request_id = str(_first_field(item, id_fields) or f"line-{line_number}")
+            user_input = _first_field(item, input_fields)
+            if not isinstance(user_input, str):
+                yield {"id": request_id, "error": f"缺少请求文本字段: {' / '.join(input_fields)}"}
+                continue
+            yield {"id": request_id, "input": user_input}
+
+
+def finished_ids(path: str) -> Set[str]:
+    """输出文件中已成功完成的请求ID；文件不存在时为空（最后一行可能因中断而不完整）"""
+    if not os.path.exists(path):
+        return set()
+    finished = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("status") == "completed":
+                finished.add(record["id"])
+    return finished
+
+
+def make_record(request: Dict[str, Any], result: Optional[Dict[str, Any]], seconds: float,
+                error: Optional[str] = None) -> Dict[str, Any]:
+    """把一次运行的结果整理为输出行"""
+    record: Dict[str, Any] = {"id": request["id"], "status": "failed" if error else "completed",
+                              "seconds": round(seconds, 4)}
+    if error:
+        record["error"] = error
+        return record
+    messages = result.get("messages", [])
+    record["report"] = messages[-1].content if messages else None
+    record["tasks"] = [
+        {"id": task["id"], "type": task.get("type"), "status": task.get("status")}
+        for task in result.get("tasks", {}).values()
+    ]
+    return record
+
+
+def _missing_final_newline(path: str) -> bool:
+    """文件非空且不以换行结尾"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+class ResultWriter:
+    """逐条追加写入结果并立即刷新；ordered 为 True 时按请求顺序写出，先完成的结果暂存到前面的结果完成为止"""
+
+    def __init__(self, path: str, ordered: bool = False):
+        self.ordered = ordered
+        self._file = open(path, "a", encoding="utf-8")
+        if _missing_final_newline(path):
+            # 上次中断时最后一行只写了一半，先换行，避免新结果接在它后面
+            self._file.write("\n")
+            self._file.flush()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def write(self, seq: int, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self.ordered:
+                self._write_line(record)
+                return
+            self._pending[seq] = record
+            while self._next in self._pending:
+                self._write_line(self._pending.pop(self._next))
+                self._next += 1
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            # 中断时按顺序写出已完成的结果，下次运行会跳过它们
+            for seq in sorted(self._pending):
+                self._write_line(self._pending.pop(seq))
+            self._file.close()
+
+
+class BatchStats:
+    """统计完成数、失败数和每个请求的耗时"""
+
+    def __init__(self, skipped: int = 0):
+        self.skipped = skipped
+        self.completed = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def record(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if record["status"] == "completed":
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.latencies.append(record["seconds"])
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._start
+        processed = self.completed + self.failed
+        return {
+            "processed": processed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed": elapsed,
+            "requests_per_sec": processed / elapsed if elapsed else 0.0,
+            "mean": sum(self.latencies) / processed if processed else 0.0,
+            "p50": percentile(self.latencies, 0.50),
+            "p95": percentile(self.latencies, 0.95),
+            "p99": percentile(self.latencies, 0.99),
+        }
+
+
+def _invoke(graph, seq: int, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    if "error" in request:
+        return seq, make_record(request, None, 0.0, request["error"])
+    start = time.perf_counter()
+    try:
+        result = graph.invoke(create_initial_state(request["input"]))
+    except Exception as e:
+        return seq, make_record(request, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    return seq, make_record(request, result, time.perf_counter() - start)
+
+
+async def _ainvoke(graph, seq: int, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    if "error" in request:
+        return seq, make_record(request, None, 0.0, request["error"])
+    start = time.perf_counter()
+    try:
+        result = await graph.ainvoke(create_initial_state(request["input"]))
+    except Exception as e:
+        return seq, make_record(request, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    return seq, make_record(request, result, time.perf_counter() - start)
+
+
+def run_threaded(graph, requests: Iterator[Dict[str, Any]], workers: int, on_result) -> None:
+    """线程池执行；最多提交 2 * workers 个未完成的请求，输入文件按需读取"""
+    pool = ThreadPoolExecutor(workers, thread_name_prefix="batch")
+    pending = set()
+    try:
+        for seq, request in enumerate(requests):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    on_result(*future.result())
+            pending.add(pool.submit(_invoke, graph, seq, request))
+        for future in wait(pending).done:
+            on_result(*future.result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        close_shared_clients()
+
+
+async def arun_workers(graph, requests: Iterator[Dict[str, Any]], workers: int, on_result) -> None:
+    """在一个事件循环中用 workers 个工作协程执行；队列有界，输入文件按需读取"""
+    queue: asyncio.Queue = asyncio.Queue(2 * workers)
+
+    async def _worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            on_result(*await _ainvoke(graph, *item))
+
+    tasks = [asyncio.ensure_future(_worker()) for _ in range(workers)]
+    try:
+        for seq, request in enumerate(requests):
+            await queue.put((seq, request))
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await aclose_shared_clients()
+
+
+def run_batch(config: Config, input_path: str, output_path: str, workers: Optional[int] = None,
+              mode: Optional[str] = None, ordered: Optional[bool] = None,
+              id_fields: Sequence[str] = ID_FIELDS, input_fields: Sequence[str] = INPUT_FIELDS,
+              graph=None) -> Dict[str, Any]:
+    """执行整个批次并返回统计；未指定的参数取 agent.batch 配置"""
+    batch_config = config.get_config("agent.batch") or {}
+    workers = workers or batch_config.get("workers", DEFAULT_WORKERS)
+    mode = mode or batch_config.get("mode", "async")
+    ordered = batch_config.get("ordered", False) if ordered is None else ordered
+    if mode not in MODES:
+        raise ValueError(f"未知的执行方式: {mode}，可选 {', '.join(MODES)}")
+    graph = graph or build_agent_graph(config)
+
+    done = finished_ids(output_path)
+    stats = BatchStats()
+
+    def _pending_requests():
+        for request in read_requests(input_path, id_fields, input_fields):
+            if request["id"] in done:
+                stats.skipped += 1
+                continue
+            yield request
+
+    writer = ResultWriter(output_path, ordered)
+
+    def _on_result(seq: int, record: Dict[str, Any]) -> None:
+        writer.write(seq, record)
+        stats.record(record)
+
+    try:
+        if mode == "thread":
+            run_threaded(graph, _pending_requests(), workers, _on_result)
+        else:
+            asyncio.run(arun_workers(graph, _pending_requests(), workers, _on_result))
+    finally:
+        writer.close()
+    return stats.summary()
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"\n完成 {summary['completed']}，失败 {summary['failed']}，跳过 {summary['skipped']}，"
+          f"用时 {summary['elapsed']:.1f}s")
+    print(f"吞吐 {summary['requests_per_sec']:.2f} 请求/s   平均 {summary['mean'] * 1000:.1f}ms   "
+          f"p50 {summary['p50'] * 1000:.1f}ms   p95 {summary['p95'] * 1000:.1f}ms   p99 {summary['p99'] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="请求 JSONL 文件")
+    parser.add_argument("output", help="结果 JSONL 文件（追加写入）")
+    parser.add_argument("--workers", type=int, help=f"并发数，默认取 agent.batch.workers（{DEFAULT_WORKERS}）")
+    parser.add_argument("--mode", choices=MODES, help="thread: 线程池同步执行；async: 单个事件循环异步执行（默认）")
+    parser.add_argument("--ordered", action="store_true", default=None, help="按输入顺序写出结果（默认按完成顺序）")
+    parser.add_argument("--id-field", action="append", help="请求ID字段，可重复，默认 id、request_id")
+    parser.add_argument("--input-field", action="append", help="请求文本字段，可重复，默认 input、body")
+    args = parser.parse_args()
+
+    summary = run_batch(Config(), args.input, args.output, args.workers, args.mode, args.ordered,
+                        args.id_field or ID_FIELDS, args.input_field or INPUT_FIELDS)
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from agent.models.state import SubTask
+from llm.tokens import count_tokens
+
+SUMMARY_PROMPT = """请用不超过 {max_words} 字概括以下任务执行结果，保留与任务相关的关键事实、数据和错误信息：
+
+任务描述: {task_description}
+任务类型: {task_type}
+执行结果:
+{task_result}
+
+概括:
+"""
+
+STATUS_EMOJI = {"completed": "✅", "failed": "❌"}
+# 打包时的优先级：数字越小越先分配预算
+STATUS_PRIORITY = {"completed": 0, "failed": 1}
+# 剩余预算不足时不再放入截断的结果
+MIN_BODY_TOKENS = 8
+
+# 任务待概括项: (缓存键, 任务, 概括提示词)
+SummaryRequest = Tuple[str, SubTask, str]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, counter: Callable[[str], int] = count_tokens) -> str:
+    """截断文本使其不超过 max_tokens（二分查找截断位置）"""
+    if counter(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if counter(text[:middle]) + 1 <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + "…"
+
+
+class ContextBuilder:
+    """报告上下文构建：长结果先并行概括（map），再按优先级装入 token 预算（reduce）
+
+    任务概括按任务内容缓存，重新生成报告时不会重复概括。
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        summarize_over: int = 400,
+        summary_tokens: int = 200,
+        history_share: float = 0.2,
+        cache_entries: int = 256,
+        token_counter: Callable[[str], int] = count_tokens,
+    ):
+        self.max_tokens = max_tokens
+        self.summarize_over = summarize_over
+        self.summary_tokens = summary_tokens
+        self.history_share = history_share
+        self.cache_entries = cache_entries
+        self.count = token_counter
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"summary_hits": 0, "summarized": 0, "summary_errors": 0}
+
+    @classmethod
+    def from_config(cls, config) -> "ContextBuilder":
+        """根据 agent.report.context 配置创建"""
+        context_config = config.get_config("agent.report.context") or {}
+        return cls(
+            max_tokens=context_config.get("max_tokens", 3000),
+            summarize_over=context_config.get("summarize_over", 400),
+            summary_tokens=context_config.get("summary_tokens", 200),
+            history_share=context_config.get("history_share", 0.2),
+            cache_entries=context_config.get("summary_cache_entries", 256),
+        )
+
+    def _summary_key(self, task: SubTask) -> str:
+        """概括提示词的内容哈希加上概括参数；不含任务ID，内容相同的任务共用概括"""
+        content = "\x00".join([task["type"], task["description"], task.get("result") or ""])
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return f"{digest}:{self.summary_tokens}:{self.max_tokens}"
+
+    def _cached_summary(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                self._stats["summary_hits"] += 1
+            return summary
+
+    def summary_requests(self, tasks: Sequence[SubTask]) -> List[SummaryRequest]:
+        """map 步骤的输入：结果过长且没有缓存概括的任务"""
+        requests = []
+        for task in tasks:
+            result = task.get("result") or ""
+            if self.count(result) <= self.summarize_over:
+                continue
+            key = self._summary_key(task)
+            if self._cached_summary(key) is not None:
+                continue
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.summary_tokens,
+                task_description=task["description"],
+                task_type=task["type"],
+                task_result=truncate_to_tokens(result, self.max_tokens, self.count),
+            )
+            requests.append((key, task, prompt))
+        return requests
+
+    def store_summaries(self, requests: Sequence[SummaryRequest], responses: Sequence) -> None:
+        """保存 map 步骤的结果；概括失败的任务在打包时直接截断原结果"""
+        with self._lock:
+            for (key, _, _), response in zip(requests, responses):
+                if isinstance(response, Exception) or not str(response).strip():
+                    self._stats["summary_errors"] += 1
+                    continue
+                self._summaries[key] = truncate_to_tokens(str(response).strip(), self.summary_tokens, self.count)
+                self._summaries.move_to_end(key)
+                self._stats["summarized"] += 1
+            while len(self._summaries) > self.cache_entries:
+                self._summaries.popitem(last=False)
+
+    def _task_body(self, task: SubTask) -> str:
+        result = task.get("result") or "无结果"
+        if self.count(result) <= self.summarize_over:
+            return result
+        with self._lock:
+            summary = self._summaries.get(self._summary_key(task))
+        return summary if summary is not None else truncate_to_tokens(result, self.summary_tokens, self.count)
+
+    def pack_tasks(self, tasks: Sequence[SubTask], budget: int) -> str:
+        """reduce 步骤：按优先级给任务分配预算，输出仍按原任务顺序"""
+        headers = [
+            f"{i + 1}. {STATUS_EMOJI.get(task['status'], '⏸')} {task['description']} ({task['type']})"
+            for i, task in enumerate(tasks)
+        ]
+        # 每个任务至少保留标题行
+        remaining = budget - sum(self.count(h) + 1 for h in headers)
+        bodies = [""] * len(tasks)
+        order = sorted(range(len(tasks)), key=lambda i: (STATUS_PRIORITY.get(tasks[i]["status"], 2), i))
+        for index in order:
+            if remaining <= 0:
+                break
+            body = "   结果: " + self._task_body(tasks[index])
+            cost = self.count(body) + 1
+            if cost > remaining:
+                if remaining < MIN_BODY_TOKENS:
+                    continue
+                body = truncate_to_tokens(body, remaining - 1, self.count)
+                cost = self.count(body) + 1
+            bodies[index] = body
+            remaining -= cost
+        return "".join(f"{header}\n{body}\n\n" if body else f"{header}\n\n" for header, body in zip(headers, bodies))
+
+    def pack_history(self, history: Sequence[Dict], budget: int) -> str:
+        """执行历史按时间顺序装入预算，超出部分只记录省略的条数"""
+        lines = []
+        used = 0
+        for i, entry in enumerate(history):
+            line = f"{i + 1}. {entry['action']}: {entry['result_summary']}"
+            cost = self.count(line) + 1
+            if used + cost > budget:
+                lines.append(f"... 省略其余 {len(history) - i} 条执行记录")
+                break
+            lines.append(line)
+            used += cost
+        return "".join(line + "\n" for line in lines)
+
+    def pack(self, tasks: Sequence[SubTask], history: Sequence[Dict]) -> Tuple[str, str]:
+        """在总预算内生成 (任务摘要, 执行历史)"""
+        history_budget = int(self.max_tokens * self.history_share)
+        history_text = self.pack_history(history, history_budget)
+        task_budget = self.max_tokens - self.count(history_text)
+        return self.pack_tasks(tasks, task_budget), history_text
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_summaries"] = len(self._summaries)
+        return stats
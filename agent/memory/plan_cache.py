@@ -0,0 +1,176 @@
+import copy
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 梅森素数，用于通用哈希 (a * x + b) mod P
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _literals(value: Any) -> Iterator[str]:
+    """任务参数中的字符串字面量（URL、路径、命令等），递归展开列表和字典"""
+    if isinstance(value, str):
+        if value.strip():
+            yield value.strip()
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _literals(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _literals(item)
+
+
+class PlanCache:
+    """任务计划缓存：用 MinHash + LSH 在本地查找近似重复的用户请求
+
+    近似命中时任务参数原样复用，因此只有缓存计划中的每个参数字面量（URL、路径、命令）
+    都出现在新请求中才接受命中；否则（如 v1 换成 v2、加上否定词后命令不在请求中）视为未命中。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # 固定种子生成哈希参数，保证签名在进程间一致
+        self._perms = [(2 * i + 1) * 0x9E3779B1 % _PRIME for i in range(num_perm)]
+        self._offsets = [(i * 0x85EBCA77 + 0xC2B2AE3D) % _PRIME for i in range(num_perm)]
+
+        # 归一化请求 -> (签名, 任务模板)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], List[Dict]]]" = OrderedDict()
+        # LSH 分桶: (band 序号, band 签名) -> 归一化请求集合
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "exact_hits": 0, "misses": 0, "literal_mismatches": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """归一化请求：全半角统一、小写、去标点、合并空白"""
+        text = unicodedata.normalize("NFKC", text).lower()
+        text = re.sub(r"[^\w\s]", " ", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _shingles(self, normalized: str) -> set:
+        """字符级 n-gram，中英文都适用"""
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+    def _signature(self, normalized: str) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in self._shingles(normalized)]
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+            for a, b in zip(self._perms, self._offsets)
+        )
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def similarity(self, a: str, b: str) -> float:
+        """估算两个请求的 Jaccard 相似度"""
+        sig_a = self._signature(self.normalize(a))
+        sig_b = self._signature(self.normalize(b))
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / self.num_perm
+
+    def lookup(self, request: str) -> Optional[List[Dict]]:
+        """查找近似请求的任务模板，未命中返回 None"""
+        normalized = self.normalize(request)
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None:
+                self._entries.move_to_end(normalized)
+                self._stats["hits"] += 1
+                self._stats["exact_hits"] += 1
+                return copy.deepcopy(entry[1])
+
+            signature = self._signature(normalized)
+            candidates = set()
+            for key in self._bands(signature):
+                candidates.update(self._buckets.get(key, ()))
+
+            scored = []
+            for candidate in candidates:
+                candidate_sig = self._entries[candidate][0]
+                score = sum(x == y for x, y in zip(signature, candidate_sig)) / self.num_perm
+                if score >= self.threshold:
+                    scored.append((score, candidate))
+
+            text = unicodedata.normalize("NFKC", request).lower()
+            best = None
+            for _, candidate in sorted(scored, reverse=True):
+                if self._literals_match(self._entries[candidate][1], text):
+                    best = candidate
+                    break
+                self._stats["literal_mismatches"] += 1
+
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            return copy.deepcopy(self._entries[best][1])
+
+    @staticmethod
+    def _literals_match(templates: List[Dict], text: str) -> bool:
+        """缓存计划的每个参数字面量是否都出现在（NFKC、小写后的）新请求中"""
+        return all(
+            unicodedata.normalize("NFKC", literal).lower() in text
+            for template in templates
+            for literal in _literals(template.get("parameters"))
+        )
+
+    def store(self, request: str, tasks: List[Dict]) -> None:
+        """保存任务模板（去掉结果和状态；保留 id 以便复用时还原依赖关系）"""
+        normalized = self.normalize(request)
+        templates = [
+            {k: copy.deepcopy(v) for k, v in task.items() if k not in ("result", "status")}
+            for task in tasks
+        ]
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+            signature = self._signature(normalized)
+            self._entries[normalized] = (signature, templates)
+            for key in self._bands(signature):
+                self._buckets.setdefault(key, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, normalized: str) -> None:
+        signature, _ = self._entries.pop(normalized)
+        for key in self._bands(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(normalized)
+                if not bucket:
+                    del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """命中/未命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
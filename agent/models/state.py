@@ -1,5 +1,6 @@
+import operator
 from typing import Annotated, List, Optional, Literal, Union, Dict
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.graph.message import add_messages
 
@@ -10,11 +11,39 @@ class SubTask(TypedDict):
     parameters: Dict             # 任务参数
     result: Optional[str]        # 任务结果
     status: Literal["pending", "running", "completed", "failed"]
+    depends_on: NotRequired[List[str]]  # 依赖的任务ID，全部完成后才能执行
+    details: NotRequired[Dict]   # 结构化执行信息（退出码、HTTP状态等），供验证规则使用
+
+# 任务补丁：任务ID -> 需要修改的字段；ID不存在时为完整的新任务
+TaskPatch = Dict[str, Dict]
+
+def merge_tasks(left: Dict[str, SubTask], right: Union[TaskPatch, List[SubTask]]) -> Dict[str, SubTask]:
+    """任务表合并：按ID把补丁字段合并到已有任务，新任务按顺序追加
+
+    节点只返回变化的字段（如 {task_id: {"status": "completed", "result": ...}}），
+    并行执行的任务各自的补丁互不覆盖。也接受完整任务组成的列表。
+    """
+    if not right:
+        return left
+    if isinstance(right, list):
+        right = {task["id"]: task for task in right}
+    # 只复制外层字典，未修改的任务对象直接复用
+    merged = dict(left)
+    for task_id, patch in right.items():
+        task = merged.get(task_id)
+        merged[task_id] = {**task, **patch} if task is not None else {**patch, "id": task_id}
+    return merged
+
+def get_task(state: "AgentState", task_id: Optional[str]) -> Optional[SubTask]:
+    """按ID查找任务"""
+    if not task_id:
+        return None
+    return state["tasks"].get(task_id)
 
 class AgentState(TypedDict):
     """完整的Agent状态模型"""
     messages: Annotated[List[Union[HumanMessage, AIMessage, SystemMessage]], add_messages]
-    tasks: List[SubTask]          # 任务列表
+    tasks: Annotated[Dict[str, SubTask], merge_tasks]  # 任务表：任务ID -> 任务，按计划顺序排列
     current_task_id: Optional[str]  # 当前执行的任务ID
     working_memory: Dict          # 临时工作内存
-    execution_history: List[Dict]  # 执行历史记录
\ No newline at end of file
+    execution_history: Annotated[List[Dict], operator.add]  # 执行历史记录（只追加）
@@ -1,24 +1,28 @@
-from typing import Callable
+from typing import Optional
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableLambda
 from agent.models.state import AgentState
-from llm.llm_factory import create_llm_client
+from llm.llm_factory import get_llm_client
 from config import Config
 
-def create_chatbot_node(config: Config) -> tuple[str, Callable]:
-    """创建对话节点（返回节点名称和函数）"""
-    llm_client = create_llm_client(config)
-    
+def _last_human_prompt(state: AgentState) -> str:
+    """查找最后一条人类消息"""
+    last_human_msg: Optional[HumanMessage] = next(
+        (msg for msg in reversed(state["messages"]) 
+         if isinstance(msg, HumanMessage)),
+        None
+    )
+    return last_human_msg.content if last_human_msg else ""
+
+def create_chatbot_node(config: Config) -> tuple[str, Runnable]:
+    """创建对话节点（返回节点名称和节点）"""
     def _chatbot_node(state: AgentState):
-        # 查找最后一条人类消息
-        last_human_msg = next(
-            (msg for msg in reversed(state["messages"]) 
-             if isinstance(msg, HumanMessage)),
-            None
-        )
-        prompt = last_human_msg.content if last_human_msg else ""
-        
-        # 生成回复
-        response = llm_client.generate_text(prompt, {})
+        # 生成回复（每次获取共享客户端，llm 配置变化后立即生效）
+        response = get_llm_client(config).generate_text(_last_human_prompt(state), {})
+        return {"messages": [AIMessage(content=response)]}
+    
+    async def _achatbot_node(state: AgentState):
+        response = await get_llm_client(config).agenerate_text(_last_human_prompt(state), {})
         return {"messages": [AIMessage(content=response)]}
     
-    return "chatbot", _chatbot_node  # 简化为返回元组
+    return "chatbot", RunnableLambda(_chatbot_node, afunc=_achatbot_node, name="chatbot")
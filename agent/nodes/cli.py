@@ -1,130 +1,210 @@
-from typing import Dict, Any, Tuple, Callable, List
-import subprocess
-import shlex
+from typing import Dict, Any, Optional, Tuple, List
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
 from pathlib import Path
 from langchain_core.messages import AIMessage
-from agent.models.state import AgentState
+from langchain_core.runnables import Runnable, RunnableLambda
+from agent.models.state import AgentState, SubTask, get_task
+from agent.tools.command_cache import CommandCache
+from agent.tools.command_policy import CommandPolicy
+from agent.tools.subprocess_runner import (
+    DEFAULT_MAX_OUTPUT_BYTES, DEFAULT_TIMEOUT, LineCallback, run_command,
+)
+from agent.utils.aio import run_sync
+from agent.utils.instrument import register_stats
+from agent.utils.reloadable import Reloadable
+from agent.utils.streaming import get_writer
+from config import Config
 
-def create_cli_node(config: Dict) -> Tuple[str, Callable]:
+DEFAULT_MAX_CONCURRENCY = 4
+
+def create_cli_node(config: Dict) -> Tuple[str, Runnable]:
     """创建命令行执行节点"""
     
-    # 安全命令白名单
+    # 安全命令白名单（以 $ 结尾的规则不允许附加参数）
     default_safe_commands = [
         "ls", "pwd", "echo", "cat", "find",
-        "python --version", "python3 --version",
+        "python --version $", "python3 --version $",
         "date", "whoami", "hostname"
     ]
-    SAFE_COMMANDS = config.get_config("agent.cli.safe_commands") or default_safe_commands
+    # 拒绝规则优先：禁止 find 删除文件或执行其他命令
+    default_deny_commands = ["find ** -delete", "find ** -exec", "find ** -execdir"]
     
-    def is_command_safe(command: str) -> bool:
-        """检查命令是否安全"""
-        cmd = shlex.split(command)[0] if command else ""
-        
-        # 检查完整命令是否在白名单中
-        if command in SAFE_COMMANDS:
-            return True
-            
-        # 检查命令前缀是否在白名单中
-        for safe_cmd in SAFE_COMMANDS:
-            if command.startswith(safe_cmd):
-                return True
-                
-        # 检查基础命令是否在白名单中
-        return cmd in [shlex.split(c)[0] for c in SAFE_COMMANDS]
+    def _build_settings(config: Config) -> Dict[str, Any]:
+        """按 agent.cli 配置构建执行设置；配置变化后重新构建，正在执行的命令不受影响"""
+        cli_config = config.get_config("agent.cli") or {}
+        command_cache = CommandCache.from_config(config)
+        register_stats(config, "agent_command_cache", command_cache)
+        return {
+            # 允许/拒绝规则只编译一次
+            "policy": CommandPolicy.from_config(config, default_safe_commands, default_deny_commands),
+            # 执行限制：超时、保留的输出字节数、同时执行的命令数
+            "timeout": cli_config.get("timeout", DEFAULT_TIMEOUT),
+            "max_output_bytes": cli_config.get("max_output_bytes", DEFAULT_MAX_OUTPUT_BYTES),
+            "max_concurrency": cli_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            # 命令结果缓存（可选，默认关闭）
+            "cache": command_cache,
+            # 每个事件循环一个信号量，并发数变化时随设置一起重建
+            "semaphores": weakref.WeakKeyDictionary(),
+        }
     
-    def run_safe_command(command: str, timeout=30) -> Dict[str, Any]:
-        """安全地执行命令"""
+    settings = Reloadable(config, _build_settings, "agent.cli")
+    
+    async def arun_safe_command(command: str, on_line: Optional[LineCallback] = None) -> Dict[str, Any]:
+        """安全地执行命令（异步，流式读取输出，输出字节数有上限）
+
+        a && b 形式的命令链按顺序执行，前一个命令失败则停止。
+        """
         try:
-            if not is_command_safe(command):
+            current = settings.get()
+            allowed, reason = current["policy"].check(command)
+            if not allowed:
                 return {
                     "success": False,
-                    "error": f"安全限制: 命令 '{command}' 不在允许列表中"
+                    "error": f"安全限制: {reason}"
                 }
                 
-            # 使用shlex分割命令以处理引号和空格
-            cmd_parts = shlex.split(command)
-            
-            result = subprocess.run(
-                cmd_parts,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=timeout,
-                cwd=Path.home(),  # 在用户目录执行
-                text=True,        # 返回字符串而非字节
-                shell=False       # 禁用shell执行提高安全性
-            )
+            # 按 && 拆分命令链，各命令不经过shell执行
+            segments = CommandPolicy.split(command)
             
+            results = []
+            for cmd_parts in segments:
+                result = await _run_segment(current, cmd_parts, on_line)
+                results.append(result)
+                if not result["success"]:
+                    break
+            if len(results) == 1:
+                return results[0]
             return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr,
-                "return_code": result.returncode
+                "success": all(r["success"] for r in results) and len(results) == len(segments),
+                "output": "".join(r["output"] for r in results),
+                "error": "".join(r["error"] for r in results),
+                "return_code": results[-1]["return_code"],
+                "timed_out": any(r.get("timed_out") for r in results),
+                "truncated": any(r.get("truncated") for r in results),
+                "from_cache": all(r.get("from_cache") for r in results),
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    async def _run_segment(current: Dict[str, Any], cmd_parts: List[str],
+                           on_line: Optional[LineCallback]) -> Dict[str, Any]:
+        """执行单个命令；启用缓存时先查缓存，命中则不启动子进程"""
+        cwd = str(Path.home())  # 在用户目录执行
+        command_cache = current["cache"]
+        fingerprint = None
+        if command_cache is not None and command_cache.cacheable(cmd_parts):
+            cached = command_cache.get(cmd_parts, cwd)
+            if cached is not None:
+                return {**cached, "from_cache": True}
+            fingerprint = command_cache.snapshot(cmd_parts, cwd)
+        
+        async with _command_slot(current):
+            result = await run_command(
+                cmd_parts,
+                timeout=current["timeout"],
+                cwd=cwd,
+                max_output_bytes=current["max_output_bytes"],
+                on_line=on_line,
+            )
+        if fingerprint is not None:
+            command_cache.set(cmd_parts, cwd, result, fingerprint)
+        return result
+    
+    def run_safe_command(command: str, on_line: Optional[LineCallback] = None) -> Dict[str, Any]:
+        """安全地执行命令（在共享的后台事件循环中执行）"""
+        return run_sync(arun_safe_command(command, on_line))
+    
+    @asynccontextmanager
+    async def _command_slot(current: Dict[str, Any]):
+        """占用一个命令并发名额（每个事件循环一个信号量）"""
+        loop = asyncio.get_running_loop()
+        semaphores = current["semaphores"]
+        semaphore = semaphores.get(loop)
+        if semaphore is None:
+            semaphore = semaphores[loop] = asyncio.Semaphore(current["max_concurrency"])
+        async with semaphore:
+            yield
+    
+    def _line_streamer(task_id: str) -> LineCallback:
+        """把命令输出逐行写入图的自定义流"""
+        writer = get_writer()
+        return lambda stream, line: writer({"node": "cli_command", "task_id": task_id, "stream": stream, "line": line})
             
-    def _cli_node(state: AgentState) -> Dict[str, Any]:
-        """命令行执行节点"""
+    def _begin_task(state: AgentState) -> Tuple[Optional[Dict[str, Any]], Optional[SubTask], str]:
+        """查找当前命令行任务；无需执行时返回 (状态更新, None, "")"""
         # 获取当前任务
         current_task_id = state["current_task_id"]
         if not current_task_id:
             return {
                 "messages": [AIMessage(content="没有待执行的命令行任务")]
-            }
+            }, None, ""
             
         # 查找当前任务
-        current_task = next((t for t in state["tasks"] if t["id"] == current_task_id), None)
+        current_task = get_task(state, current_task_id)
         if not current_task or current_task["type"] != "cli":
             # 不是CLI任务，跳过
-            return state
-            
-        # 更新任务状态
-        tasks = list(state["tasks"])  # 创建副本
-        for i, task in enumerate(tasks):
-            if task["id"] == current_task_id:
-                tasks[i] = {**task, "status": "running"}
+            return {}, None, ""
         
         # 获取命令
-        command = current_task["parameters"].get("command", "")
-        if not command:
+        return None, current_task, current_task["parameters"].get("command", "")
+    
+    def _finish_task(state: AgentState, current_task: SubTask, command: str,
+                     result_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """根据命令执行结果生成任务和执行历史的更新"""
+        current_task_id = current_task["id"]
+        if result_data is None:
             result = "错误: 未提供命令参数"
             status = "failed"
+        elif result_data["success"]:
+            result = f"命令 '{command}' 执行成功:\n\n{result_data['output']}"
+            status = "completed"
         else:
-            # 执行命令
-            result_data = run_safe_command(command)
-            
-            if result_data["success"]:
-                result = f"命令 '{command}' 执行成功:\n\n{result_data['output']}"
-                status = "completed"
-            else:
-                result = f"命令 '{command}' 执行失败: {result_data['error']}"
-                status = "failed"
-        
-        # 更新任务结果
-        for i, task in enumerate(tasks):
-            if task["id"] == current_task_id:
-                tasks[i] = {**task, "result": result, "status": status}
+            result = f"命令 '{command}' 执行失败: {result_data['error']}"
+            status = "failed"
         
-        # 查找下一个任务
-        next_task_id = None
-        for task in tasks:
-            if task["status"] == "pending":
-                next_task_id = task["id"]
-                break
+        # 只返回本任务变化的字段，由 tasks 的 reducer 合并（并行执行的任务互不覆盖）
+        task_patch = {"result": result, "status": status}
+        if result_data is not None:
+            # 结构化执行信息，供验证规则使用；被安全策略拦截时没有退出码
+            task_patch["details"] = {
+                "return_code": result_data.get("return_code"),
+                "timed_out": result_data.get("timed_out", False),
+                "truncated": result_data.get("truncated", False),
+                "output_chars": len(result_data.get("output") or ""),
+            }
         
-        # 更新执行历史
-        history = list(state["execution_history"])
-        history.append({
+        # 追加执行历史
+        history_entry = {
             "task_id": current_task_id,
             "action": "cli_execution",
             "result_summary": f"{'成功' if status == 'completed' else '失败'}: {current_task['description']}"
-        })
+        }
+        if result_data and result_data.get("from_cache"):
+            history_entry["from_cache"] = True
         
         return {
             "messages": [AIMessage(content=f"命令行执行结果: {result}")],
-            "tasks": tasks,
-            "current_task_id": next_task_id,
-            "execution_history": history
+            "tasks": {current_task_id: task_patch},
+            "execution_history": [history_entry]
         }
     
-    return "cli_command", _cli_node
\ No newline at end of file
+    def _cli_node(state: AgentState) -> Dict[str, Any]:
+        """命令行执行节点"""
+        update, current_task, command = _begin_task(state)
+        if current_task is None:
+            return update
+        # 流写入器需要在节点线程中获取，再交给后台事件循环使用
+        result_data = run_safe_command(command, _line_streamer(current_task["id"])) if command else None
+        return _finish_task(state, current_task, command, result_data)
+    
+    async def _acli_node(state: AgentState) -> Dict[str, Any]:
+        """命令行执行节点（异步）"""
+        update, current_task, command = _begin_task(state)
+        if current_task is None:
+            return update
+        result_data = await arun_safe_command(command, _line_streamer(current_task["id"])) if command else None
+        return _finish_task(state, current_task, command, result_data)
+    
+    return "cli_command", RunnableLambda(_cli_node, afunc=_acli_node, name="cli_command")
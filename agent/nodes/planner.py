@@ -1,9 +1,13 @@
-from typing import Dict, List, Any, Tuple, Callable
+from typing import Dict, List, Any, Optional, Tuple
 from uuid import uuid4
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
 from agent.models.state import AgentState, SubTask
-from llm.llm_factory import create_llm_client
+from agent.memory.plan_cache import PlanCache
+from agent.utils.instrument import register_stats
+from agent.utils.reloadable import Reloadable
+from llm.llm_factory import get_llm_client
 from config import Config
 
 PLANNER_PROMPT = """你是一位专业的任务规划AI助手。请将用户的需求分解为一系列可执行的子任务。
@@ -17,40 +21,105 @@ PLANNER_PROMPT = """你是一位专业的任务规划AI助手。请将用户的
 - reflect: 思考和总结已有信息
 
 请以JSON格式返回任务列表，每个任务包含:
+- id: 任务编号(如 "t1")
 - type: 任务类型
 - description: 任务描述
-- parameters: 相关参数(URL、命令等)
+- parameters: 相关参数(URL、命令等)；web 任务需要访问多个网址时可用 "urls" 列表，或 "url_template"（如 "https://example.com/{{city}}"）加 "values" 列表，这些网址会并发访问
+- depends_on: 必须先完成的任务编号列表，没有依赖时为空列表；互不依赖的任务会并行执行
 
 示例响应:
 ```json
 [
-  {
+  {{
+    "id": "t1",
     "type": "web",
     "description": "查询天气信息",
-    "parameters": {"url": "https://weather.example.com/beijing"}
-  },
-  {
+    "parameters": {{"url": "https://weather.example.com/beijing"}},
+    "depends_on": []
+  }},
+  {{
+    "id": "t2",
     "type": "cli",
     "description": "创建存储目录",
-    "parameters": {"command": "mkdir -p ~/weather_data"}
-  }
+    "parameters": {{"command": "mkdir -p ~/weather_data"}},
+    "depends_on": []
+  }},
+  {{
+    "id": "t3",
+    "type": "reflect",
+    "description": "整理天气信息",
+    "parameters": {{}},
+    "depends_on": ["t1"]
+  }}
 ]
 ```
 
 请分析用户需求并返回合适的任务计划:
 """
 
-def create_planner_node(config: Config) -> Tuple[str, Callable]:
+def create_planner_node(config: Config) -> Tuple[str, Runnable]:
     """创建任务规划节点"""
-    llm_client = create_llm_client(config)
+    def _build_settings(config: Config) -> Dict[str, Any]:
+        """按 agent.planner 配置构建设置，配置变化后重新构建"""
+        # 近似请求的任务计划缓存
+        plan_cache = None
+        plan_cache_config = config.get_config("agent.planner.plan_cache") or {}
+        if plan_cache_config.get("enabled", True):
+            plan_cache = PlanCache(
+                max_entries=plan_cache_config.get("max_entries", 128),
+                threshold=plan_cache_config.get("threshold", 0.8),
+            )
+        register_stats(config, "agent_plan_cache", plan_cache)
+        return {
+            # 是否允许使用LLM响应缓存（默认开启）
+            "use_cache": config.get_config("agent.planner.cache") is not False,
+            "plan_cache": plan_cache,
+        }
     
-    def _planner_node(state: AgentState) -> Dict[str, Any]:
+    settings = Reloadable(config, _build_settings, "agent.planner")
+    
+    def _build_tasks(tasks_data: List[Dict]) -> List[SubTask]:
+        """根据任务数据生成带新ID的待执行任务，并把依赖中的任务编号换成新ID"""
+        local_ids = [str(task_data.get("id", i + 1)) for i, task_data in enumerate(tasks_data)]
+        id_map = {local_id: str(uuid4())[:8] for local_id in local_ids}
+        return [
+            SubTask(
+                id=id_map[local_id],
+                type=task_data["type"],
+                description=task_data["description"],
+                parameters=task_data.get("parameters", {}),
+                result=None,
+                status="pending",
+                depends_on=[
+                    id_map[str(dep)] for dep in task_data.get("depends_on") or []
+                    if str(dep) in id_map and str(dep) != local_id
+                ]
+            )
+            for local_id, task_data in zip(local_ids, tasks_data)
+        ]
+    
+    def _plan_response(tasks: List[SubTask], history: List[Dict]) -> Dict[str, Any]:
+        """生成计划总结消息和状态更新"""
+        plan_summary = f"我已将您的请求分解为{len(tasks)}个子任务:\n\n"
+        for i, task in enumerate(tasks):
+            plan_summary += f"{i+1}. {task['description']} ({task['type']})\n"
+        
+        return {
+            "messages": [AIMessage(content=plan_summary)],
+            "tasks": {task["id"]: task for task in tasks},
+            "current_task_id": tasks[0]["id"] if tasks else None,
+            "working_memory": {},
+            "execution_history": history
+        }
+    
+    def _plan_without_llm(state: AgentState) -> Tuple[Optional[Dict[str, Any]], str]:
+        """无需调用LLM即可规划时返回状态更新，否则返回 (None, 用户请求)"""
         # 获取最后一条用户消息
         user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
         if not user_messages:
             return {
                 "messages": [AIMessage(content="请先输入您的请求")]
-            }
+            }, ""
         
         user_request = user_messages[-1].content
         
@@ -70,16 +139,27 @@ def create_planner_node(config: Config) -> Tuple[str, Callable]:
             plan_summary = "我将为您获取当前日期和时间。"
             return {
                 "messages": [AIMessage(content=plan_summary)],
-                "tasks": tasks,
+                "tasks": {tasks[0]["id"]: tasks[0]},
                 "current_task_id": tasks[0]["id"],
                 "working_memory": {},
                 "execution_history": []
-            }
+            }, user_request
         
-        # 生成任务计划
-        prompt = PLANNER_PROMPT.format(user_request=user_request)
-        response = llm_client.generate_text(prompt, {})
+        # 复用近似请求的任务计划
+        plan_cache = settings.get()["plan_cache"]
+        if plan_cache is not None:
+            cached_tasks = plan_cache.lookup(user_request)
+            if cached_tasks:
+                return _plan_response(_build_tasks(cached_tasks), [{
+                    "task_id": None,
+                    "action": "planning",
+                    "result_summary": "复用相似请求的缓存任务计划"
+                }]), user_request
         
+        return None, user_request
+    
+    def _parse_plan(user_request: str, response: str) -> Dict[str, Any]:
+        """解析LLM返回的任务计划"""
         # 尝试解析JSON
         try:
             import json
@@ -106,7 +186,7 @@ def create_planner_node(config: Config) -> Tuple[str, Callable]:
                     )
                     return {
                         "messages": [AIMessage(content=f"我将分析您的请求: {user_request}")],
-                        "tasks": [fallback_task],
+                        "tasks": {fallback_task["id"]: fallback_task},
                         "current_task_id": fallback_task["id"],
                         "working_memory": {},
                         "execution_history": []
@@ -120,30 +200,12 @@ def create_planner_node(config: Config) -> Tuple[str, Callable]:
             tasks_data = json.loads(tasks_json)
             
             # 添加任务ID和状态
-            tasks = []
-            for task_data in tasks_data:
-                task = SubTask(
-                    id=str(uuid4())[:8],
-                    type=task_data["type"],
-                    description=task_data["description"],
-                    parameters=task_data.get("parameters", {}),
-                    result=None,
-                    status="pending"
-                )
-                tasks.append(task)
-            
-            # 创建计划总结消息
-            plan_summary = f"我已将您的请求分解为{len(tasks)}个子任务:\n\n"
-            for i, task in enumerate(tasks):
-                plan_summary += f"{i+1}. {task['description']} ({task['type']})\n"
+            tasks = _build_tasks(tasks_data)
+            plan_cache = settings.get()["plan_cache"]
+            if plan_cache is not None and tasks:
+                plan_cache.store(user_request, tasks)
             
-            return {
-                "messages": [AIMessage(content=plan_summary)],
-                "tasks": tasks,
-                "current_task_id": tasks[0]["id"] if tasks else None,
-                "working_memory": {},
-                "execution_history": []
-            }
+            return _plan_response(tasks, [])
             
         except Exception as e:
             # 创建一个后备任务
@@ -158,10 +220,30 @@ def create_planner_node(config: Config) -> Tuple[str, Callable]:
             
             return {
                 "messages": [AIMessage(content=f"我将执行一个基本的信息获取任务。")],
-                "tasks": [fallback_task],
+                "tasks": {fallback_task["id"]: fallback_task},
                 "current_task_id": fallback_task["id"],
                 "working_memory": {},
                 "execution_history": []
             }
     
-    return "planner", _planner_node
+    def _planner_node(state: AgentState) -> Dict[str, Any]:
+        planned, user_request = _plan_without_llm(state)
+        if planned is not None:
+            return planned
+        
+        # 生成任务计划（每次获取共享客户端，llm 配置变化后立即生效）
+        prompt = PLANNER_PROMPT.format(user_request=user_request)
+        response = get_llm_client(config).generate_text(prompt, {"cache": settings.get()["use_cache"]})
+        return _parse_plan(user_request, response)
+    
+    async def _aplanner_node(state: AgentState) -> Dict[str, Any]:
+        planned, user_request = _plan_without_llm(state)
+        if planned is not None:
+            return planned
+        
+        # 生成任务计划
+        prompt = PLANNER_PROMPT.format(user_request=user_request)
+        response = await get_llm_client(config).agenerate_text(prompt, {"cache": settings.get()["use_cache"]})
+        return _parse_plan(user_request, response)
+    
+    return "planner", RunnableLambda(_planner_node, afunc=_aplanner_node, name="planner")
@@ -1,7 +1,12 @@
-from typing import Dict, Any, Tuple, Callable, List
+from typing import Dict, Any, Optional, Tuple, List
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from agent.memory.context_builder import ContextBuilder
 from agent.models.state import AgentState
-from llm.llm_factory import create_llm_client
+from agent.utils.instrument import register_stats
+from agent.utils.reloadable import Reloadable
+from agent.utils.streaming import get_writer
+from llm.llm_factory import get_llm_client
 from config import Config
 
 REPORT_PROMPT = """你是一位专业的报告总结AI助手。请根据以下任务执行情况，生成一份全面的总结报告：
@@ -23,64 +28,98 @@ REPORT_PROMPT = """你是一位专业的报告总结AI助手。请根据以下
 请确保报告条理清晰、语言专业。
 """
 
-def create_report_node(config: Config) -> Tuple[str, Callable]:
+def create_report_node(config: Config) -> Tuple[str, Runnable]:
     """创建结果报告节点"""
-    llm_client = create_llm_client(config)
+    def _build_settings(config: Config) -> Dict[str, Any]:
+        """按 agent.report 配置构建设置，配置变化后重新构建"""
+        # 按 token 预算构建报告上下文，长结果先概括
+        context_builder = ContextBuilder.from_config(config)
+        register_stats(config, "agent_report_context", context_builder)
+        return {
+            # 是否允许使用LLM响应缓存（默认开启）
+            "use_cache": config.get_config("agent.report.cache") is not False,
+            "context_builder": context_builder,
+        }
     
-    def _report_node(state: AgentState) -> Dict[str, Any]:
-        # 检查是否所有任务都已完成
-        all_completed = True
-        for task in state["tasks"]:
-            if task["status"] not in ["completed", "failed"]:
-                all_completed = False
-                break
-                
-        # 获取最后一条用户消息
-        user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
-        user_request = user_messages[-1].content if user_messages else "未找到用户请求"
-        
+    settings = Reloadable(config, _build_settings, "agent.report")
+    
+    def _prepare_report(state: AgentState) -> Optional[Dict[str, Any]]:
+        """无需调用LLM时返回状态更新，否则返回 None"""
         # 简单任务的特殊处理：如果只有一个任务，直接返回结果
-        if len(state["tasks"]) == 1 and state["tasks"][0]["status"] in ["completed", "failed"]:
-            task = state["tasks"][0]
+        task = next(iter(state["tasks"].values())) if len(state["tasks"]) == 1 else None
+        if task is not None and task["status"] in ["completed", "failed"]:
             if task["type"] == "cli" and "date" in task["parameters"].get("command", ""):
                 return {
                     "messages": [AIMessage(content=f"当前日期和时间是:\n\n{task['result']}")],
                     "current_task_id": None  # 标记所有任务已完成
                 }
+        return None
+    
+    def _report_prompt(state: AgentState, context_builder: ContextBuilder) -> str:
+        """在 token 预算内生成报告提示词（长结果已在 map 步骤中概括）"""
+        # 获取最后一条用户消息
+        user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
+        user_request = user_messages[-1].content if user_messages else "未找到用户请求"
+        
+        # 路由只在没有可执行任务时进入报告，未执行的任务（思考类任务、依赖失败的任务）交给报告处理
+        task_summary, execution_history = context_builder.pack(list(state["tasks"].values()), state["execution_history"])
+        
+        # 生成报告
+        return REPORT_PROMPT.format(
+            user_request=user_request,
+            task_summary=task_summary,
+            execution_history=execution_history
+        )
+    
+    def _report_update(report: str) -> Dict[str, Any]:
+        return {
+            "messages": [AIMessage(content=report)],
+            "current_task_id": None  # 标记所有任务已完成
+        }
+    
+    def _report_node(state: AgentState) -> Dict[str, Any]:
+        update = _prepare_report(state)
+        if update is not None:
+            return update
+        
+        current = settings.get()
+        use_cache, context_builder = current["use_cache"], current["context_builder"]
+        # 每次获取共享客户端，llm 配置变化后立即生效
+        llm_client = get_llm_client(config)
+        
+        # map：并行概括过长的任务结果
+        requests = context_builder.summary_requests(list(state["tasks"].values()))
+        if requests:
+            responses = llm_client.generate_batch([prompt for _, _, prompt in requests], {"cache": use_cache})
+            context_builder.store_summaries(requests, responses)
+        
+        # 边生成边输出报告token
+        writer = get_writer()
+        chunks = []
+        for chunk in llm_client.stream_text(_report_prompt(state, context_builder), {"cache": use_cache}):
+            chunks.append(chunk)
+            writer({"node": "report", "token": chunk})
+        return _report_update("".join(chunks))
+    
+    async def _areport_node(state: AgentState) -> Dict[str, Any]:
+        update = _prepare_report(state)
+        if update is not None:
+            return update
+        
+        current = settings.get()
+        use_cache, context_builder = current["use_cache"], current["context_builder"]
+        llm_client = get_llm_client(config)
         
-        # 如果没有待执行的任务，生成报告
-        if all_completed or (state["current_task_id"] is None and state["tasks"]):
-            # 生成任务摘要
-            task_summary = ""
-            for i, task in enumerate(state["tasks"]):
-                status_emoji = "✅" if task["status"] == "completed" else "❌"
-                result_preview = task.get("result", "无结果")
-                if result_preview and len(result_preview) > 100:
-                    result_preview = result_preview[:100] + "..."
-                    
-                task_summary += f"{i+1}. {status_emoji} {task['description']} ({task['type']})\n"
-                task_summary += f"   结果: {result_preview}\n\n"
-            
-            # 生成执行历史摘要
-            execution_history = ""
-            for i, entry in enumerate(state["execution_history"]):
-                execution_history += f"{i+1}. {entry['action']}: {entry['result_summary']}\n"
-            
-            # 生成报告
-            prompt = REPORT_PROMPT.format(
-                user_request=user_request,
-                task_summary=task_summary,
-                execution_history=execution_history
-            )
-            
-            report = llm_client.generate_text(prompt, {})
-            
-            return {
-                "messages": [AIMessage(content=report)],
-                "current_task_id": None  # 标记所有任务已完成
-            }
+        requests = context_builder.summary_requests(list(state["tasks"].values()))
+        if requests:
+            responses = await llm_client.agenerate_batch([prompt for _, _, prompt in requests], {"cache": use_cache})
+            context_builder.store_summaries(requests, responses)
         
-        # 如果还有任务待执行，不生成报告
-        return state
+        writer = get_writer()
+        chunks = []
+        async for chunk in llm_client.astream_text(_report_prompt(state, context_builder), {"cache": use_cache}):
+            chunks.append(chunk)
+            writer({"node": "report", "token": chunk})
+        return _report_update("".join(chunks))
     
-    return "report", _report_node
+    return "report", RunnableLambda(_report_node, afunc=_areport_node, name="report")
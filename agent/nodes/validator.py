@@ -1,7 +1,15 @@
-from typing import Dict, Any, Tuple, Callable, List
+import asyncio
+import json
+import re
+from typing import Dict, Any, Tuple, List
 from langchain_core.messages import AIMessage, SystemMessage
-from agent.models.state import AgentState
-from llm.llm_factory import create_llm_client
+from langchain_core.runnables import Runnable, RunnableLambda
+from agent.models.state import AgentState, SubTask
+from agent.scheduler import ready_tasks
+from agent.utils.reloadable import Reloadable
+from agent.validation import ValidationPolicy
+from llm.llm_client import BatchResult
+from llm.llm_factory import get_llm_client
 from config import Config
 
 VALIDATION_PROMPT = """你是一位任务验证专家。请评估以下任务执行结果是否成功，并提供简短分析：
@@ -14,108 +22,209 @@ VALIDATION_PROMPT = """你是一位任务验证专家。请评估以下任务执
 请判断任务是否成功执行，如果失败请说明原因并提供改进建议。
 """
 
-def create_validator_node(config: Config) -> Tuple[str, Callable]:
+BATCH_VALIDATION_PROMPT = """你是一位任务验证专家。请逐一评估以下 {count} 个任务的执行结果是否成功，并为每个任务提供简短分析：
+
+{tasks}
+
+请以JSON格式返回每个任务的验证结论，每项包含:
+- id: 任务编号
+- verdict: 是否成功执行及简短分析；失败时说明原因并提供改进建议
+
+示例响应:
+```json
+[
+  {{"id": "a1b2c3d4", "verdict": "任务成功: 已获取所需信息"}}
+]
+```
+"""
+
+BATCH_TASK_TEMPLATE = """### 任务 {index}
+编号: {task_id}
+任务描述: {task_description}
+任务类型: {task_type}
+执行结果:
+{task_result}
+"""
+
+DEFAULT_BATCH_SIZE = 5
+
+# 验证结果: (任务, 动作, 结论, 验证方式)
+Verdict = Tuple[SubTask, str, str, str]
+
+def parse_batch_verdicts(response: str, task_ids: List[str]) -> Dict[str, str]:
+    """从批量验证的回复中解析每个任务的结论；只返回能对应到任务编号的结论"""
+    json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response)
+    if json_match:
+        verdicts_json = json_match.group(1)
+    else:
+        array_match = re.search(r'\[\s*{.*}\s*\]', response, re.DOTALL)
+        if not array_match:
+            return {}
+        verdicts_json = array_match.group(0)
+    try:
+        items = json.loads(verdicts_json)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+    
+    wanted = set(task_ids)
+    verdicts = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        task_id = str(item.get("id", ""))
+        verdict = item.get("verdict")
+        if task_id in wanted and isinstance(verdict, str) and verdict.strip():
+            verdicts[task_id] = verdict.strip()
+    return verdicts
+
+def create_validator_node(config: Config) -> Tuple[str, Runnable]:
     """创建结果验证节点"""
-    llm_client = create_llm_client(config)
+    def _build_settings(config: Config) -> Dict[str, Any]:
+        """按 agent.validator 配置构建设置，配置变化后重新构建"""
+        return {
+            # 是否允许使用LLM响应缓存（默认开启）
+            "use_cache": config.get_config("agent.validator.cache") is not False,
+            # 确定性规则优先，无法判定时才调用LLM
+            "policy": ValidationPolicy.from_config(config),
+            # 一次LLM调用最多验证的任务数，1 表示逐个验证
+            "batch_size": max(1, config.get_config("agent.validator.batch_size") or DEFAULT_BATCH_SIZE),
+        }
     
-    def _validator_node(state: AgentState) -> Dict[str, Any]:
-        # 获取当前任务
-        current_task_id = state["current_task_id"]
-        if not current_task_id:
-            return state
-            
-        # 查找当前任务
-        current_task = next((t for t in state["tasks"] if t["id"] == current_task_id), None)
-        if not current_task:
-            return state
-            
-        # 特殊处理日期相关任务 - 简化流程，不需要验证
-        if current_task["type"] == "cli" and current_task["status"] == "completed":
-            if "date" in current_task["parameters"].get("command", ""):
-                # 更新执行历史
-                history = list(state.get("execution_history", []))
-                history.append({
-                    "task_id": current_task_id,
-                    "action": "validation",
-                    "result_summary": "日期命令成功执行，无需验证"
-                })
-                
-                # 直接跳到报告阶段
-                return {
-                    "working_memory": state.get("working_memory", {}),
-                    "execution_history": history,
-                    "current_task_id": None  # 直接完成所有任务
-                }
-        
-        # 如果任务已完成或失败，则进行验证
-        if current_task["status"] in ["completed", "failed"]:
-            try:
-                # 准备验证
-                prompt = VALIDATION_PROMPT.format(
-                    task_description=current_task["description"],
-                    task_type=current_task["type"],
-                    task_result=current_task["result"] or "无结果"
-                )
-                
-                # 获取验证结果
-                validation_result = llm_client.generate_text(prompt, {})
-                
-                # 更新工作内存
-                working_memory = dict(state.get("working_memory", {}))
-                if "validations" not in working_memory:
-                    working_memory["validations"] = {}
-                working_memory["validations"][current_task_id] = validation_result
-                
-                # 更新执行历史
-                history = list(state.get("execution_history", []))
-                history.append({
-                    "task_id": current_task_id,
-                    "action": "validation",
-                    "result_summary": validation_result[:100] + "..." if len(validation_result) > 100 else validation_result
-                })
-                
-                # 查找下一个任务
-                next_task_id = None
-                for task in state["tasks"]:
-                    if task["status"] == "pending":
-                        next_task_id = task["id"]
-                        break
-                
-                # 如果没有下一个任务，则验证结束，不更新current_task_id
-                if next_task_id:
-                    return {
-                        "working_memory": working_memory,
-                        "execution_history": history,
-                        "current_task_id": next_task_id
-                    }
+    settings = Reloadable(config, _build_settings, "agent.validator")
+    
+    def _pending_validations(state: AgentState) -> List[SubTask]:
+        """找出上次验证之后执行结束、尚未验证的任务"""
+        validations = state.get("working_memory", {}).get("validations", {})
+        return [
+            task for task in state["tasks"].values()
+            if task["status"] in ["completed", "failed"] and task["id"] not in validations
+        ]
+    
+    def _validation_prompt(task: SubTask) -> str:
+        return VALIDATION_PROMPT.format(
+            task_description=task["description"],
+            task_type=task["type"],
+            task_result=task["result"] or "无结果"
+        )
+    
+    def _batch_prompt(tasks: List[SubTask]) -> str:
+        blocks = [
+            BATCH_TASK_TEMPLATE.format(
+                index=i + 1,
+                task_id=task["id"],
+                task_description=task["description"],
+                task_type=task["type"],
+                task_result=task["result"] or "无结果"
+            )
+            for i, task in enumerate(tasks)
+        ]
+        return BATCH_VALIDATION_PROMPT.format(count=len(tasks), tasks="\n".join(blocks))
+    
+    def _plan_validations(state: AgentState, current: Dict[str, Any]) -> Tuple[List[SubTask], Dict[str, Verdict], List[List[SubTask]]]:
+        """先用规则验证；返回 (待验证任务, 规则结论, 需要LLM验证的批次)"""
+        policy, batch_size = current["policy"], current["batch_size"]
+        pending = _pending_validations(state)
+        verdicts = {}
+        llm_tasks = []
+        for task in pending:
+            verdict = policy.evaluate(task)
+            if verdict is not None:
+                verdicts[task["id"]] = (task, "validation", verdict, "rule")
+            else:
+                llm_tasks.append(task)
+        batches = [llm_tasks[i:i + batch_size] for i in range(0, len(llm_tasks), batch_size)]
+        return pending, verdicts, batches
+    
+    def _round_prompts(batches: List[List[SubTask]]) -> List[str]:
+        """第一轮提示：多个任务的批次用批量提示，单个任务用普通提示"""
+        return [_batch_prompt(batch) if len(batch) > 1 else _validation_prompt(batch[0]) for batch in batches]
+    
+    def _llm_verdict(task: SubTask, response: BatchResult, method: str) -> Verdict:
+        if isinstance(response, Exception):
+            # 如果验证出错，添加错误信息并继续执行
+            return task, "validation_error", f"验证过程中出错: {str(response)}", method
+        return task, "validation", response, method
+    
+    def _collect_round(batches: List[List[SubTask]], responses: List[BatchResult]) -> Tuple[List[Verdict], List[SubTask]]:
+        """解析第一轮结果；返回 (结论, 需要逐个验证的任务)"""
+        verdicts, missing = [], []
+        for batch, response in zip(batches, responses):
+            if len(batch) == 1:
+                verdicts.append(_llm_verdict(batch[0], response, "llm"))
+                continue
+            parsed = {} if isinstance(response, Exception) else parse_batch_verdicts(response, [t["id"] for t in batch])
+            for task in batch:
+                if task["id"] in parsed:
+                    verdicts.append((task, "validation", parsed[task["id"]], "llm_batch"))
                 else:
-                    return {
-                        "working_memory": working_memory,
-                        "execution_history": history,
-                        "current_task_id": None  # 表示所有任务已完成
-                    }
-            except Exception as e:
-                # 如果验证出错，添加错误信息并继续执行
-                history = list(state.get("execution_history", []))
-                history.append({
-                    "task_id": current_task_id,
-                    "action": "validation_error",
-                    "result_summary": f"验证过程中出错: {str(e)}"
-                })
-                
-                # 继续下一个任务
-                next_task_id = None
-                for task in state["tasks"]:
-                    if task["status"] == "pending":
-                        next_task_id = task["id"]
-                        break
-                        
-                return {
-                    "execution_history": history,
-                    "current_task_id": next_task_id if next_task_id else None
-                }
+                    # 解析失败或缺少结论的任务逐个验证
+                    missing.append(task)
+        return verdicts, missing
+    
+    def _validation_update(state: AgentState, verdicts: List[Verdict]) -> Dict[str, Any]:
+        """记录验证结果 (任务, 动作, 结论, 验证方式)，并指向下一个可执行任务"""
+        # 更新工作内存
+        working_memory = dict(state.get("working_memory", {}))
+        validations = dict(working_memory.get("validations", {}))
+        
+        # 追加执行历史
+        history = []
+        for task, action, verdict, method in verdicts:
+            validations[task["id"]] = verdict
+            history.append({
+                "task_id": task["id"],
+                "action": action,
+                "result_summary": verdict[:100] + "..." if len(verdict) > 100 else verdict,
+                "method": method
+            })
+        working_memory["validations"] = validations
+        
+        # 记录本轮规则验证（跳过LLM）和LLM验证的数量
+        if verdicts:
+            rule_count = sum(1 for v in verdicts if v[3] == "rule")
+            llm_count = len(verdicts) - rule_count
+            history.append({
+                "task_id": None,
+                "action": "validation_summary",
+                "result_summary": f"规则验证 {rule_count} 个任务，LLM验证 {llm_count} 个任务",
+                "skipped_llm": rule_count,
+                "llm_validated": llm_count
+            })
         
-        # 如果任务未完成，则不进行验证
-        return state
+        # 查找下一个任务；没有时为None，表示所有任务已完成
+        ready = ready_tasks(state["tasks"])
+        return {
+            "working_memory": working_memory,
+            "execution_history": history,
+            "current_task_id": ready[0]["id"] if ready else None
+        }
+    
+    def _validator_node(state: AgentState) -> Dict[str, Any]:
+        current = settings.get()
+        use_cache = current["use_cache"]
+        # 每次获取共享客户端，llm 配置变化后立即生效
+        llm_client = get_llm_client(config)
+        pending, verdicts, batches = _plan_validations(state, current)
+        # 所有批次并发发送
+        responses = llm_client.generate_batch(_round_prompts(batches), {"cache": use_cache})
+        round_verdicts, missing = _collect_round(batches, responses)
+        responses = llm_client.generate_batch([_validation_prompt(t) for t in missing], {"cache": use_cache})
+        round_verdicts += [_llm_verdict(t, r, "llm") for t, r in zip(missing, responses)]
+        verdicts.update((v[0]["id"], v) for v in round_verdicts)
+        return _validation_update(state, [verdicts[task["id"]] for task in pending])
+    
+    async def _avalidator_node(state: AgentState) -> Dict[str, Any]:
+        current = settings.get()
+        use_cache = current["use_cache"]
+        llm_client = get_llm_client(config)
+        pending, verdicts, batches = _plan_validations(state, current)
+        responses = await llm_client.agenerate_batch(_round_prompts(batches), {"cache": use_cache})
+        round_verdicts, missing = _collect_round(batches, responses)
+        responses = await llm_client.agenerate_batch([_validation_prompt(t) for t in missing], {"cache": use_cache})
+        round_verdicts += [_llm_verdict(t, r, "llm") for t, r in zip(missing, responses)]
+        verdicts.update((v[0]["id"], v) for v in round_verdicts)
+        return _validation_update(state, [verdicts[task["id"]] for task in pending])
     
-    return "validator", _validator_node
+    return "validator", RunnableLambda(_validator_node, afunc=_avalidator_node, name="validator")
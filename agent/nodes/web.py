@@ -1,117 +1,220 @@
-from typing import Dict, Any, Tuple, Callable
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import weakref
 import httpx
-import re
-from bs4 import BeautifulSoup
 from langchain_core.messages import AIMessage
-from agent.models.state import AgentState, SubTask
+from langchain_core.runnables import Runnable, RunnableLambda
+from agent.models.state import AgentState, SubTask, get_task
+from agent.tools.html_extract import DEFAULT_MAX_CHARS, get_extractor
+from agent.tools.http_cache import HTTPCache
+from agent.tools.http_client import SharedHTTPClient
+from agent.utils.aio import run_sync
+from agent.utils.instrument import register_stats
+from agent.utils.reloadable import Reloadable
+from config import Config
 
-def create_web_node(config: Dict) -> Tuple[str, Callable]:
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_CONCURRENT_FETCHES = 8
+
+def task_urls(parameters: Dict[str, Any]) -> List[str]:
+    """web任务的URL列表：支持 url、urls 列表，或 url_template + values
+
+    url_template 用 str.format 填充，values 的元素为字典时按名称填充；为单个值时，
+    模板只有一个命名字段（如 {city}）则填入该字段，否则按位置填充。
+    模板与值不匹配时抛出 ValueError。重复的URL只访问一次。
+    """
+    urls = []
+    if parameters.get("url"):
+        urls.append(parameters["url"])
+    urls.extend(parameters.get("urls") or [])
+    template = parameters.get("url_template")
+    if template:
+        try:
+            names = {name for _, name, _, _ in Formatter().parse(template) if name and not name.isdigit()}
+            for value in parameters.get("values") or []:
+                if isinstance(value, dict):
+                    urls.append(template.format(**value))
+                elif len(names) == 1:
+                    urls.append(template.format(**{next(iter(names)): value}))
+                else:
+                    urls.append(template.format(value))
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"无法用 values 填充 url_template {template!r}: {type(e).__name__}: {e}") from e
+    return list(dict.fromkeys(url for url in urls if url))
+
+def create_web_node(config: Config) -> Tuple[str, Runnable]:
     """创建网页访问节点"""
     
-    async def fetch_url(url: str) -> Dict[str, Any]:
+    def _build_settings(config: Config) -> Dict[str, Any]:
+        """按 agent.web 配置构建抓取设置；配置变化后重新构建，旧的客户端和缓存在进行中的抓取结束后关闭"""
+        # 磁盘HTTP缓存（可选）
+        http_cache = HTTPCache.from_config(config)
+        register_stats(config, "agent_http_cache", http_cache)
+        # 正文提取：优先使用 selectolax / lxml，不可用时回退到标准库解析器
+        extract_config = config.get_config("agent.web.extract") or {}
+        return {
+            # 网页节点持有的长期共享HTTP客户端（连接池复用，设置被替换或进程退出时关闭）
+            "client": SharedHTTPClient.from_config(config),
+            "cache": http_cache,
+            # 多URL任务的全局并发上限（每个事件循环一个信号量）
+            "max_concurrent_fetches": config.get_config("agent.web.max_concurrent_fetches") or DEFAULT_MAX_CONCURRENT_FETCHES,
+            "semaphores": weakref.WeakKeyDictionary(),
+            "extractor": get_extractor(
+                extract_config.get("backend", "auto"),
+                max_chars=extract_config.get("max_chars", DEFAULT_MAX_CHARS),
+            ),
+            # 单个页面最多读取的字节数，超出部分不再下载
+            "max_bytes": extract_config.get("max_bytes", DEFAULT_MAX_BYTES),
+        }
+    
+    settings = Reloadable(config, _build_settings, "agent.web")
+    
+    async def _read_capped(response: httpx.Response, max_bytes: int) -> bytes:
+        """按块读取响应正文，达到字节上限后停止"""
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes]
+    
+    async def fetch_url(current: Dict[str, Any], url: str) -> Dict[str, Any]:
         """安全地获取URL内容"""
+        http_cache = current["cache"]
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={"User-Agent": "Mozilla/5.0 AI Research Agent"}
-                )
+            cached = http_cache.lookup(url) if http_cache else None
+            if cached and cached["fresh"] and cached["extracted"]:
+                # 缓存仍然新鲜：跳过网络请求和HTML解析
+                return {"success": True, "url": url, "from_cache": True, **cached["extracted"]}
+            
+            # 过期的缓存条目用条件请求重新验证
+            headers = HTTPCache.conditional_headers(cached) if cached else {}
+            async with current["client"].stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached and cached["extracted"]:
+                    await asyncio.to_thread(http_cache.revalidated, url, response.headers)
+                    return {"success": True, "url": url, "from_cache": True, **cached["extracted"]}
                 response.raise_for_status()
-                
-                # 解析HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 提取正文内容
-                main_content = ""
-                
-                # 尝试找到主要内容区域
-                main_tags = soup.find_all(['article', 'main', 'div'], class_=re.compile(r'content|main|article'))
-                if main_tags:
-                    main_content = main_tags[0].get_text(strip=True)
-                else:
-                    # 备选方案：获取所有段落
-                    paragraphs = soup.find_all('p')
-                    main_content = "\n".join([p.get_text(strip=True) for p in paragraphs])
-                
-                # 限制内容长度
-                main_content = main_content[:5000] + "..." if len(main_content) > 5000 else main_content
-                
-                return {
-                    "success": True,
-                    "content": main_content,
-                    "title": soup.title.string if soup.title else "无标题",
-                    "url": response.url
-                }
-                
+                body = await _read_capped(response, current["max_bytes"])
+            
+            extracted = current["extractor"].extract(body.decode(response.encoding or "utf-8", errors="replace"))
+            if http_cache:
+                # 写入需要提交事务并可能淘汰旧条目，放到线程中执行，不阻塞事件循环
+                await asyncio.to_thread(http_cache.store, url, response.headers, body, extracted)
+            
+            return {"success": True, "url": str(response.url), "status_code": response.status_code, **extracted}
+            
         except Exception as e:
             return {
                 "success": False,
+                "url": url,
+                "status_code": e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None,
                 "error": str(e)
             }
     
-    def _web_node(state: AgentState) -> Dict[str, Any]:
-        """网页访问节点"""
+    async def fetch_urls(urls: List[str]) -> List[Dict[str, Any]]:
+        """并发获取多个URL，单个URL失败不影响其他URL；结果顺序与输入一致"""
+        # 抓取期间持有设置，配置重新加载时旧的客户端和缓存等到抓取结束后才关闭
+        with settings.lease() as current:
+            loop = asyncio.get_running_loop()
+            semaphores = current["semaphores"]
+            semaphore = semaphores.get(loop)
+            if semaphore is None:
+                semaphore = semaphores[loop] = asyncio.Semaphore(current["max_concurrent_fetches"])
+            
+            async def _fetch(url: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await fetch_url(current, url)
+            
+            return list(await asyncio.gather(*(_fetch(url) for url in urls)))
+    
+    def _begin_task(state: AgentState) -> Tuple[Optional[Dict[str, Any]], Optional[SubTask], List[str]]:
+        """查找当前web任务；无需执行时返回 (状态更新, None, [])"""
         # 获取当前任务
         current_task_id = state["current_task_id"]
         if not current_task_id:
             return {
                 "messages": [AIMessage(content="没有待执行的任务")]
-            }
+            }, None, []
             
         # 查找当前任务
-        current_task = next((t for t in state["tasks"] if t["id"] == current_task_id), None)
+        current_task = get_task(state, current_task_id)
         if not current_task or current_task["type"] != "web":
             # 不是web任务，跳过
-            return state
-            
-        # 更新任务状态
-        tasks = list(state["tasks"])  # 创建副本
-        for i, task in enumerate(tasks):
-            if task["id"] == current_task_id:
-                tasks[i] = {**task, "status": "running"}
+            return {}, None, []
         
-        # 获取URL
-        url = current_task["parameters"].get("url", "")
-        if not url:
+        # 获取URL列表；模板无法展开时任务失败，不中断整个流程
+        try:
+            return None, current_task, task_urls(current_task["parameters"])
+        except ValueError as e:
+            return _finish_task(state, current_task, [], error=str(e)), None, []
+    
+    def _format_result(result_data: Dict[str, Any]) -> str:
+        url = result_data["url"]
+        if result_data["success"]:
+            return f"成功从 {url} 获取内容:\n\n标题: {result_data['title']}\n\n{result_data['content']}"
+        return f"访问 {url} 失败: {result_data['error']}"
+    
+    def _finish_task(state: AgentState, current_task: SubTask,
+                     results: List[Dict[str, Any]], error: Optional[str] = None) -> Dict[str, Any]:
+        """根据抓取结果生成任务和执行历史的更新"""
+        current_task_id = current_task["id"]
+        succeeded = sum(1 for r in results if r["success"])
+        if error:
+            result = f"错误: {error}"
+        elif not results:
             result = "错误: 未提供URL参数"
-            status = "failed"
+        elif len(results) == 1:
+            result = _format_result(results[0])
         else:
-            # 同步调用异步函数(简化处理)
-            import asyncio
-            result_data = asyncio.run(fetch_url(url))
-            
-            if result_data["success"]:
-                result = f"成功从 {url} 获取内容:\n\n标题: {result_data['title']}\n\n{result_data['content']}"
-                status = "completed"
-            else:
-                result = f"访问 {url} 失败: {result_data['error']}"
-                status = "failed"
+            # 多个URL：汇总每个URL的状态和内容
+            sections = [f"{'✅' if r['success'] else '❌'} {_format_result(r)}" for r in results]
+            header = f"共访问 {len(results)} 个网址，成功 {succeeded} 个，失败 {len(results) - succeeded} 个"
+            result = "\n\n---\n\n".join([header] + sections)
+        # 至少一个URL成功即视为任务完成
+        status = "completed" if succeeded else "failed"
         
-        # 更新任务结果
-        for i, task in enumerate(tasks):
-            if task["id"] == current_task_id:
-                tasks[i] = {**task, "result": result, "status": status}
+        # 每个URL的结构化结果，供验证规则使用
+        url_details = [
+            {"url": r["url"], "success": r["success"], "status_code": r.get("status_code"),
+             "content_chars": len(r.get("content") or "")}
+            for r in results
+        ]
         
-        # 查找下一个任务
-        next_task_id = None
-        for task in tasks:
-            if task["status"] == "pending":
-                next_task_id = task["id"]
-                break
+        # 只返回本任务变化的字段，由 tasks 的 reducer 合并（并行执行的任务互不覆盖）
+        task_patch = {"result": result, "status": status, "details": {"urls": url_details}}
         
-        # 更新执行历史
-        history = list(state["execution_history"])
-        history.append({
+        # 追加执行历史
+        history_entry = {
             "task_id": current_task_id,
             "action": "web_access",
-            "result_summary": f"{'成功' if status == 'completed' else '失败'}: {current_task['description']}"
-        })
+            "result_summary": f"{'成功' if status == 'completed' else '失败'}: {current_task['description']}",
+            "urls": [{"url": r["url"], "success": r["success"]} for r in results]
+        }
         
         return {
             "messages": [AIMessage(content=f"网页访问结果: {result}")],
-            "tasks": tasks,
-            "current_task_id": next_task_id,
-            "execution_history": history
+            "tasks": {current_task_id: task_patch},
+            "execution_history": [history_entry]
         }
     
-    return "web_access", _web_node
\ No newline at end of file
+    def _web_node(state: AgentState) -> Dict[str, Any]:
+        """网页访问节点"""
+        update, current_task, urls = _begin_task(state)
+        if current_task is None:
+            return update
+        # 在共享的后台事件循环中执行抓取
+        results = run_sync(fetch_urls(urls)) if urls else []
+        return _finish_task(state, current_task, results)
+    
+    async def _aweb_node(state: AgentState) -> Dict[str, Any]:
+        """网页访问节点（异步）"""
+        update, current_task, urls = _begin_task(state)
+        if current_task is None:
+            return update
+        results = await fetch_urls(urls) if urls else []
+        return _finish_task(state, current_task, results)
+    
+    return "web_access", RunnableLambda(_web_node, afunc=_aweb_node, name="web_access")
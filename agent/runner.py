@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import uuid4
+from langchain_core.messages import HumanMessage
+from agent.models.state import AgentState
+
+
+def create_initial_state(user_input: str) -> AgentState:
+    """根据用户输入创建初始状态"""
+    return {
+        "messages": [HumanMessage(content=user_input)],
+        "tasks": {},
+        "current_task_id": None,
+        "working_memory": {},
+        "execution_history": []
+    }
+
+
+def run_config(thread_id: Optional[str] = None, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """生成带 thread_id 的运行配置；不指定时为本次运行分配新的ID"""
+    config = dict(config or {})
+    configurable = dict(config.get("configurable") or {})
+    configurable.setdefault("thread_id", thread_id or uuid4().hex[:12])
+    config["configurable"] = configurable
+    return config
+
+
+def run_status(graph, thread_id: str) -> Optional[str]:
+    """查询运行状态：None 表示没有记录，"finished" 表示已完成，否则为中断的运行"""
+    snapshot = graph.get_state(run_config(thread_id))
+    if not snapshot.values:
+        return None
+    return "interrupted" if snapshot.next else "finished"
+
+
+async def arun_agent(graph, user_input: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """在当前事件循环中异步执行一次Agent流程；启用检查点时自动分配 thread_id"""
+    if graph.checkpointer is not None:
+        config = run_config(config=config)
+    return await graph.ainvoke(create_initial_state(user_input), config=config)
+
+
+async def aresume_agent(graph, thread_id: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """从最后一个检查点继续执行中断的运行，已完成的节点不会重新执行"""
+    return await graph.ainvoke(None, config=run_config(thread_id, config))
+
+
+async def arun_agents(graph, user_inputs: Iterable[str], max_concurrency: int = 100) -> List[Any]:
+    """在同一个事件循环中并发执行多次Agent流程
+
+    每次执行的结果按输入顺序返回；单次执行出错时对应位置为异常对象，不影响其他执行。
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run(user_input: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await arun_agent(graph, user_input)
+
+    return await asyncio.gather(*(_run(text) for text in user_inputs), return_exceptions=True)
@@ -0,0 +1,47 @@
+from typing import Callable, Dict, List, Union
+from langgraph.types import Send
+from agent.models.state import AgentState, SubTask
+from config import Config
+
+# 任务类型 -> 执行节点；其余类型（reflect、code）交给报告生成器处理
+EXECUTOR_NODES = {
+    "web": "web_access",
+    "cli": "cli_command",
+}
+
+DEFAULT_MAX_PARALLEL_TASKS = 4
+
+
+def ready_tasks(tasks: Dict[str, SubTask]) -> List[SubTask]:
+    """找出所有依赖已满足、可以立即执行的任务
+
+    依赖满足指依赖任务已成功完成，或依赖任务没有执行节点（由报告生成器处理）。
+    依赖失败的任务不会被执行。
+    """
+    def _satisfied(dep_id: str) -> bool:
+        dep = tasks.get(dep_id)
+        return dep is None or dep["status"] == "completed" or dep["type"] not in EXECUTOR_NODES
+
+    return [
+        task for task in tasks.values()
+        if task["status"] == "pending"
+        and task["type"] in EXECUTOR_NODES
+        and all(_satisfied(dep_id) for dep_id in task.get("depends_on", []))
+    ]
+
+
+def create_task_router(config: Config) -> Callable[[AgentState], Union[str, List[Send]]]:
+    """创建任务路由：把就绪任务并发分发给对应的执行节点，没有就绪任务时进入报告"""
+    def route_ready_tasks(state: AgentState) -> Union[str, List[Send]]:
+        # 每次路由时读取并发上限，配置重新加载后立即生效
+        max_parallel = config.get_config("agent.scheduler.max_parallel_tasks") or DEFAULT_MAX_PARALLEL_TASKS
+        ready = ready_tasks(state["tasks"])[:max_parallel]
+        if not ready:
+            return "report"
+        # 每个执行分支拿到完整状态，current_task_id 指向自己负责的任务
+        return [
+            Send(EXECUTOR_NODES[task["type"]], {**state, "current_task_id": task["id"]})
+            for task in ready
+        ]
+
+    return route_ready_tasks
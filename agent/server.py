@@ -0,0 +1,391 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from agent.graph_builder import build_agent_graph
+from agent.memory.checkpointer import SqliteCheckpointer
+from agent.runner import create_initial_state, run_config, run_status
+from agent.tools.http_client import aclose_shared_clients
+from config import Config
+from metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_RUNS = 4
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_DEADLINE = 300.0
+# 单个运行的事件缓冲：客户端读取过慢时暂停图的执行
+EVENT_BUFFER = 256
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# 服务指标
+SERVER_RUNS = "agent_server_runs_total"
+SERVER_RUNNING = "agent_server_runs_running"
+SERVER_QUEUED = "agent_server_runs_queued"
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 503: "Service Unavailable"}
+
+# 服务端事件: (事件名, 数据)
+Event = Tuple[str, Dict[str, Any]]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AgentService:
+    """在同一个事件循环中用一个编译好的流程图并发处理多个运行
+
+    最多同时执行 max_concurrent_runs 个运行，另有 max_queue 个排队名额，
+    都占满时新请求立即被拒绝（背压）。每个运行有截止时间，超时或客户端断开时
+    取消运行任务，取消会传递到正在进行的LLM调用、网页抓取和命令行进程。
+    """
+
+    def __init__(self, graph, max_concurrent_runs: int = DEFAULT_MAX_CONCURRENT_RUNS,
+                 max_queue: int = DEFAULT_MAX_QUEUE, default_deadline: float = DEFAULT_DEADLINE,
+                 max_deadline: Optional[float] = None, metrics: Optional[MetricsRegistry] = None):
+        self.graph = graph
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+        self.max_deadline = max_deadline
+        self.metrics = metrics
+        self.running = 0
+        self.queued = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_config(cls, config: Config, graph) -> "AgentService":
+        """根据 agent.server 配置创建服务"""
+        server_config = config.get_config("agent.server") or {}
+        return cls(
+            graph,
+            max_concurrent_runs=server_config.get("max_concurrent_runs", DEFAULT_MAX_CONCURRENT_RUNS),
+            max_queue=server_config.get("max_queue", DEFAULT_MAX_QUEUE),
+            default_deadline=server_config.get("default_deadline", DEFAULT_DEADLINE),
+            max_deadline=server_config.get("max_deadline"),
+            metrics=get_metrics(config),
+        )
+
+    def _update_gauges(self) -> None:
+        if self.metrics is not None:
+            self.metrics.set(SERVER_RUNNING, self.running)
+            self.metrics.set(SERVER_QUEUED, self.queued)
+
+    def _count(self, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc(SERVER_RUNS, outcome=outcome)
+
+    def try_admit(self) -> bool:
+        """占用一个排队名额；执行和排队名额都已占满时返回 False"""
+        if self.running + self.queued >= self.max_concurrent_runs + self.max_queue:
+            self._count("rejected")
+            return False
+        self.queued += 1
+        self._update_gauges()
+        return True
+
+    def deadline_for(self, requested: Any) -> float:
+        """请求的截止时间（秒），不超过 max_deadline"""
+        if requested is None:
+            deadline = self.default_deadline
+        else:
+            try:
+                deadline = float(requested)
+            except (TypeError, ValueError):
+                raise HTTPError(400, "deadline must be a number of seconds")
+        if not 0 < deadline < float("inf"):
+            raise HTTPError(400, "deadline must be positive")
+        return min(deadline, self.max_deadline) if self.max_deadline else deadline
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "running": self.running, "queued": self.queued,
+                "max_concurrent_runs": self.max_concurrent_runs, "max_queue": self.max_queue}
+
+    @staticmethod
+    def _node_event(node: str, update: Any) -> Event:
+        messages = [m.content for m in (update or {}).get("messages", []) if getattr(m, "type", None) == "ai"]
+        return "node", {"node": node, "messages": messages}
+
+    async def _produce(self, inputs: Any, config: Optional[Dict[str, Any]], queue: asyncio.Queue) -> None:
+        """执行图并把事件放入队列；队列满时等待，客户端读取慢时图也暂停"""
+        report = None
+        async for mode, chunk in self.graph.astream(inputs, config=config, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                if "token" in chunk:
+                    await queue.put(("token", {"token": chunk["token"]}))
+                elif "line" in chunk:
+                    await queue.put(("line", chunk))
+                continue
+            for node, update in chunk.items():
+                event = self._node_event(node, update)
+                if node == "report" and event[1]["messages"]:
+                    report = event[1]["messages"][-1]
+                await queue.put(event)
+        await queue.put(("done", {"report": report}))
+
+    async def stream_run(self, user_input: Optional[str], deadline: float,
+                         thread_id: Optional[str] = None) -> AsyncIterator[Event]:
+        """执行一次已获准入的运行（try_admit 之后调用），逐个产出事件
+
+        截止时间包含排队时间。user_input 为 None 时按 thread_id 恢复中断的运行。
+        生成器被关闭（客户端断开）时取消运行。
+        """
+        expires_at = time.monotonic() + deadline
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_runs)
+        admitted = False
+        try:
+            yield "queued", {"queued": self.queued, "running": self.running}
+            try:
+                await asyncio.wait_for(self._slots.acquire(), expires_at - time.monotonic())
+            except asyncio.TimeoutError:
+                self._count("deadline_exceeded")
+                yield "error", {"code": "deadline_exceeded", "error": "排队等待超过截止时间"}
+                return
+            admitted = True
+            self.queued -= 1
+            self.running += 1
+            self._update_gauges()
+
+            config = None
+            if self.graph.checkpointer is not None:
+                config = run_config(thread_id)
+            inputs = create_initial_state(user_input) if user_input is not None else None
+            yield "start", {"thread_id": config["configurable"]["thread_id"] if config else None}
+
+            async for event in self._run(inputs, config, expires_at):
+                yield event
+        finally:
+            if admitted:
+                self.running -= 1
+                self._slots.release()
+            else:
+                self.queued -= 1
+            self._update_gauges()
+
+    async def _run(self, inputs: Any, config: Optional[Dict[str, Any]], expires_at: float) -> AsyncIterator[Event]:
+        queue: asyncio.Queue = asyncio.Queue(EVENT_BUFFER)
+        producer = asyncio.ensure_future(self._produce(inputs, config, queue))
+        outcome = "cancelled"
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, producer}, timeout=max(0.0, expires_at - time.monotonic()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    event = getter.result()
+                    yield event
+                    if event[0] == "done":
+                        outcome = "completed"
+                        return
+                    continue
+                getter.cancel()
+                if producer in done:
+                    # 队列中剩余的事件已在前面取完，生产者出错结束
+                    outcome = "failed"
+                    error = producer.exception()
+                    yield "error", {"code": "failed", "error": str(error) if error else "运行意外结束"}
+                    return
+                outcome = "deadline_exceeded"
+                yield "error", {"code": "deadline_exceeded", "error": "运行超过截止时间，已取消"}
+                return
+        finally:
+            self._count(outcome)
+            if not producer.done():
+                # 取消会传递到正在执行的节点：LLM请求、网页抓取和命令行进程组
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _response(status: int, body: bytes, content_type: str = "application/json; charset=utf-8",
+              headers: Optional[Dict[str, str]] = None) -> bytes:
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _json_response(status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> bytes:
+    return _response(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    """读取一个HTTP请求，返回 (方法, 路径, 头部, 正文)"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "request header too large")
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("client closed the connection")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _parse_run_request(body: bytes) -> Dict[str, Any]:
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "request body must be JSON")
+    if not isinstance(request, dict):
+        raise HTTPError(400, "request body must be a JSON object")
+    if not isinstance(request.get("input"), str) and not request.get("resume"):
+        raise HTTPError(400, "'input' (string) or 'resume' (run ID) is required")
+    return request
+
+
+class AgentHTTPServer:
+    """HTTP 接口：
+
+    POST /runs     {"input": "...", "deadline": 秒} 或 {"resume": "<运行ID>"}，以 SSE 返回
+                   queued / start / node / token / line / done / error 事件
+    GET  /health   当前运行数和排队数
+    GET  /metrics  启用指标时返回 Prometheus 文本
+    """
+
+    def __init__(self, service: AgentService, host: str = "127.0.0.1", port: int = 8000):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "AgentHTTPServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, path, headers, body = await _read_request(reader)
+                await self._dispatch(method, path, body, reader, writer)
+            except HTTPError as e:
+                writer.write(_json_response(e.status, {"error": str(e)}))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Unhandled error while serving request")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _dispatch(self, method: str, path: str, body: bytes,
+                        reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        service = self.service
+        if path == "/health":
+            writer.write(_json_response(200, service.health()))
+        elif path == "/metrics":
+            if service.metrics is None:
+                raise HTTPError(404, "metrics are disabled")
+            writer.write(_response(200, service.metrics.to_prometheus().encode("utf-8"),
+                                   "text/plain; version=0.0.4; charset=utf-8"))
+        elif path == "/runs":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            request = _parse_run_request(body)
+            resume_id = request.get("resume")
+            if resume_id:
+                await self._check_resume(resume_id)
+            deadline = service.deadline_for(request.get("deadline"))
+            if not service.try_admit():
+                writer.write(_json_response(503, {"error": "server is at capacity"}, {"Retry-After": "1"}))
+            else:
+                user_input = None if resume_id else request["input"]
+                await self._stream(service.stream_run(user_input, deadline, resume_id), reader, writer)
+                return
+        else:
+            raise HTTPError(404, "not found")
+        await writer.drain()
+
+    async def _check_resume(self, thread_id: str) -> None:
+        graph = self.service.graph
+        if graph.checkpointer is None:
+            raise HTTPError(400, "checkpointing is disabled, runs cannot be resumed")
+        # 读取检查点是同步的数据库查询，放到线程中执行
+        status = await asyncio.to_thread(run_status, graph, thread_id)
+        if status is None:
+            raise HTTPError(404, f"run {thread_id} not found")
+        if status == "finished":
+            raise HTTPError(400, f"run {thread_id} has already finished")
+
+    async def _stream(self, events: AsyncIterator[Event], reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """把运行事件写成 SSE；客户端断开时关闭事件生成器，从而取消运行"""
+        writer.write(("HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                      "Cache-Control: no-cache\r\nConnection: close\r\n\r\n").encode("latin-1"))
+
+        async def _stream_events():
+            async for event, data in events:
+                writer.write(_sse(event, data))
+                await writer.drain()
+
+        streaming = asyncio.ensure_future(_stream_events())
+        # 请求已读完，读到 EOF 说明客户端已断开
+        disconnected = asyncio.ensure_future(reader.read())
+        try:
+            await asyncio.wait({streaming, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+            if not streaming.done():
+                streaming.cancel()
+            await asyncio.gather(streaming, return_exceptions=True)
+            await events.aclose()
+
+
+async def serve(config: Config) -> None:
+    """编译一次流程图，按 agent.server 配置启动HTTP服务，直到被取消"""
+    server_config = config.get_config("agent.server") or {}
+    checkpointer = SqliteCheckpointer.from_config(config)
+    graph = build_agent_graph(config, checkpointer)
+    # 配置文件修改后自动重新加载，节点设置和LLM客户端在下一次使用时重建；
+    # 正在进行的网页抓取继续使用旧的客户端和缓存，结束后才关闭它们
+    if config.get_config("config_reload.enabled"):
+        config.start_watching(config.get_config("config_reload.interval"))
+    server = AgentHTTPServer(AgentService.from_config(config, graph),
+                             host=server_config.get("host", "127.0.0.1"), port=server_config.get("port", 8000))
+    await server.start()
+    print(f"智能Agent服务已启动: http://{server.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        await aclose_shared_clients()
+        if checkpointer is not None:
+            checkpointer.close()
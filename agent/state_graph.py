@@ -5,7 +5,7 @@ from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
-from llm.llm_factory import create_llm_client
+from llm.llm_factory import get_llm_client
 from config import Config
 
 
@@ -22,11 +22,9 @@ graph_builder = StateGraph(State)
 # Load configuration
 config = Config()
 
-# Create LLM client using the factory with Config object
-llm_client = create_llm_client(config)
-
 def chatbot(state: State):
-    return {"messages": [llm_client.generate_text(state["messages"], {})]}
+    # 首次调用时才创建共享的LLM客户端，导入本模块不会加载模型SDK
+    return {"messages": [get_llm_client(config).generate_text(state["messages"], {})]}
 
 graph_builder.add_node("chatbot", chatbot)
 
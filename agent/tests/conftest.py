@@ -0,0 +1,118 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from llm.llm_client import LLMClient
+from config import Config
+from agent.nodes import planner, validator, report
+from agent.runner import create_initial_state
+
+class ScriptedLLM(LLMClient):
+    """按提示词前缀返回预设回复的假LLM"""
+    model_name = "scripted"
+
+    def __init__(self, plan: str):
+        self.plan = plan
+        self.prompts = []
+
+    def generate_text(self, prompt, config):
+        self.prompts.append(prompt)
+        if prompt.startswith("你是一位专业的任务规划AI助手"):
+            return self.plan
+        if prompt.startswith("你是一位任务验证专家"):
+            return "任务执行成功"
+        return "最终报告"
+
+    def chat(self, messages, config):
+        return self.generate_text(messages[-1]["content"], config)
+
+    def stream_text(self, prompt, config):
+        for word in self.generate_text(prompt, config):
+            yield word
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    """把所有节点的LLM替换为脚本化的假LLM"""
+    llm = ScriptedLLM('```json\n[{"type": "cli", "description": "打印问候", "parameters": {"command": "echo hi"}}]\n```')
+    for module in (planner, validator, report):
+        monkeypatch.setattr(module, "get_llm_client", lambda config: llm)
+    return llm
+
+# 测试期间磁盘缓存和检查点写到临时目录，不读写用户的 .cache
+ISOLATED_PATHS = {
+    "agent.web.cache.path": "http_cache.sqlite",
+    "llm.cache.path": "llm_responses.sqlite",
+    "agent.checkpoint.path": "checkpoints.sqlite",
+}
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config()
+    previous = {key: config.get_config(key) for key in ISOLATED_PATHS}
+    for key, name in ISOLATED_PATHS.items():
+        config.set_config(key, str(tmp_path / name))
+    yield config
+    for key, value in previous.items():
+        config.set_config(key, value)
+
+@pytest.fixture
+def make_state():
+    """根据用户输入生成初始状态"""
+    return create_initial_state
+
+@pytest.fixture
+def article():
+    """带导航和正文的测试页面"""
+    return b"""<html><head><title>Doc</title></head>
+<body><nav>menu</nav><div class="content"><p>Main text here.</p></div></body></html>"""
+
+@pytest.fixture
+def web_state():
+    """生成只有一个待执行web任务（w1）的状态"""
+    def _web_state(url):
+        task = {"id": "w1", "type": "web", "description": "fetch", "parameters": {"url": url},
+                "result": None, "status": "pending", "depends_on": []}
+        return {"messages": [], "tasks": {"w1": task}, "current_task_id": "w1",
+                "working_memory": {}, "execution_history": []}
+    return _web_state
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """本地测试用HTTP服务：按路径返回 server.pages 中的页面"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address, dict(self.headers)))
+        if server.delay:
+            time.sleep(server.delay)
+        page = server.pages.get(self.path)
+        if page is None:
+            status, body, headers = 404, b"not found", {}
+        else:
+            status, body, headers = page
+            if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+                status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def http_server():
+    """启动本地HTTP服务，pages: 路径 -> (状态码, 正文, 响应头)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.pages = {}
+    server.requests = []
+    server.delay = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
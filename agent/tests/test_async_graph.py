@@ -0,0 +1,23 @@
+import asyncio
+from agent.graph_builder import build_agent_graph
+from agent.runner import arun_agent, arun_agents
+
+def test_ainvoke_runs_async_nodes(scripted_llm, config):
+    graph = build_agent_graph(config)
+    result = asyncio.run(arun_agent(graph, "打个招呼"))
+    assert result["messages"][-1].content == "最终报告"
+    assert [t["status"] for t in result["tasks"].values()] == ["completed"]
+
+def test_astream_streams_report_tokens(scripted_llm, config, make_state):
+    graph = build_agent_graph(config)
+
+    async def collect():
+        return [chunk async for chunk in graph.astream(make_state("打个招呼"), stream_mode="custom")]
+
+    assert "".join(c["token"] for c in asyncio.run(collect()) if c["node"] == "report") == "最终报告"
+
+def test_many_runs_share_one_loop(scripted_llm, config):
+    graph = build_agent_graph(config)
+    results = asyncio.run(arun_agents(graph, [f"打个招呼 {i}" for i in range(20)], max_concurrency=10))
+    assert len(results) == 20
+    assert all(r["messages"][-1].content == "最终报告" for r in results)
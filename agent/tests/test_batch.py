@@ -0,0 +1,81 @@
+import json
+import pytest
+from agent.batch import ResultWriter, finished_ids, read_requests, run_batch
+
+def _write_jsonl(path, lines):
+    path.write_text("".join((line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n"
+                            for line in lines), encoding="utf-8")
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+@pytest.fixture
+def requests_file(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    _write_jsonl(path, [
+        {"id": "a", "input": "打个招呼"},
+        {"request_id": "b", "title": "标题", "body": "再打个招呼"},
+        "不是JSON",
+        {"input": "没有ID"},
+        {"id": "e"},
+    ])
+    return path
+
+def test_read_requests(requests_file):
+    requests = list(read_requests(str(requests_file)))
+    assert [r["id"] for r in requests] == ["a", "b", "line-3", "line-4", "e"]
+    assert requests[1]["input"] == "再打个招呼"
+    assert "error" in requests[2] and "error" in requests[4]
+
+@pytest.mark.parametrize("mode", ["thread", "async"])
+def test_batch_writes_results(scripted_llm, config, requests_file, tmp_path, mode):
+    output = tmp_path / "results.jsonl"
+    summary = run_batch(config, str(requests_file), str(output), workers=2, mode=mode, ordered=True)
+    records = _read_jsonl(output)
+    assert [r["id"] for r in records] == ["a", "b", "line-3", "line-4", "e"]
+    assert [r["status"] for r in records] == ["completed", "completed", "failed", "completed", "failed"]
+    assert records[0]["report"] == "最终报告"
+    assert records[0]["tasks"][0]["status"] == "completed"
+    assert summary["completed"] == 3 and summary["failed"] == 2 and summary["skipped"] == 0
+    assert summary["requests_per_sec"] > 0
+    assert summary["p50"] <= summary["p95"] <= summary["p99"]
+
+def test_restart_skips_finished_requests(scripted_llm, config, requests_file, tmp_path):
+    output = tmp_path / "results.jsonl"
+    _write_jsonl(output, [
+        {"id": "a", "status": "completed", "seconds": 1.0, "report": "旧报告"},
+        {"id": "b", "status": "failed", "seconds": 1.0, "error": "超时"},
+    ])
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "line-4", "status": "comp')  # 上次中断时写了一半的行，没有换行
+    assert finished_ids(str(output)) == {"a"}
+
+    summary = run_batch(config, str(requests_file), str(output), workers=2, mode="async")
+    assert summary["skipped"] == 1
+    assert summary["completed"] == 2
+    assert finished_ids(str(output)) == {"a", "b", "line-4"}
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[2] == '{"id": "line-4", "status": "comp'
+    assert len(lines) == 7 and all(isinstance(json.loads(line), dict) for line in lines[3:])
+    # 再次运行时只重试失败的行
+    summary = run_batch(config, str(requests_file), str(output), workers=2, mode="thread")
+    assert summary["skipped"] == 3 and summary["completed"] == 0 and summary["failed"] == 2
+
+def test_ordered_writer_buffers_out_of_order_results(tmp_path):
+    path = tmp_path / "out.jsonl"
+    writer = ResultWriter(str(path), ordered=True)
+    writer.write(1, {"id": "second"})
+    assert path.read_text(encoding="utf-8") == ""
+    writer.write(0, {"id": "first"})
+    writer.write(3, {"id": "fourth"})
+    assert [r["id"] for r in _read_jsonl(path)] == ["first", "second"]
+    # 关闭时写出剩余的结果，不丢失已完成的请求
+    writer.close()
+    assert [r["id"] for r in _read_jsonl(path)] == ["first", "second", "fourth"]
+
+def test_unordered_writer_writes_immediately(tmp_path):
+    path = tmp_path / "out.jsonl"
+    writer = ResultWriter(str(path))
+    writer.write(1, {"id": "second"})
+    assert [r["id"] for r in _read_jsonl(path)] == ["second"]
+    writer.close()
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from agent.graph_builder import build_agent_graph
+from agent.memory.checkpointer import SqliteCheckpointer
+from agent.runner import aresume_agent, arun_agent, run_config, run_status
+
+PLAN = """```json
+[
+  {"id": "t1", "type": "cli", "description": "a", "parameters": {"command": "echo one"}, "depends_on": []},
+  {"id": "t2", "type": "cli", "description": "b", "parameters": {"command": "echo two"}, "depends_on": ["t1"]}
+]
+```"""
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.sqlite"))
+    yield saver
+    saver.close()
+
+@pytest.fixture
+def crash_report_once(scripted_llm, monkeypatch):
+    """第一次生成报告时抛出异常，模拟运行中途崩溃"""
+    original = scripted_llm.generate_text
+    reports = []
+
+    def generate_text(prompt, config):
+        if not prompt.startswith(("你是一位专业的任务规划AI助手", "你是一位任务验证专家")):
+            reports.append(prompt)
+            if len(reports) == 1:
+                raise RuntimeError("进程崩溃")
+        return original(prompt, config)
+
+    monkeypatch.setattr(scripted_llm, "generate_text", generate_text)
+    return reports
+
+def _count(saver, table, channel=None):
+    query = f"SELECT COUNT(*) FROM {table}" + (" WHERE channel = ?" if channel else "")
+    return saver._db.execute(query, (channel,) if channel else ()).fetchone()[0]
+
+def test_run_is_checkpointed_and_reloadable(scripted_llm, config, make_state, checkpointer, tmp_path):
+    scripted_llm.plan = PLAN
+    graph = build_agent_graph(config, checkpointer)
+    run_cfg = run_config("run-1")
+    result = graph.invoke(make_state("两个命令"), config=run_cfg)
+    assert result["messages"][-1].content == "最终报告"
+    assert run_status(graph, "run-1") == "finished"
+    assert run_status(graph, "missing") is None
+
+    # 重新打开数据库（新进程）后仍能读到完整状态
+    reopened = SqliteCheckpointer(checkpointer.path)
+    try:
+        state = build_agent_graph(config, reopened).get_state(run_cfg)
+        assert state.values["tasks"] == result["tasks"]
+        assert len(state.values["execution_history"]) == len(result["execution_history"])
+        assert len(list(reopened.list(run_cfg, limit=2))) == 2
+    finally:
+        reopened.close()
+
+def test_checkpoint_writes_are_incremental(scripted_llm, config, make_state, checkpointer):
+    scripted_llm.plan = PLAN
+    graph = build_agent_graph(config, checkpointer)
+    graph.invoke(make_state("两个命令"), config=run_config("run-1"))
+
+    checkpoints = _count(checkpointer, "checkpoints")
+    # 任务表只在规划和执行任务时变化，验证器、报告等步骤不会重写
+    assert 0 < _count(checkpointer, "blobs", "tasks") < checkpoints
+    assert _count(checkpointer, "blobs") < checkpoints * 5
+
+def test_resume_skips_finished_nodes(scripted_llm, config, make_state, checkpointer, crash_report_once):
+    scripted_llm.plan = PLAN
+    graph = build_agent_graph(config, checkpointer)
+    run_cfg = run_config("run-1")
+    with pytest.raises(RuntimeError):
+        graph.invoke(make_state("两个命令"), config=run_cfg)
+    assert run_status(graph, "run-1") == "interrupted"
+    prompts = len(scripted_llm.prompts)
+
+    steps = []
+    for chunk in graph.stream(None, config=run_cfg, stream_mode="updates"):
+        steps.extend(chunk.keys())
+    assert steps == ["report"]
+    # 恢复时不会重新规划或重新验证
+    assert len(scripted_llm.prompts) == prompts + 1
+    state = graph.get_state(run_cfg).values
+    assert [e["action"] for e in state["execution_history"]].count("cli_execution") == 2
+    assert state["messages"][-1].content == "最终报告"
+
+def test_async_run_and_resume(scripted_llm, config, checkpointer, crash_report_once):
+    graph = build_agent_graph(config, checkpointer)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await arun_agent(graph, "打个招呼", run_config("run-a"))
+        return await aresume_agent(graph, "run-a")
+
+    result = asyncio.run(scenario())
+    assert result["messages"][-1].content == "最终报告"
+    assert [e["action"] for e in result["execution_history"]].count("cli_execution") == 1
+
+def test_from_config(config, tmp_path):
+    previous = config.get_config("agent.checkpoint")
+    try:
+        config.set_config("agent.checkpoint", {"enabled": False})
+        assert SqliteCheckpointer.from_config(config) is None
+        config.set_config("agent.checkpoint", {"enabled": True, "path": str(tmp_path / "c.sqlite")})
+        saver = SqliteCheckpointer.from_config(config)
+        assert saver.path == str(tmp_path / "c.sqlite")
+        saver.close()
+    finally:
+        config.set_config("agent.checkpoint", previous)
@@ -0,0 +1,89 @@
+import os
+import time
+import pytest
+from agent.tools.command_cache import CommandCache
+
+OK = {"success": True, "output": "host\n", "error": "", "return_code": 0}
+
+def test_ttl_per_command_and_longest_rule():
+    cache = CommandCache(ttl={"hostname": 3600, "date": 0, "git": 10, "git log": 60})
+    assert cache.ttl_for(["hostname"]) == 3600
+    assert cache.ttl_for(["date", "+%s"]) == 0
+    assert cache.ttl_for(["git", "log", "-1"]) == 60
+    assert cache.ttl_for(["git", "status"]) == 10
+    assert cache.ttl_for(["uname"]) == 0
+
+def test_hit_miss_and_key(tmp_path):
+    cache = CommandCache(ttl={"hostname": 3600})
+    cwd = str(tmp_path)
+    assert cache.get(["hostname"], cwd) is None
+    assert cache.set(["hostname"], cwd, OK)
+    assert cache.get(["hostname"], cwd) == OK
+    assert cache.get(["hostname"], "/elsewhere") is None
+    assert cache.get(["hostname", "-f"], cwd) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 3, 1)
+
+def test_uncacheable_results_are_not_stored(tmp_path):
+    cache = CommandCache(ttl={"hostname": 3600})
+    assert not cache.set(["date"], str(tmp_path), OK)
+    assert not cache.set(["hostname"], str(tmp_path), {**OK, "success": False})
+    assert len(cache) == 0
+
+def test_expiry(tmp_path, monkeypatch):
+    cache = CommandCache(ttl={"pwd": 10})
+    cache.set(["pwd"], str(tmp_path), OK)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get(["pwd"], str(tmp_path)) is None
+    assert cache.stats()["expired"] == 1
+
+def test_file_change_invalidates(tmp_path):
+    target = tmp_path / "notes.txt"
+    target.write_text("v1")
+    cache = CommandCache(ttl={"cat": 3600, "ls": 3600})
+    cwd = str(tmp_path)
+    cache.set(["cat", "notes.txt"], cwd, OK)
+    cache.set(["ls", "-la"], cwd, OK)
+    assert cache.get(["cat", "notes.txt"], cwd) is not None
+
+    target.write_text("version 2")
+    os.utime(target, ns=(time.time_ns() + 10**9,) * 2)
+    assert cache.get(["cat", "notes.txt"], cwd) is None
+    # ls 没有路径参数时跟踪工作目录本身
+    assert cache.get(["ls", "-la"], cwd) is not None
+    (tmp_path / "new.txt").write_text("x")
+    os.utime(tmp_path, ns=(time.time_ns() + 2 * 10**9,) * 2)
+    assert cache.get(["ls", "-la"], cwd) is None
+    assert cache.stats()["invalidated"] == 2
+
+def test_lru_eviction(tmp_path):
+    cache = CommandCache(default_ttl=60, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.set([name], str(tmp_path), OK)
+    assert cache.get(["a"], str(tmp_path)) is None
+    assert cache.stats()["evictions"] == 1
+
+@pytest.fixture
+def cli_cache_config(config):
+    previous = config.get_config("agent.cli.cache")
+    config.set_config("agent.cli.cache", {"enabled": True, "ttl": {"echo": 3600}})
+    yield config
+    config.set_config("agent.cli.cache", previous)
+
+def test_cli_node_uses_cache(cli_cache_config, make_state):
+    from agent.nodes.cli import create_cli_node
+    _, cli_node = create_cli_node(cli_cache_config)
+    task = {"id": "c1", "type": "cli", "description": "echo", "result": None, "status": "pending",
+            "parameters": {"command": "echo cached && date"}}
+    state = {**make_state("x"), "tasks": {"c1": task}, "current_task_id": "c1"}
+
+    first = cli_node.invoke(state)
+    second = cli_node.invoke(state)
+    assert "from_cache" not in first["execution_history"][0]
+    assert "from_cache" not in second["execution_history"][0]  # date 不缓存
+    assert "cached" in second["tasks"]["c1"]["result"]
+
+    task["parameters"]["command"] = "echo cached"
+    third = cli_node.invoke(state)
+    assert third["execution_history"][0]["from_cache"] is True
@@ -0,0 +1,91 @@
+import random
+import shlex
+import string
+import pytest
+from agent.tools.command_policy import CommandPolicy
+
+SAFE = ["ls", "pwd", "echo", "cat", "find", "python --version $", "python3 --version $",
+        "date", "whoami", "hostname", "git log *"]
+DENY = ["find ** -delete", "find ** -exec"]
+
+def legacy_is_safe(command, safe_commands):
+    """原来的字符串前缀匹配，用于对比"""
+    cmd = shlex.split(command)[0] if command else ""
+    if command in safe_commands:
+        return True
+    for safe_cmd in safe_commands:
+        if command.startswith(safe_cmd):
+            return True
+    return cmd in [shlex.split(c)[0] for c in safe_commands]
+
+@pytest.fixture
+def policy():
+    return CommandPolicy(SAFE, DENY)
+
+@pytest.mark.parametrize("command", [
+    "ls", "ls -la /tmp", "echo hello world", "python --version", "git log --oneline",
+    "find . -name '*.py'", "date && pwd && whoami",
+])
+def test_allows(policy, command):
+    assert policy.check(command) == (True, "")
+
+@pytest.mark.parametrize("command", [
+    "lsblk", "catalog", "echoo hi", "python", "python --version -c 'import os'",
+    "python3 --versions", "git log", "git status", "find . -delete", "find / -name x -exec rm {} ;",
+    "ls && rm -rf /", "ls &&", "", "echo 'unbalanced",
+])
+def test_rejects(policy, command):
+    allowed, reason = policy.check(command)
+    assert not allowed and reason
+
+def test_prefix_collisions_property(policy):
+    """随机在允许的命令名后拼接字符：旧匹配器接受，新策略拒绝"""
+    rng = random.Random(0)
+    names = [rule for rule in SAFE if " " not in rule]
+    for _ in range(500):
+        name = rng.choice(names)
+        suffix = "".join(rng.choice(string.ascii_letters + string.digits + "._-") for _ in range(rng.randint(1, 6)))
+        command = name + suffix
+        if command in names:
+            continue
+        assert legacy_is_safe(command, SAFE)
+        assert not policy.is_allowed(command)
+        assert not policy.is_allowed(f"{command} --help")
+
+def test_prefix_rules_accept_any_arguments_property(policy):
+    rng = random.Random(1)
+    for _ in range(500):
+        name = rng.choice(["ls", "echo", "cat", "pwd", "date"])
+        args = ["".join(rng.choice(string.ascii_letters + "-/.") for _ in range(rng.randint(1, 8)))
+                for _ in range(rng.randint(0, 5))]
+        assert policy.is_allowed([name, *args])
+
+def test_deny_wins_anywhere_property(policy):
+    rng = random.Random(2)
+    for _ in range(200):
+        args = [rng.choice([".", "-name", "*.tmp", "-type", "f", "/tmp"]) for _ in range(rng.randint(0, 6))]
+        position = rng.randint(0, len(args))
+        assert policy.is_allowed(["find", *args])
+        assert not policy.is_allowed(["find", *args[:position], "-delete", *args[position:]])
+
+def test_chain_allowed_only_if_every_segment_is(policy):
+    rng = random.Random(3)
+    commands = ["ls", "pwd", "date", "rm x", "lsblk", "echo hi"]
+    for _ in range(200):
+        chain = rng.sample(commands, rng.randint(1, 4))
+        expected = all(policy.is_allowed(c) for c in chain)
+        assert policy.is_allowed(" && ".join(chain)) == expected
+
+def test_empty_rule_rejected():
+    with pytest.raises(ValueError):
+        CommandPolicy(["$"])
+
+def test_cli_node_runs_command_chain(scripted_llm, config, make_state):
+    from agent.nodes.cli import create_cli_node
+    _, cli_node = create_cli_node(config)
+    task = {"id": "c1", "type": "cli", "description": "info", "result": None, "status": "pending",
+            "parameters": {"command": "echo one && echo two"}}
+    state = {**make_state("x"), "tasks": {"c1": task}, "current_task_id": "c1"}
+    update = cli_node.invoke(state)
+    assert update["tasks"]["c1"]["status"] == "completed"
+    assert "one\ntwo" in update["tasks"]["c1"]["result"]
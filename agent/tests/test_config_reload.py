@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from agent.graph_builder import build_agent_graph
+from agent.nodes.web import create_web_node
+from agent.utils.reloadable import Reloadable, touches
+
+PLAN = """```json
+[{"id": "t1", "type": "cli", "description": "休眠", "parameters": {"command": "sleep 0"}, "depends_on": []}]
+```"""
+
+@pytest.fixture
+def restore_cli(config):
+    yield config
+    config.set_config("agent.cli.safe_commands", None)
+
+def test_touches():
+    assert touches(["agent.cli.timeout"], ["agent.cli"])
+    assert touches(["agent"], ["agent.cli"])
+    assert not touches(["agent.client"], ["agent.cli"])
+    assert not touches(["llm.ollama.model_name"], ["agent.cli", "agent.web"])
+
+def test_reloadable_rebuilds_after_related_change(config):
+    builds = []
+
+    def build(cfg):
+        builds.append(cfg.get_config("test_reload.value"))
+        return builds[-1]
+
+    config.set_config("test_reload.value", 1)
+    settings = Reloadable(config, build, "test_reload")
+    config.set_config("unrelated.value", 1)
+    assert settings.get() == 1
+    config.set_config("test_reload.value", 2)
+    assert builds == [1]  # 下一次使用时才重新构建
+    assert settings.get() == 2
+    assert settings.get() == 2
+    assert builds == [1, 2]
+
+def test_reloadable_keeps_previous_value_when_rebuild_fails(config):
+    def build(cfg):
+        value = cfg.get_config("test_reload.limit")
+        if value < 0:
+            raise ValueError("limit must be positive")
+        return value
+
+    config.set_config("test_reload.limit", 3)
+    settings = Reloadable(config, build, "test_reload")
+    config.set_config("test_reload.limit", -1)
+    assert settings.get() == 3
+
+class Resource:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class AsyncResource:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+def test_reloadable_closes_replaced_values(config):
+    shared = Resource()
+
+    def build(cfg):
+        cfg.get_config("test_reload.value")
+        return {"client": AsyncResource(), "cache": Resource(), "shared": shared, "limit": 3}
+
+    config.set_config("test_reload.value", 1)
+    settings = Reloadable(config, build, "test_reload")
+    old = settings.get()
+    config.set_config("test_reload.value", 2)
+    new = settings.get()
+    assert old["client"].closed and old["cache"].closed
+    assert not new["client"].closed and not new["cache"].closed
+    assert not shared.closed  # 新设置仍在使用的对象不关闭
+
+def test_leased_value_is_closed_after_release(config):
+    def build(cfg):
+        cfg.get_config("test_reload.value")
+        return {"cache": Resource()}
+
+    config.set_config("test_reload.value", 1)
+    settings = Reloadable(config, build, "test_reload")
+    with settings.lease() as held:
+        config.set_config("test_reload.value", 2)
+        new = settings.get()
+        assert new is not held and not held["cache"].closed
+    assert held["cache"].closed and not new["cache"].closed
+
+def test_web_reload_does_not_break_fetch_in_progress(config, http_server, article, web_state, tmp_path):
+    previous = config.get_config("agent.web.cache")
+    config.set_config("agent.web.cache", {"enabled": True, "path": str(tmp_path / "http.sqlite")})
+    http_server.pages["/doc"] = (200, article, {"Cache-Control": "max-age=300"})
+    http_server.delay = 0.3
+    _, web_node = create_web_node(config)
+    state = web_state(http_server.base_url + "/doc")
+
+    async def scenario():
+        first = asyncio.create_task(web_node.ainvoke(state))
+        await asyncio.sleep(0.1)
+        config.set_config("agent.web.max_concurrent_fetches", 3)
+        # 第二次抓取按新配置重建客户端和缓存，第一次抓取仍在使用旧的
+        second = await web_node.ainvoke(state)
+        return await first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        config.set_config("agent.web.cache", previous)
+        config.set_config("agent.web.max_concurrent_fetches", None)
+    assert first["tasks"]["w1"]["status"] == "completed"
+    assert second["tasks"]["w1"]["status"] == "completed"
+
+def test_reloadable_does_not_close_value_when_rebuild_fails(config):
+    def build(cfg):
+        if cfg.get_config("test_reload.broken"):
+            raise ValueError("broken")
+        return Resource()
+
+    config.set_config("test_reload.broken", False)
+    settings = Reloadable(config, build, "test_reload")
+    config.set_config("test_reload.broken", True)
+    assert not settings.get().closed
+
+def test_cli_whitelist_change_applies_without_recompiling(scripted_llm, restore_cli, make_state):
+    config = restore_cli
+    scripted_llm.plan = PLAN
+    config.set_config("agent.cli.safe_commands", ["echo"])
+    graph = build_agent_graph(config)
+
+    blocked = graph.invoke(make_state("休眠"))
+    task = next(iter(blocked["tasks"].values()))
+    assert task["status"] == "failed"
+    assert "安全限制" in task["result"]
+
+    config.set_config("agent.cli.safe_commands", ["echo", "sleep"])
+    allowed = graph.invoke(make_state("休眠"))
+    assert next(iter(allowed["tasks"].values()))["status"] == "completed"
@@ -0,0 +1,64 @@
+from agent.memory.context_builder import ContextBuilder, count_tokens, truncate_to_tokens
+from agent.nodes.report import create_report_node
+
+def _task(i, status="completed", result="短结果"):
+    return {"id": f"t{i}", "type": "web", "description": f"任务{i}", "parameters": {},
+            "result": result, "status": status}
+
+def test_count_and_truncate():
+    assert count_tokens("") == 0
+    assert count_tokens("你好") == 2
+    assert count_tokens("abcdefgh") == 2
+    text = "word " * 200
+    truncated = truncate_to_tokens(text, 50)
+    assert count_tokens(truncated) <= 50 and truncated.endswith("…")
+    assert truncate_to_tokens("short", 50) == "short"
+
+def test_pack_respects_budget_and_priority():
+    builder = ContextBuilder(max_tokens=300, summarize_over=10_000, history_share=0.2)
+    tasks = [_task(0, "pending", "p" * 2000), _task(1, "completed", "c" * 2000), _task(2, "failed", "f" * 2000)]
+    history = [{"action": "web_access", "result_summary": "成功" * 20} for _ in range(50)]
+    task_text, history_text = builder.pack(tasks, history)
+    assert count_tokens(task_text) + count_tokens(history_text) <= 300 + 10
+    # 所有任务都保留标题，按原顺序输出；完成的任务优先获得预算
+    assert task_text.index("任务0") < task_text.index("任务1") < task_text.index("任务2")
+    assert "cccc" in task_text and "pppp" not in task_text
+    assert "省略其余" in history_text
+
+def test_long_results_are_summarized_once():
+    builder = ContextBuilder(summarize_over=50, summary_tokens=20)
+    tasks = [_task(0, result="x" * 1000), _task(1)]
+    requests = builder.summary_requests(tasks)
+    assert [task["id"] for _, task, _ in requests] == ["t0"]
+    builder.store_summaries(requests, ["关键结论"])
+    assert builder.summary_requests(tasks) == []
+    assert "关键结论" in builder.pack(tasks, [])[0]
+    # 结果变化后需要重新概括
+    assert len(builder.summary_requests([_task(0, result="y" * 1000)])) == 1
+
+def test_summary_cache_ignores_task_id():
+    builder = ContextBuilder(summarize_over=50, summary_tokens=20)
+    first = {**_task(0, result="x" * 1000), "id": "run1-t0"}
+    builder.store_summaries(builder.summary_requests([first]), ["关键结论"])
+    # 另一次运行中内容相同的任务直接复用概括
+    assert builder.summary_requests([{**first, "id": "run2-t0"}]) == []
+    # 概括参数不同时不复用
+    other = ContextBuilder(summarize_over=50, summary_tokens=40)
+    assert other._summary_key(first) != builder._summary_key(first)
+
+def test_failed_summary_falls_back_to_truncation():
+    builder = ContextBuilder(summarize_over=50, summary_tokens=20)
+    tasks = [_task(0, result="x" * 1000)]
+    builder.store_summaries(builder.summary_requests(tasks), [RuntimeError("down")])
+    assert builder.stats()["summary_errors"] == 1
+    assert "xxxx…" in builder.pack(tasks, [])[0]
+
+def test_report_node_summarizes_in_map_step(scripted_llm, config, make_state):
+    _, report_node = create_report_node(config)
+    state = {**make_state("汇总"), "tasks": {t["id"]: t for t in [_task(0, result="长内容 " * 2000), _task(1)]}}
+    report_node.invoke(state)
+    report_node.invoke(state)
+    summaries = [p for p in scripted_llm.prompts if p.startswith("请用不超过")]
+    assert len(summaries) == 1
+    report_prompt = scripted_llm.prompts[-1]
+    assert "长内容" not in report_prompt and count_tokens(report_prompt) < 3500
@@ -0,0 +1,23 @@
+from agent.graph_builder import build_agent_graph
+
+def test_report_tokens_are_streamed(scripted_llm, config, make_state):
+    graph = build_agent_graph(config)
+
+    nodes, tokens, lines = [], [], []
+    for mode, chunk in graph.stream(make_state("打个招呼"), stream_mode=["updates", "custom"]):
+        if mode == "custom" and chunk["node"] == "report":
+            tokens.append(chunk["token"])
+        elif mode == "custom":
+            lines.append(chunk["line"])
+        else:
+            nodes.extend(chunk.keys())
+
+    assert nodes == ["planner", "cli_command", "validator", "report"]
+    assert "".join(tokens) == "最终报告"
+    assert len(tokens) > 1
+    assert lines == ["hi"]
+
+def test_invoke_still_returns_full_report(scripted_llm, config, make_state):
+    graph = build_agent_graph(config)
+    result = graph.invoke(make_state("打个招呼"))
+    assert result["messages"][-1].content == "最终报告"
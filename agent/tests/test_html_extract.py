@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from agent.nodes.web import create_web_node
+from agent.tools.html_extract import available_extractors, get_extractor
+
+PAGE = """<html><head><title> Example  Page </title><style>.x { color: red }</style></head>
+<body>
+<nav><p>Home | About</p></nav>
+<script>var content = "not text";</script>
+<div class="main-content">
+  <h1>Heading</h1>
+  <p>First paragraph.</p>
+  <script>alert("inner")</script>
+  <div><p>Nested &amp; escaped.</p></div>
+</div>
+<p>Outside the container.</p>
+</body></html>"""
+
+PARAGRAPHS_ONLY = """<html><body><nav><p>menu</p></nav>
+<p>One.</p><p>Two  words.</p><p></p></body></html>"""
+
+@pytest.fixture(params=available_extractors())
+def extractor(request):
+    return get_extractor(request.param, max_chars=100)
+
+def test_extracts_container_and_skips_noise(extractor):
+    result = extractor.extract(PAGE)
+    assert result["title"] == "Example Page"
+    assert "First paragraph." in result["content"]
+    assert "Nested & escaped." in result["content"]
+    assert "Outside the container." not in result["content"]
+    for noise in ("not text", "alert", "Home", "color"):
+        assert noise not in result["content"]
+
+def test_falls_back_to_paragraphs(extractor):
+    result = extractor.extract(PARAGRAPHS_ONLY)
+    assert result == {"title": "无标题", "content": "One.\nTwo words."}
+
+def test_truncates_content(extractor):
+    html = "<div class='content'>" + "<p>word</p>" * 1000 + "</div>"
+    content = extractor.extract(html)["content"]
+    assert len(content) == 103 and content.endswith("...")
+
+def test_auto_and_unknown_backend():
+    assert get_extractor().name in ("selectolax", "lxml", "html.parser")
+    with pytest.raises(ValueError):
+        get_extractor("nope")
+
+def test_web_node_stops_at_byte_cap(config, http_server, monkeypatch):
+    body = ("<html><body><div class='content'>" + "x" * 100_000 + "TAIL</div></body></html>").encode()
+    http_server.pages["/big"] = (200, body, {})
+    web = dict(config.get_config("agent.web"))
+    web["extract"] = {"max_bytes": 1024, "max_chars": 5000}
+    web["cache"] = {"enabled": False}
+    original = config.get_config
+    monkeypatch.setattr(config, "get_config", lambda key: web if key == "agent.web" else
+                        web["extract"] if key == "agent.web.extract" else
+                        web["cache"] if key == "agent.web.cache" else original(key))
+    _, web_node = create_web_node(config)
+    task = {"id": "w1", "type": "web", "description": "fetch",
+            "parameters": {"url": http_server.base_url + "/big"}, "result": None, "status": "pending"}
+    state = {"messages": [], "tasks": {"w1": task}, "current_task_id": "w1",
+             "working_memory": {}, "execution_history": []}
+    update = asyncio.run(web_node.ainvoke(state))
+    result = update["tasks"]["w1"]["result"]
+    assert update["tasks"]["w1"]["status"] == "completed"
+    assert "TAIL" not in result and "x" * 900 in result
@@ -0,0 +1,73 @@
+import pytest
+from agent.nodes.web import create_web_node
+from agent.tools.http_cache import HTTPCache, parse_cache_control
+
+@pytest.fixture
+def cached_web_config(config, tmp_path):
+    previous = config.get_config("agent.web.cache")
+    config.set_config("agent.web.cache", {"enabled": True, "path": str(tmp_path / "http.sqlite")})
+    yield config
+    config.set_config("agent.web.cache", previous)
+
+def test_parse_cache_control():
+    assert parse_cache_control('max-age=60, no-cache, private="x"') == {
+        "max-age": "60", "no-cache": None, "private": "x"}
+
+def test_no_store_is_not_cached(tmp_path):
+    cache = HTTPCache(str(tmp_path / "c.sqlite"))
+    assert not cache.store("http://a/x", {"Cache-Control": "no-store"}, b"body")
+    assert cache.lookup("http://a/x") is None
+
+def test_domain_ttl_overrides_headers(tmp_path):
+    cache = HTTPCache(str(tmp_path / "c.sqlite"), domain_ttl={"example.com": 3600})
+    cache.store("http://docs.example.com/x", {"Cache-Control": "no-cache"}, b"body", {"title": "t", "content": "c"})
+    entry = cache.lookup("http://docs.example.com/x")
+    assert entry["fresh"]
+    assert entry["extracted"] == {"title": "t", "content": "c"}
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = HTTPCache(str(tmp_path / "c.sqlite"), max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.store(f"http://h/{name}", {"Cache-Control": "max-age=60"}, b"x" * 100)
+    assert cache.lookup("http://h/a") is None
+    assert cache.lookup("http://h/c") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_lookup_counts_as_recent_use(tmp_path):
+    cache = HTTPCache(str(tmp_path / "c.sqlite"), max_bytes=250)
+    for name in ("a", "b"):
+        cache.store(f"http://h/{name}", {"Cache-Control": "max-age=60"}, b"x" * 100)
+    assert cache.lookup("http://h/a") is not None
+    cache.store("http://h/c", {"Cache-Control": "max-age=60"}, b"x" * 100)
+    assert cache.lookup("http://h/b") is None
+    assert cache.lookup("http://h/a") is not None
+
+def test_expired_response_without_validators_is_not_stored(tmp_path):
+    cache = HTTPCache(str(tmp_path / "c.sqlite"))
+    assert not cache.store("http://a/x", {"Cache-Control": "no-cache"}, b"body")
+    assert not cache.store("http://a/y", {}, b"body")
+    assert cache.store("http://a/z", {"Cache-Control": "no-cache", "ETag": '"v1"'}, b"body")
+    assert cache.stats()["stores"] == 1
+
+def test_fresh_hit_skips_network(cached_web_config, http_server, article, web_state):
+    http_server.pages["/doc"] = (200, article, {"Cache-Control": "max-age=300"})
+    _, web_node = create_web_node(cached_web_config)
+    state = web_state(http_server.base_url + "/doc")
+
+    first = web_node.invoke(state)
+    second = web_node.invoke(state)
+    assert len(http_server.requests) == 1
+    assert first["tasks"]["w1"]["result"] == second["tasks"]["w1"]["result"]
+    assert "Main text here." in second["tasks"]["w1"]["result"]
+
+def test_stale_entry_is_revalidated_with_etag(cached_web_config, http_server, article, web_state):
+    http_server.pages["/doc"] = (200, article, {"Cache-Control": "no-cache", "ETag": '"v1"'})
+    _, web_node = create_web_node(cached_web_config)
+    state = web_state(http_server.base_url + "/doc")
+
+    web_node.invoke(state)
+    second = web_node.invoke(state)
+    assert len(http_server.requests) == 2
+    assert http_server.requests[1][2].get("If-None-Match") == '"v1"'
+    assert second["tasks"]["w1"]["status"] == "completed"
+    assert "Main text here." in second["tasks"]["w1"]["result"]
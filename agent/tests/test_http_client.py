@@ -0,0 +1,65 @@
+import asyncio
+import time
+import httpx
+from agent.tools.http_client import SharedHTTPClient, _build_timeout
+
+PAGE = (200, b"<html><body><p>hello</p></body></html>", {})
+
+def test_timeout_from_config():
+    timeout = _build_timeout({"connect": 2, "read": 15})
+    assert timeout.connect == 2
+    assert timeout.read == 15
+    assert timeout.write == 30.0
+    assert _build_timeout(5).read == 5
+
+def test_connections_are_reused(http_server):
+    http_server.pages["/a"] = PAGE
+    http_client = SharedHTTPClient()
+
+    async def fetch_twice():
+        first = await http_client.get(http_server.base_url + "/a")
+        second = await http_client.get(http_server.base_url + "/a")
+        await http_client.aclose()
+        return first, second
+
+    first, second = asyncio.run(fetch_twice())
+    assert first.status_code == second.status_code == 200
+    ports = {address for _, address, _ in http_server.requests}
+    assert len(ports) == 1
+
+def test_per_host_limit(http_server):
+    http_server.pages["/slow"] = PAGE
+    http_server.delay = 0.1
+    http_client = SharedHTTPClient(max_connections_per_host=1)
+
+    async def fetch_three():
+        start = time.perf_counter()
+        await asyncio.gather(*(http_client.get(http_server.base_url + "/slow") for _ in range(3)))
+        elapsed = time.perf_counter() - start
+        await http_client.aclose()
+        return elapsed
+
+    assert asyncio.run(fetch_three()) >= 0.3
+
+def test_close_from_sync_code(http_server):
+    http_server.pages["/a"] = PAGE
+    http_client = SharedHTTPClient()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(http_client.get(http_server.base_url + "/a"))
+    client = http_client._clients[loop]
+    http_client.close()
+    assert client.is_closed
+    loop.close()
+
+def test_host_delay_spaces_out_requests(http_server):
+    http_server.pages["/a"] = PAGE
+    http_client = SharedHTTPClient(max_connections_per_host=4, host_delay=0.1)
+
+    async def fetch_three():
+        start = time.perf_counter()
+        await asyncio.gather(*(http_client.get(http_server.base_url + "/a") for _ in range(3)))
+        elapsed = time.perf_counter() - start
+        await http_client.aclose()
+        return elapsed
+
+    assert asyncio.run(fetch_three()) >= 0.2
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from agent.graph_builder import build_agent_graph
+from metrics import get_registry
+
+@pytest.fixture
+def metrics_enabled(config):
+    registry = get_registry()
+    registry.reset()
+    config.set_config("metrics.enabled", True)
+    yield registry
+    config.set_config("metrics.enabled", False)
+    registry.reset()
+
+def test_nodes_are_instrumented(scripted_llm, config, make_state, metrics_enabled):
+    registry = metrics_enabled
+    graph = build_agent_graph(config)
+    result = graph.invoke(make_state("打个招呼"))
+    assert result["messages"][-1].content == "最终报告"
+
+    for node in ("planner", "cli_command", "validator", "report"):
+        assert registry.value("agent_node_duration_seconds", node=node)["count"] == 1
+        assert registry.value("agent_node_runs_total", node=node, outcome="ok") == 1
+        assert registry.value("agent_node_in_flight", node=node) == 0
+    assert registry.value("agent_tasks_finished_total", task_type="cli", status="completed") == 1
+    assert "agent_report_context" in registry.snapshot()["collectors"]
+    assert 'agent_node_duration_seconds_count{node="planner"} 1' in registry.to_prometheus()
+
+def test_async_nodes_and_errors(scripted_llm, config, make_state, metrics_enabled, monkeypatch):
+    registry = metrics_enabled
+
+    def broken(prompt, config):
+        raise RuntimeError("down")
+
+    graph = build_agent_graph(config)
+    asyncio.run(graph.ainvoke(make_state("打个招呼")))
+    assert registry.value("agent_node_runs_total", node="report", outcome="ok") == 1
+
+    monkeypatch.setattr(scripted_llm, "stream_text", broken)
+    with pytest.raises(RuntimeError):
+        graph.invoke(make_state("打个招呼"))
+    assert registry.value("agent_node_runs_total", node="report", outcome="error") == 1
+    assert registry.value("agent_node_in_flight", node="report") == 0
+
+def test_disabled_metrics_leave_nodes_unwrapped(scripted_llm, config, make_state):
+    registry = get_registry()
+    registry.reset()
+    graph = build_agent_graph(config)
+    graph.invoke(make_state("打个招呼"))
+    assert registry.value("agent_node_runs_total", node="planner", outcome="ok") is None
+
+def test_instrumented_graph_still_streams(scripted_llm, config, make_state, metrics_enabled):
+    graph = build_agent_graph(config)
+    tokens = [chunk["token"] for mode, chunk in graph.stream(make_state("打个招呼"), stream_mode=["updates", "custom"])
+              if mode == "custom" and chunk["node"] == "report"]
+    assert "".join(tokens) == "最终报告" and len(tokens) > 1
@@ -0,0 +1,88 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from agent.memory.plan_cache import PlanCache
+from agent.nodes import planner
+from config import Config
+
+PLAN = [
+    {"id": "a1", "type": "web", "description": "查询天气", "parameters": {"url": "https://weather.example.com"},
+     "result": "晴", "status": "completed"},
+]
+
+LLM_PLAN = """```json
+[{"type": "web", "description": "查询天气", "parameters": {"url": "https://weather.example.com/beijing"}}]
+```"""
+
+class FakePlannerLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_text(self, prompt, config):
+        self.calls += 1
+        return LLM_PLAN
+
+def test_normalize():
+    assert PlanCache.normalize("  Hello,   WORLD！ ") == "hello world"
+
+def test_exact_and_near_duplicate_hits():
+    cache = PlanCache()
+    cache.store("帮我在 https://weather.example.com 查一下北京明天的天气情况", PLAN)
+
+    assert cache.lookup("帮我在 https://weather.example.com 查一下北京明天的天气情况") is not None
+    near = cache.lookup("帮我在 https://weather.example.com 查一下北京明天的天气情况吧")
+    assert near == [{"id": "a1", "type": "web", "description": "查询天气", "parameters": {"url": "https://weather.example.com"}}]
+    assert cache.lookup("列出当前目录下的所有文件") is None
+    assert cache.stats()["hits"] == 2
+
+def test_near_hit_requires_plan_literals_in_request():
+    cache = PlanCache()
+    docs = [{"id": "a1", "type": "web", "description": "读取文档",
+             "parameters": {"url": "https://example.com/docs/v1/api"}}]
+    cache.store("summarize the page at https://example.com/docs/v1/api", docs)
+    assert cache.lookup("summarize the page at https://example.com/docs/v2/api") is None
+
+    delete = [{"id": "c1", "type": "cli", "description": "删除文件", "parameters": {"command": "rm -rf build/*"}}]
+    cache.store("please delete all of the generated files in the build/ directory", delete)
+    assert cache.lookup("please do not delete all of the generated files in the build/ directory") is None
+    # 两次都是相似度达到阈值、因字面量不符而拒绝
+    assert cache.stats()["literal_mismatches"] == 2
+
+def test_lookup_returns_copies():
+    cache = PlanCache()
+    cache.store("check the weather in beijing", PLAN)
+    cache.lookup("check the weather in beijing")[0]["parameters"]["url"] = "changed"
+    assert cache.lookup("check the weather in beijing")[0]["parameters"]["url"] == "https://weather.example.com"
+
+def test_lru_eviction():
+    cache = PlanCache(max_entries=2)
+    cache.store("first request about python", PLAN)
+    cache.store("second request about rust", PLAN)
+    cache.lookup("first request about python")
+    cache.store("third request about golang", PLAN)
+    assert len(cache) == 2
+    assert cache.lookup("second request about rust") is None
+    assert cache.lookup("first request about python") is not None
+
+def test_threshold_is_respected():
+    strict = PlanCache(threshold=1.0)
+    strict.store("please summarize the python docs", PLAN)
+    assert strict.lookup("please summarize the python docs today") is None
+
+def test_planner_reuses_plan_with_fresh_ids(monkeypatch):
+    llm = FakePlannerLLM()
+    monkeypatch.setattr(planner, "get_llm_client", lambda config: llm)
+    _, planner_node = planner.create_planner_node(Config())
+
+    def run(text):
+        return planner_node.invoke({"messages": [HumanMessage(content=text)], "tasks": {},
+                             "current_task_id": None, "working_memory": {}, "execution_history": []})
+
+    first = run("帮我查一下北京明天的天气情况 https://weather.example.com/beijing")
+    second = run("帮我查一下北京明天的天气情况吧 https://weather.example.com/beijing")
+    assert llm.calls == 1
+    first_task, = first["tasks"].values()
+    second_task, = second["tasks"].values()
+    assert second_task["description"] == first_task["description"]
+    assert second_task["id"] != first_task["id"]
+    assert second["tasks"] == {second_task["id"]: second_task}
+    assert second_task["status"] == "pending"
@@ -0,0 +1,85 @@
+import time
+import pytest
+from agent.graph_builder import build_agent_graph
+from agent.models.state import get_task, merge_tasks
+from agent.scheduler import ready_tasks
+
+def _task(task_id, status="pending", depends_on=None, task_type="cli"):
+    return {"id": task_id, "type": task_type, "description": task_id, "parameters": {},
+            "result": None, "status": status, "depends_on": depends_on or []}
+
+DAG_PLAN = """```json
+[
+  {"id": "t1", "type": "cli", "description": "a", "parameters": {"command": "sleep 0.3"}, "depends_on": []},
+  {"id": "t2", "type": "cli", "description": "b", "parameters": {"command": "sleep 0.3"}, "depends_on": []},
+  {"id": "t3", "type": "cli", "description": "c", "parameters": {"command": "sleep 0.3"}, "depends_on": []},
+  {"id": "t4", "type": "cli", "description": "d", "parameters": {"command": "echo done"}, "depends_on": ["t1", "t2"]}
+]
+```"""
+
+@pytest.fixture
+def sleep_allowed(config):
+    previous = config.get_config("agent.cli.safe_commands")
+    config.set_config("agent.cli.safe_commands", ["sleep", "echo"])
+    yield
+    config.set_config("agent.cli.safe_commands", previous)
+
+def _by_id(*tasks):
+    return {task["id"]: task for task in tasks}
+
+def test_merge_tasks_applies_patches_and_appends():
+    left = _by_id(_task("a"), _task("b"))
+    merged = merge_tasks(left, {"b": {"status": "completed", "result": "ok"}, "c": _task("c")})
+    assert list(merged) == ["a", "b", "c"]
+    assert merged["b"] == {**_task("b"), "status": "completed", "result": "ok"}
+    # 未修改的任务复用原对象，原任务表不被修改
+    assert merged["a"] is left["a"]
+    assert left["b"]["status"] == "pending" and "c" not in left
+
+def test_merge_tasks_accepts_task_list():
+    merged = merge_tasks(_by_id(_task("a")), [_task("a", status="failed"), _task("b")])
+    assert [(t["id"], t["status"]) for t in merged.values()] == [("a", "failed"), ("b", "pending")]
+    assert merge_tasks(merged, {}) is merged
+
+def test_get_task():
+    state = {"tasks": _by_id(_task("a"))}
+    assert get_task(state, "a")["id"] == "a"
+    assert get_task(state, "missing") is None and get_task(state, None) is None
+
+def test_ready_tasks_respects_dependencies():
+    tasks = _by_id(
+        _task("a", status="completed"),
+        _task("b", status="failed"),
+        _task("c", depends_on=["a"]),
+        _task("d", depends_on=["b"]),
+        _task("e", depends_on=["r"]),
+        _task("r", task_type="reflect"),
+    )
+    assert [t["id"] for t in ready_tasks(tasks)] == ["c", "e"]
+
+def test_independent_tasks_run_in_parallel(scripted_llm, config, make_state, sleep_allowed):
+    scripted_llm.plan = DAG_PLAN
+    graph = build_agent_graph(config)
+
+    steps = []
+    start = time.perf_counter()
+    for chunk in graph.stream(make_state("并行任务"), stream_mode="updates"):
+        steps.extend(chunk.keys())
+    elapsed = time.perf_counter() - start
+
+    assert steps == ["planner", "cli_command", "cli_command", "cli_command", "validator",
+                     "cli_command", "validator", "report"]
+    assert elapsed < 0.8
+
+def test_parallelism_cap(scripted_llm, config, make_state, sleep_allowed):
+    scripted_llm.plan = DAG_PLAN
+    config.set_config("agent.scheduler.max_parallel_tasks", 1)
+    try:
+        graph = build_agent_graph(config)
+        result = graph.invoke(make_state("并行任务"))
+    finally:
+        config.set_config("agent.scheduler.max_parallel_tasks", None)
+
+    assert [t["status"] for t in result["tasks"].values()] == ["completed"] * 4
+    executions = [e for e in result["execution_history"] if e["action"] == "cli_execution"]
+    assert len(executions) == 4
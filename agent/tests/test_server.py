@@ -0,0 +1,187 @@
+import asyncio
+import json
+import time
+import pytest
+from agent.graph_builder import build_agent_graph
+from agent.memory.checkpointer import SqliteCheckpointer
+from agent.server import AgentHTTPServer, AgentService
+
+SLEEP_PLAN = """```json
+[{"id": "t1", "type": "cli", "description": "慢命令", "parameters": {"command": "sleep 5"}, "depends_on": []}]
+```"""
+
+@pytest.fixture
+def sleep_allowed(config):
+    config.set_config("agent.cli.safe_commands", ["sleep", "echo"])
+    return config
+
+async def _request(port, method, path, body=None):
+    """发送一个请求，返回 (状态码, 头部文本, 正文)"""
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n"
+    return await _raw_request(port, head.encode() + data)
+
+async def _raw_request(port, data):
+    """发送原始请求字节，返回 (状态码, 头部文本, 正文)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head.decode("latin-1"), payload.decode("utf-8")
+
+def _events(payload):
+    events = []
+    for block in payload.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def _serve(graph, **kwargs):
+    return AgentHTTPServer(AgentService(graph, **kwargs), port=0)
+
+def test_run_streams_node_events_and_report(scripted_llm, config):
+    async def scenario():
+        server = await _serve(build_agent_graph(config)).start()
+        try:
+            return await _request(server.port, "POST", "/runs", {"input": "打个招呼"})
+        finally:
+            await server.close()
+
+    status, head, payload = asyncio.run(scenario())
+    assert status == 200
+    assert "text/event-stream" in head
+    events = _events(payload)
+    names = [name for name, _ in events]
+    assert names[:2] == ["queued", "start"]
+    assert names[-1] == "done"
+    assert events[-1][1]["report"] == "最终报告"
+    nodes = [data["node"] for name, data in events if name == "node"]
+    assert nodes[0] == "planner" and nodes[-1] == "report"
+    assert "cli_command" in nodes
+    assert "".join(data["token"] for name, data in events if name == "token") == "最终报告"
+    assert any(name == "line" and data["line"] == "hi" for name, data in events)
+
+def test_bad_requests(scripted_llm, config):
+    async def scenario():
+        server = await _serve(build_agent_graph(config)).start()
+        try:
+            return [
+                await _request(server.port, "POST", "/runs", {"deadline": 1}),
+                await _request(server.port, "GET", "/runs"),
+                await _request(server.port, "GET", "/missing"),
+                await _request(server.port, "POST", "/runs", {"resume": "run-1"}),
+                await _request(server.port, "POST", "/runs", {"input": "hi", "deadline": "soon"}),
+                await _request(server.port, "POST", "/runs", {"input": "hi", "deadline": -1}),
+                await _raw_request(server.port, b"POST /runs HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+                await _raw_request(server.port, b"POST /runs HTTP/1.1\r\nContent-Length: -5\r\n\r\n"),
+                await _request(server.port, "GET", "/health"),
+            ]
+        finally:
+            await server.close()
+
+    responses = asyncio.run(scenario())
+    assert [status for status, _, _ in responses] == [400, 405, 404, 400, 400, 400, 400, 400, 200]
+    assert json.loads(responses[4][2]) == {"error": "deadline must be a number of seconds"}
+    assert json.loads(responses[6][2]) == {"error": "invalid Content-Length"}
+    assert json.loads(responses[-1][2]) == {"status": "ok", "running": 0, "queued": 0,
+                                            "max_concurrent_runs": 4, "max_queue": 16}
+
+def test_full_queue_is_rejected(scripted_llm, sleep_allowed):
+    scripted_llm.plan = SLEEP_PLAN
+
+    async def scenario():
+        server = await _serve(build_agent_graph(sleep_allowed), max_concurrent_runs=1, max_queue=1).start()
+        try:
+            running = asyncio.ensure_future(_request(server.port, "POST", "/runs", {"input": "a", "deadline": 0.5}))
+            waiting = asyncio.ensure_future(_request(server.port, "POST", "/runs", {"input": "b", "deadline": 0.5}))
+            while server.service.running + server.service.queued < 2:
+                await asyncio.sleep(0.01)
+            rejected = await _request(server.port, "POST", "/runs", {"input": "c"})
+            return rejected, await running, await waiting
+        finally:
+            await server.close()
+
+    rejected, running, waiting = asyncio.run(scenario())
+    status, head, _ = rejected
+    assert status == 503
+    assert "Retry-After: 1" in head
+    assert _events(running[2])[-1] == ("error", {"code": "deadline_exceeded", "error": "运行超过截止时间，已取消"})
+    # 第二个请求在排队中就已超过截止时间
+    assert _events(waiting[2])[-1][1]["code"] == "deadline_exceeded"
+
+def test_deadline_cancels_running_command(scripted_llm, sleep_allowed):
+    scripted_llm.plan = SLEEP_PLAN
+
+    async def scenario():
+        server = await _serve(build_agent_graph(sleep_allowed)).start()
+        try:
+            start = time.monotonic()
+            response = await _request(server.port, "POST", "/runs", {"input": "慢", "deadline": 0.5})
+            return response, time.monotonic() - start, server.service.health()
+        finally:
+            await server.close()
+
+    (status, _, payload), elapsed, health = asyncio.run(scenario())
+    assert status == 200
+    assert _events(payload)[-1][1]["code"] == "deadline_exceeded"
+    assert elapsed < 3
+    assert health["running"] == 0 and health["queued"] == 0
+
+def test_client_disconnect_cancels_run(scripted_llm, sleep_allowed):
+    scripted_llm.plan = SLEEP_PLAN
+
+    async def scenario():
+        service = AgentService(build_agent_graph(sleep_allowed))
+        server = await AgentHTTPServer(service, port=0).start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            body = json.dumps({"input": "慢"}).encode("utf-8")
+            writer.write(f"POST /runs HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await reader.readuntil(b"event: start")
+            writer.close()
+            start = time.monotonic()
+            while service.running and time.monotonic() - start < 3:
+                await asyncio.sleep(0.02)
+            return service.running, time.monotonic() - start
+        finally:
+            await server.close()
+
+    running, elapsed = asyncio.run(scenario())
+    assert running == 0
+    assert elapsed < 3
+
+def test_resume_interrupted_run(scripted_llm, config, tmp_path, monkeypatch):
+    original = scripted_llm.generate_text
+    calls = []
+
+    def generate_text(prompt, config):
+        if not prompt.startswith(("你是一位专业的任务规划AI助手", "你是一位任务验证专家")):
+            calls.append(prompt)
+            if len(calls) == 1:
+                raise RuntimeError("进程崩溃")
+        return original(prompt, config)
+
+    monkeypatch.setattr(scripted_llm, "generate_text", generate_text)
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.sqlite"))
+
+    async def scenario():
+        server = await _serve(build_agent_graph(config, saver)).start()
+        try:
+            first = _events((await _request(server.port, "POST", "/runs", {"input": "打个招呼"}))[2])
+            thread_id = first[1][1]["thread_id"]
+            resumed = _events((await _request(server.port, "POST", "/runs", {"resume": thread_id}))[2])
+            finished = await _request(server.port, "POST", "/runs", {"resume": thread_id})
+            return first, resumed, finished[0]
+        finally:
+            await server.close()
+
+    try:
+        first, resumed, finished_status = asyncio.run(scenario())
+    finally:
+        saver.close()
+    assert first[-1][0] == "error" and first[-1][1]["code"] == "failed"
+    assert resumed[-1] == ("done", {"report": "最终报告"})
+    assert [data["node"] for name, data in resumed if name == "node"] == ["report"]
+    assert finished_status == 400
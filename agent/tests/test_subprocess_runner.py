@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+from agent.tools.subprocess_runner import BoundedOutput, run_command
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses POSIX shell commands")
+
+def test_bounded_output_keeps_head_and_tail():
+    output = BoundedOutput(max_bytes=10)
+    for i in range(100):
+        output.write(str(i % 10).encode())
+    assert output.total == 100
+    assert output.truncated and output.dropped == 90
+    text = output.text()
+    assert text.startswith("01234") and text.endswith("56789")
+    assert "[省略 90 字节]" in text
+
+def test_bounded_output_small_is_unchanged():
+    output = BoundedOutput(max_bytes=100)
+    output.write(b"hello\n")
+    output.write(b"world\n")
+    assert not output.truncated
+    assert output.text() == "hello\nworld\n"
+
+def test_streams_lines_and_caps_output():
+    lines = []
+    result = asyncio.run(run_command(
+        [sys.executable, "-c", "import sys\nfor i in range(10000): print(i)\nprint('err', file=sys.stderr)"],
+        max_output_bytes=100,
+        on_line=lambda stream, line: lines.append((stream, line)),
+    ))
+    assert result["success"] and result["truncated"]
+    assert len([l for s, l in lines if s == "stdout"]) == 10000
+    assert ("stderr", "err") in lines
+    assert result["output"].startswith("0\n1\n") and result["output"].endswith("9999\n")
+    assert len(result["output"]) < 200
+
+def test_failed_command_reports_stderr():
+    result = asyncio.run(run_command([sys.executable, "-c", "import sys; sys.exit('boom')"]))
+    assert not result["success"]
+    assert result["return_code"] == 1
+    assert "boom" in result["error"]
+
+def test_timeout_kills_process_group():
+    lines = []
+    start = time.perf_counter()
+    result = asyncio.run(run_command(
+        ["sh", "-c", "sleep 30 & echo $!; wait"],
+        timeout=0.5,
+        on_line=lambda stream, line: lines.append(line),
+    ))
+    assert time.perf_counter() - start < 5
+    assert result["timed_out"] and not result["success"]
+    assert "超时" in result["error"]
+    grandchild = int(lines[0])
+    time.sleep(0.1)
+    assert not _alive(grandchild)
+
+def test_timeout_applies_after_output_is_closed():
+    start = time.perf_counter()
+    result = asyncio.run(run_command(["sh", "-c", "exec >/dev/null 2>&1; sleep 30"], timeout=0.5))
+    assert time.perf_counter() - start < 5
+    assert result["timed_out"] and not result["success"]
+
+def _alive(pid):
+    """进程仍在运行（僵尸进程视为已结束）"""
+    if os.path.isdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except FileNotFoundError:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+from agent.graph_builder import build_agent_graph
+from agent.nodes import validator
+from agent.validation import ValidationPolicy, check_cli, check_web
+from llm.llm_client import LLMClient
+
+def _task(type_, status="completed", result="output", details=None):
+    task = {"id": "t", "type": type_, "description": "d", "parameters": {}, "result": result, "status": status}
+    if details is not None:
+        task["details"] = details
+    return task
+
+def _url(success=True, status_code=200, chars=100):
+    return {"url": "http://x", "success": success, "status_code": status_code, "content_chars": chars}
+
+def test_cli_rules():
+    ok = {"return_code": 0, "timed_out": False, "truncated": False}
+    assert check_cli(_task("cli", details=ok)).startswith("验证通过")
+    assert "超时" in check_cli(_task("cli", "failed", details={**ok, "return_code": -9, "timed_out": True}))
+    assert "退出码为 2" in check_cli(_task("cli", "failed", details={**ok, "return_code": 2}))
+    assert "安全限制" in check_cli(_task("cli", "failed", details={**ok, "return_code": None}))
+    assert check_cli(_task("cli")) is None
+
+def test_web_rules():
+    assert check_web(_task("web", details={"urls": [_url(), _url()]})).startswith("验证通过")
+    verdict = check_web(_task("web", "failed", details={"urls": [_url(False, 404), _url(False, None)]}))
+    assert "404" in verdict and "连接失败" in verdict
+    # 部分失败或正文为空时交给LLM
+    assert check_web(_task("web", details={"urls": [_url(), _url(False, 500)]})) is None
+    assert check_web(_task("web", details={"urls": [_url(chars=0)]})) is None
+
+def test_policy_falls_through_to_llm():
+    policy = ValidationPolicy()
+    assert policy.evaluate(_task("reflect")) is None
+    assert policy.evaluate(_task("reflect", result="")).startswith("验证失败")
+    assert ValidationPolicy(always_llm=["web"]).evaluate(_task("web", details={"urls": [_url()]})) is None
+    assert ValidationPolicy(fast_path=False).evaluate(_task("cli", result="")) is None
+
+def test_custom_rules_run_first(config, monkeypatch):
+    policy = ValidationPolicy()
+    policy.register("reflect", lambda task: "验证通过: 自定义")
+    assert policy.evaluate(_task("reflect")) == "验证通过: 自定义"
+
+    monkeypatch.setattr(config, "get_config", lambda key: {
+        "rules": {"cli": ["agent.validation:check_web"]}, "always_llm": ["code"]} if key == "agent.validator" else None)
+    policy = ValidationPolicy.from_config(config)
+    assert policy.rules["cli"][0].__name__ == "check_web"
+    assert policy.always_llm == {"code"}
+
+def test_validator_skips_llm_for_clear_results(scripted_llm, config, make_state):
+    graph = build_agent_graph(config)
+    result = graph.invoke(make_state("打个招呼"))
+    assert not any(p.startswith("你是一位任务验证专家") for p in scripted_llm.prompts)
+    entries = [e for e in result["execution_history"] if e["action"] == "validation"]
+    assert [e["method"] for e in entries] == ["rule"]
+    summary = next(e for e in result["execution_history"] if e["action"] == "validation_summary")
+    assert (summary["skipped_llm"], summary["llm_validated"]) == (1, 0)
+
+class BatchLLM(LLMClient):
+    """批量提示返回预设回复，单任务提示返回固定结论"""
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.prompts = []
+
+    def generate_text(self, prompt, config):
+        self.prompts.append(prompt)
+        if "请以JSON格式返回每个任务的验证结论" in prompt:
+            return self.batch_reply(prompt)
+        return "单独验证"
+
+    def chat(self, messages, config):
+        raise NotImplementedError
+
+def _reflect_state(n):
+    tasks = {f"r{i}": _task("reflect") | {"id": f"r{i}"} for i in range(n)}
+    return {"messages": [], "tasks": tasks, "current_task_id": None, "working_memory": {}, "execution_history": []}
+
+def _json_reply(ids):
+    return lambda prompt: "```json\n" + json.dumps([{"id": i, "verdict": f"成功 {i}"} for i in ids if i in prompt]) + "\n```"
+
+@pytest.fixture
+def validator_with(monkeypatch, config):
+    def build(llm, batch_size=5):
+        monkeypatch.setattr(validator, "get_llm_client", lambda config: llm)
+        original = config.get_config
+        monkeypatch.setattr(config, "get_config", lambda key: batch_size if key == "agent.validator.batch_size" else original(key))
+        return validator.create_validator_node(config)[1]
+    return build
+
+def test_parse_batch_verdicts():
+    response = 'ok [{"id": "a", "verdict": "好"}, {"id": "zz", "verdict": "x"}, {"id": "b", "verdict": ""}] done'
+    assert validator.parse_batch_verdicts(response, ["a", "b"]) == {"a": "好"}
+    assert validator.parse_batch_verdicts("没有JSON", ["a"]) == {}
+    assert validator.parse_batch_verdicts("```json\n[{broken\n```", ["a"]) == {}
+
+def test_batch_validation_single_call(validator_with):
+    llm = BatchLLM(_json_reply(["r0", "r1", "r2"]))
+    node = validator_with(llm)
+    update = node.invoke(_reflect_state(3))
+    assert len(llm.prompts) == 1
+    assert update["working_memory"]["validations"] == {"r0": "成功 r0", "r1": "成功 r1", "r2": "成功 r2"}
+    assert [e["method"] for e in update["execution_history"][:3]] == ["llm_batch"] * 3
+    assert update["execution_history"][-1]["llm_validated"] == 3
+
+def test_batch_validation_falls_back_per_task(validator_with):
+    llm = BatchLLM(_json_reply(["r0"]))
+    update = validator_with(llm).invoke(_reflect_state(3))
+    assert len(llm.prompts) == 3
+    assert update["working_memory"]["validations"] == {"r0": "成功 r0", "r1": "单独验证", "r2": "单独验证"}
+
+    llm = BatchLLM(lambda prompt: "无法解析")
+    update = asyncio.run(validator_with(llm).ainvoke(_reflect_state(2)))
+    assert len(llm.prompts) == 3
+    assert set(update["working_memory"]["validations"].values()) == {"单独验证"}
+
+def test_batch_size(validator_with):
+    llm = BatchLLM(_json_reply(["r0", "r1", "r2"]))
+    update = validator_with(llm, batch_size=2).invoke(_reflect_state(3))
+    assert len(llm.prompts) == 2
+    assert update["working_memory"]["validations"]["r2"] == "单独验证"
@@ -0,0 +1,71 @@
+import asyncio
+import time
+import pytest
+from agent.nodes.web import create_web_node, task_urls
+
+def test_web_node_sync_and_async(config, http_server, article, web_state):
+    http_server.pages["/doc"] = (200, article, {})
+    _, web_node = create_web_node(config)
+    state = web_state(http_server.base_url + "/doc")
+
+    update = web_node.invoke(state)
+    assert update["tasks"]["w1"]["status"] == "completed"
+    assert "Main text here." in update["tasks"]["w1"]["result"]
+    assert "标题: Doc" in update["tasks"]["w1"]["result"]
+
+    update = asyncio.run(web_node.ainvoke(state))
+    assert update["tasks"]["w1"]["status"] == "completed"
+
+def test_web_node_reports_http_errors(config, http_server, web_state):
+    _, web_node = create_web_node(config)
+    update = web_node.invoke(web_state(http_server.base_url + "/missing"))
+    assert update["tasks"]["w1"]["status"] == "failed"
+    assert "404" in update["tasks"]["w1"]["result"]
+
+def test_task_urls():
+    assert task_urls({"url": "http://a"}) == ["http://a"]
+    assert task_urls({"urls": ["http://a", "http://b", "http://a"]}) == ["http://a", "http://b"]
+    assert task_urls({"url_template": "http://x/{}", "values": [1, 2]}) == ["http://x/1", "http://x/2"]
+    assert task_urls({"url_template": "http://x/{city}", "values": [{"city": "bj"}]}) == ["http://x/bj"]
+    assert task_urls({}) == []
+
+def test_task_urls_named_template_with_scalar_values():
+    assert task_urls({"url_template": "https://e.com/{city}", "values": ["a", "b"]}) == ["https://e.com/a", "https://e.com/b"]
+    with pytest.raises(ValueError, match="url_template"):
+        task_urls({"url_template": "https://e.com/{city}/{day}", "values": ["a"]})
+    with pytest.raises(ValueError, match="url_template"):
+        task_urls({"url_template": "https://e.com/{city}", "values": [{"town": "a"}]})
+
+def test_bad_url_template_fails_task(config, web_state):
+    _, web_node = create_web_node(config)
+    state = web_state("")
+    state["tasks"]["w1"]["parameters"] = {"url_template": "https://e.com/{city}/{day}", "values": ["a"]}
+    update = web_node.invoke(state)
+    assert update["tasks"]["w1"]["status"] == "failed"
+    assert "url_template" in update["tasks"]["w1"]["result"]
+
+def test_multi_url_task_fetches_concurrently(config, http_server, article, web_state):
+    for name in ("a", "b", "c"):
+        http_server.pages[f"/{name}"] = (200, article.replace(b"Main text", name.encode()), {})
+    http_server.delay = 0.2
+    _, web_node = create_web_node(config)
+    state = web_state(None)
+    state["tasks"]["w1"]["parameters"] = {"url_template": http_server.base_url + "/{}", "values": ["a", "b", "c", "missing"]}
+
+    start = time.perf_counter()
+    update = web_node.invoke(state)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.6
+    task = update["tasks"]["w1"]
+    assert task["status"] == "completed"
+    assert "成功 3 个，失败 1 个" in task["result"]
+    assert "a here." in task["result"] and "c here." in task["result"]
+    assert [u["success"] for u in update["execution_history"][0]["urls"]] == [True, True, True, False]
+
+def test_multi_url_task_fails_only_when_all_fail(config, http_server, web_state):
+    _, web_node = create_web_node(config)
+    state = web_state(None)
+    state["tasks"]["w1"]["parameters"] = {"urls": [http_server.base_url + "/x", http_server.base_url + "/y"]}
+    update = web_node.invoke(state)
+    assert update["tasks"]["w1"]["status"] == "failed"
@@ -0,0 +1,147 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 读取文件的命令：缓存时记录路径参数的修改时间，文件变化后缓存失效
+DEFAULT_FILE_COMMANDS = ("cat", "ls", "find", "head", "tail", "wc", "stat", "du")
+
+# 文件指纹: 路径 -> (mtime_ns, size)，文件不存在时为 None
+Fingerprint = Dict[str, Optional[Tuple[int, int]]]
+
+
+class CommandCache:
+    """命令结果缓存：按归一化参数列表和工作目录缓存成功的执行结果
+
+    每个命令的缓存时间单独配置（未配置的命令使用 default_ttl，0 表示不缓存）；
+    读取文件的命令在文件修改后自动失效。
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[Dict[str, float]] = None,
+        default_ttl: float = 0,
+        max_entries: int = 256,
+        file_commands: Iterable[str] = DEFAULT_FILE_COMMANDS,
+    ):
+        # 规则按参数 token 匹配，最长的规则优先，如 "git log" 优先于 "git"
+        self.ttl = {tuple(rule.split()): seconds for rule, seconds in (ttl or {}).items()}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.file_commands = frozenset(file_commands)
+        # (工作目录, 参数列表) -> (过期时间, 文件指纹, 结果)
+        self._entries: "OrderedDict[Tuple[str, Tuple[str, ...]], Tuple[float, Fingerprint, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_config(cls, config) -> Optional["CommandCache"]:
+        """根据 agent.cli.cache 配置创建缓存，未启用时返回 None"""
+        cache_config = config.get_config("agent.cli.cache") or {}
+        if not cache_config.get("enabled", False):
+            return None
+        return cls(
+            ttl=cache_config.get("ttl"),
+            default_ttl=cache_config.get("default_ttl", 0),
+            max_entries=cache_config.get("max_entries", 256),
+            file_commands=cache_config.get("file_commands", DEFAULT_FILE_COMMANDS),
+        )
+
+    def ttl_for(self, argv: Sequence[str]) -> float:
+        """命令的缓存时间：匹配最长的规则前缀"""
+        for length in range(len(argv), 0, -1):
+            seconds = self.ttl.get(tuple(argv[:length]))
+            if seconds is not None:
+                return seconds
+        return self.default_ttl
+
+    def _file_paths(self, argv: Sequence[str], cwd: str) -> List[str]:
+        """读取文件命令涉及的路径：非选项参数；没有路径参数时为工作目录"""
+        if os.path.basename(argv[0]) not in self.file_commands:
+            return []
+        paths = [arg for arg in argv[1:] if not arg.startswith("-")]
+        return [os.path.join(cwd, os.path.expanduser(path)) for path in paths] or [cwd]
+
+    @staticmethod
+    def _fingerprint(paths: List[str]) -> Fingerprint:
+        fingerprint = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                fingerprint[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                fingerprint[path] = None
+        return fingerprint
+
+    def cacheable(self, argv: Sequence[str]) -> bool:
+        return self.ttl_for(argv) > 0
+
+    def snapshot(self, argv: Sequence[str], cwd: str) -> Fingerprint:
+        """执行命令前记录相关文件的状态，避免执行期间的修改被漏掉"""
+        return self._fingerprint(self._file_paths(argv, cwd))
+
+    def get(self, argv: Sequence[str], cwd: str) -> Optional[Dict[str, Any]]:
+        """查找缓存结果，未命中、过期或文件已变化时返回 None"""
+        key = (cwd, tuple(argv))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, fingerprint, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+        # 检查文件修改时间不持有锁（需要访问文件系统）
+        if fingerprint and self._fingerprint(list(fingerprint)) != fingerprint:
+            with self._lock:
+                self._entries.pop(key, None)
+                self._stats["invalidated"] += 1
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return copy.deepcopy(result)
+
+    def set(self, argv: Sequence[str], cwd: str, result: Dict[str, Any],
+            fingerprint: Optional[Fingerprint] = None) -> bool:
+        """缓存成功的执行结果；该命令不缓存时返回 False
+
+        fingerprint 为执行前用 snapshot 记录的文件状态，不提供时在此时记录。
+        """
+        ttl = self.ttl_for(argv)
+        if ttl <= 0 or not result.get("success"):
+            return False
+        if fingerprint is None:
+            fingerprint = self.snapshot(argv, cwd)
+        with self._lock:
+            key = (cwd, tuple(argv))
+            self._entries[key] = (time.monotonic() + ttl, fingerprint, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
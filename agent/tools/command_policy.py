@@ -0,0 +1,148 @@
+import shlex
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# 规则语法（按 token 匹配，而不是字符串前缀）：
+#   "ls"                 ls 及任意参数；不匹配 lsblk
+#   "python --version $" 以 $ 结尾表示不允许更多参数
+#   "git log *"          含 * ? [ 的 token 按通配符匹配单个参数
+#   "find ** -delete"    ** 匹配任意个（含零个）参数，用于在任意位置匹配某个参数
+EXACT_END = "$"
+ANY_TOKENS = "**"
+GLOB_CHARS = frozenset("*?[")
+# 命令链：按顺序执行，前一个失败则停止
+CHAIN_OPERATOR = "&&"
+
+Command = Union[str, Sequence[str]]
+
+
+class _Node:
+    __slots__ = ("literals", "globs", "any_tokens", "loops", "prefix_end", "exact_end")
+
+    def __init__(self, loops: bool = False):
+        self.literals: Dict[str, "_Node"] = {}
+        self.globs: List[Tuple[str, "_Node"]] = []
+        self.any_tokens: Optional["_Node"] = None
+        self.loops = loops       # 由 ** 到达的节点，可以继续吞掉任意参数
+        self.prefix_end = False  # 规则在此结束，允许后续参数
+        self.exact_end = False   # 规则在此结束，不允许后续参数
+
+
+class _RuleTrie:
+    """token 级前缀树：普通 token 走字典查找，通配 token 逐个匹配"""
+
+    def __init__(self, rules: Iterable[str]):
+        self.root = _Node()
+        self.size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str) -> None:
+        tokens = shlex.split(rule)
+        if not tokens or tokens == [EXACT_END]:
+            raise ValueError(f"Empty command rule: {rule!r}")
+        exact = tokens[-1] == EXACT_END
+        if exact:
+            tokens = tokens[:-1]
+        node = self.root
+        for token in tokens:
+            if token == ANY_TOKENS:
+                if node.any_tokens is None:
+                    node.any_tokens = _Node(loops=True)
+                node = node.any_tokens
+            elif GLOB_CHARS.intersection(token):
+                child = next((n for pattern, n in node.globs if pattern == token), None)
+                if child is None:
+                    child = _Node()
+                    node.globs.append((token, child))
+                node = child
+            else:
+                node = node.literals.setdefault(token, _Node())
+        if exact:
+            node.exact_end = True
+        else:
+            node.prefix_end = True
+        self.size += 1
+
+    @staticmethod
+    def _closure(nodes: Iterable[_Node]) -> Dict[int, _Node]:
+        """加入 ** 匹配零个参数时可到达的节点"""
+        result: Dict[int, _Node] = {}
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in result:
+                continue
+            result[id(node)] = node
+            if node.any_tokens is not None:
+                stack.append(node.any_tokens)
+        return result
+
+    def matches(self, argv: Sequence[str]) -> bool:
+        # 同时推进所有可能的匹配状态；只含普通 token 的规则只会有一个状态，每个参数一次字典查找
+        states = self._closure([self.root])
+        for token in argv:
+            following = []
+            for node in states.values():
+                if node.prefix_end:
+                    return True
+                child = node.literals.get(token)
+                if child is not None:
+                    following.append(child)
+                following.extend(n for pattern, n in node.globs if fnmatchcase(token, pattern))
+                if node.loops:
+                    following.append(node)
+            if not following:
+                return False
+            states = self._closure(following)
+        return any(node.prefix_end or node.exact_end for node in states.values())
+
+
+class CommandPolicy:
+    """预编译的命令白名单/黑名单：先匹配拒绝规则，再匹配允许规则"""
+
+    def __init__(self, allow: Iterable[str], deny: Iterable[str] = ()):
+        self._allow = _RuleTrie(allow)
+        self._deny = _RuleTrie(deny)
+
+    @classmethod
+    def from_config(cls, config, default_allow: Iterable[str] = (),
+                    default_deny: Iterable[str] = ()) -> "CommandPolicy":
+        """根据 agent.cli.safe_commands / agent.cli.deny_commands 创建策略"""
+        allow = config.get_config("agent.cli.safe_commands") or list(default_allow)
+        deny = config.get_config("agent.cli.deny_commands")
+        if deny is None:
+            deny = list(default_deny)
+        return cls(allow, deny)
+
+    @staticmethod
+    def split(command: Command) -> List[List[str]]:
+        """把命令拆成参数列表，按 && 拆分命令链；引号不匹配时抛出 ValueError"""
+        argv = shlex.split(command) if isinstance(command, str) else list(command)
+        segments, current = [], []
+        for token in argv:
+            if token == CHAIN_OPERATOR:
+                segments.append(current)
+                current = []
+            else:
+                current.append(token)
+        segments.append(current)
+        return segments
+
+    def check(self, command: Command) -> Tuple[bool, str]:
+        """检查命令（可含 && 命令链），返回 (是否允许, 拒绝原因)"""
+        try:
+            segments = self.split(command)
+        except ValueError as e:
+            return False, f"无法解析命令: {e}"
+        for argv in segments:
+            if not argv:
+                return False, "命令链中存在空命令"
+            if self._deny.matches(argv):
+                return False, f"命令 '{shlex.join(argv)}' 被拒绝规则禁止"
+            if not self._allow.matches(argv):
+                return False, f"命令 '{shlex.join(argv)}' 不在允许列表中"
+        return True, ""
+
+    def is_allowed(self, command: Command) -> bool:
+        return self.check(command)[0]
@@ -0,0 +1,280 @@
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+# 不包含正文的子树，解析时直接跳过
+SKIP_TAGS = ("script", "style", "noscript", "template", "nav", "svg", "iframe")
+# 正文容器：标签为 article/main/div 且 class 中包含下列关键词
+CONTAINER_TAGS = ("article", "main", "div")
+CONTENT_CLASS = re.compile(r"content|main|article")
+CONTENT_CLASS_WORDS = ("content", "main", "article")
+
+DEFAULT_MAX_CHARS = 5000
+NO_TITLE = "无标题"
+
+
+def _normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text[:max_chars] + "..." if len(text) > max_chars else text
+
+
+class ExtractorBackend:
+    """正文提取后端：从HTML中提取标题和正文"""
+    name = ""
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def extract(self, html: str) -> Dict[str, str]:
+        """返回 {"title": 标题, "content": 正文}"""
+        raise NotImplementedError
+
+
+class SelectolaxExtractor(ExtractorBackend):
+    """基于 selectolax（lexbor）的提取后端，速度最快"""
+    name = "selectolax"
+
+    @staticmethod
+    def _parser_class():
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+            return LexborHTMLParser
+        except ImportError:
+            from selectolax.parser import HTMLParser as ModestHTMLParser
+            return ModestHTMLParser
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            SelectolaxExtractor._parser_class()
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, html: str) -> Dict[str, str]:
+        tree = self._parser_class()(html)
+        title_node = tree.css_first("title")
+        title = _normalize_space(title_node.text()) if title_node is not None else ""
+        tree.strip_tags(list(SKIP_TAGS))
+
+        selector = ", ".join(f"{tag}[class*={word}]" for tag in CONTAINER_TAGS for word in CONTENT_CLASS_WORDS)
+        container = tree.css_first(selector)
+        if container is not None:
+            content = _normalize_space(container.text(separator=" ", strip=True))
+        else:
+            paragraphs = (_normalize_space(p.text(separator=" ", strip=True)) for p in tree.css("p"))
+            content = "\n".join(p for p in paragraphs if p)
+        return {"title": title or NO_TITLE, "content": _truncate(content, self.max_chars)}
+
+
+class LxmlExtractor(ExtractorBackend):
+    """基于 lxml 的提取后端"""
+    name = "lxml"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import lxml.html  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, html: str) -> Dict[str, str]:
+        import lxml.html
+        from lxml import etree
+
+        try:
+            doc = lxml.html.document_fromstring(html)
+        except ValueError:
+            # 带编码声明的字符串需要按字节解析
+            doc = lxml.html.document_fromstring(html.encode("utf-8"))
+        except etree.ParserError:
+            return {"title": NO_TITLE, "content": ""}
+        title = _normalize_space(doc.findtext(".//title") or "")
+        etree.strip_elements(doc, *SKIP_TAGS, with_tail=False)
+
+        condition = " or ".join(f"contains(@class, '{word}')" for word in CONTENT_CLASS_WORDS)
+        containers = doc.xpath(f"({'|'.join('//' + tag for tag in CONTAINER_TAGS)})[{condition}]")
+        if containers:
+            content = _normalize_space(" ".join(containers[0].itertext()))
+        else:
+            paragraphs = (_normalize_space(" ".join(p.itertext())) for p in doc.iter("p"))
+            content = "\n".join(p for p in paragraphs if p)
+        return {"title": title or NO_TITLE, "content": _truncate(content, self.max_chars)}
+
+
+class _StreamingParser(HTMLParser):
+    """单遍流式解析：跳过无关子树，正文收集够了就提前停止"""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title: List[str] = []
+        self.in_title = False
+        # 正在跳过的子树 (标签, 嵌套层数)
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        # 正文容器 (标签, 嵌套层数)，找到第一个即可
+        self.container_tag: Optional[str] = None
+        self.container_depth = 0
+        self.container_text: List[str] = []
+        self.container_chars = 0
+        self.container_done = False
+        # 备选：所有段落
+        self.paragraphs: List[str] = []
+        self.paragraph: Optional[List[str]] = None
+        self.paragraph_chars = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            self.skip_tag, self.skip_depth = tag, 1
+            return
+        if tag == "title":
+            self.in_title = True
+        elif tag == "p":
+            self._close_paragraph()
+            self.paragraph = []
+
+        if self.container_done:
+            return
+        if self.container_tag is not None:
+            if tag == self.container_tag:
+                self.container_depth += 1
+        elif tag in CONTAINER_TAGS:
+            classes = dict(attrs).get("class") or ""
+            if CONTENT_CLASS.search(classes):
+                self.container_tag, self.container_depth = tag, 1
+
+    def handle_endtag(self, tag):
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+            return
+        if tag == "title":
+            self.in_title = False
+        elif tag == "p":
+            self._close_paragraph()
+        if self.container_tag == tag and not self.container_done:
+            self.container_depth -= 1
+            if self.container_depth == 0:
+                self.container_done = True
+                self.done = True
+
+    def handle_data(self, data):
+        if self.skip_tag is not None:
+            return
+        if self.in_title:
+            self.title.append(data)
+        if self.container_tag is not None and not self.container_done:
+            self.container_text.append(data)
+            self.container_chars += len(data)
+            if self.container_chars > self.max_chars * 2:
+                self.container_done = True
+                self.done = True
+        if self.paragraph is not None:
+            self.paragraph.append(data)
+
+    def _close_paragraph(self):
+        if self.paragraph is None:
+            return
+        text = _normalize_space("".join(self.paragraph))
+        self.paragraph = None
+        if text:
+            self.paragraphs.append(text)
+            self.paragraph_chars += len(text) + 1
+            # 没有正文容器时，段落够长也可以提前结束
+            if self.container_tag is None and self.paragraph_chars > self.max_chars * 2:
+                self.done = True
+
+
+class HTMLParserExtractor(ExtractorBackend):
+    """基于标准库 html.parser 的流式提取后端（无需额外依赖）"""
+    name = "html.parser"
+
+    # 每次喂给解析器的字符数，便于提前停止
+    FEED_SIZE = 16 * 1024
+
+    def extract(self, html: str) -> Dict[str, str]:
+        parser = _StreamingParser(self.max_chars)
+        for start in range(0, len(html), self.FEED_SIZE):
+            parser.feed(html[start:start + self.FEED_SIZE])
+            if parser.done:
+                break
+        else:
+            parser.close()
+        parser._close_paragraph()
+
+        title = _normalize_space("".join(parser.title))
+        if parser.container_tag is not None:
+            content = _normalize_space(" ".join(parser.container_text))
+        else:
+            content = "\n".join(parser.paragraphs)
+        return {"title": title or NO_TITLE, "content": _truncate(content, self.max_chars)}
+
+
+class BeautifulSoupExtractor(ExtractorBackend):
+    """原有的 BeautifulSoup + html.parser 提取方式，保留用于对比"""
+    name = "bs4"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import bs4  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, html: str) -> Dict[str, str]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "html.parser")
+        for node in soup(list(SKIP_TAGS)):
+            node.decompose()
+        main_tags = soup.find_all(list(CONTAINER_TAGS), class_=CONTENT_CLASS)
+        if main_tags:
+            content = _normalize_space(main_tags[0].get_text(" ", strip=True))
+        else:
+            paragraphs = (_normalize_space(p.get_text(" ", strip=True)) for p in soup.find_all("p"))
+            content = "\n".join(p for p in paragraphs if p)
+        title = soup.title.string if soup.title and soup.title.string else ""
+        return {"title": _normalize_space(title) or NO_TITLE, "content": _truncate(content, self.max_chars)}
+
+
+# 自动选择时按顺序使用第一个可用的后端
+EXTRACTORS: Dict[str, Callable[..., ExtractorBackend]] = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "html.parser": HTMLParserExtractor,
+    "bs4": BeautifulSoupExtractor,
+}
+AUTO_ORDER = ("selectolax", "lxml", "html.parser")
+
+
+def available_extractors() -> List[str]:
+    """当前环境可用的提取后端"""
+    return [name for name, backend in EXTRACTORS.items() if backend.available()]
+
+
+def get_extractor(backend: str = "auto", max_chars: int = DEFAULT_MAX_CHARS) -> ExtractorBackend:
+    """按名称获取提取后端；auto 选择最快的可用后端，指定的后端不可用时回退到 html.parser"""
+    if backend == "auto":
+        backend = next(name for name in AUTO_ORDER if EXTRACTORS[name].available())
+    elif backend not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor: {backend}. Supported: {', '.join(EXTRACTORS)}")
+    elif not EXTRACTORS[backend].available():
+        backend = "html.parser"
+    return EXTRACTORS[backend](max_chars=max_chars)
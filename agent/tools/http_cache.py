@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+# 只有 Last-Modified 时的启发式有效期：距上次修改时间的 10%，最多一天
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_TTL = 86400
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """解析 Cache-Control 头：指令名小写 -> 参数（没有参数时为 None）"""
+    directives = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+class HTTPCache:
+    """网页磁盘缓存：保存响应正文和提取后的正文内容
+
+    遵循 Cache-Control / Expires，过期后用 ETag / Last-Modified 做条件请求重新验证；
+    超出容量时按最近最少使用淘汰。可以按域名覆盖缓存时间。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 100 * 1024 * 1024,
+        default_ttl: float = 0,
+        domain_ttl: Optional[Dict[str, float]] = None,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttl = {domain.lower(): ttl for domain, ttl in (domain_ttl or {}).items()}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        # 命中时只在内存中记录访问时间，下一次写入时再批量更新，查找不提交事务
+        self._accessed: Dict[str, float] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            "url TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL, "
+            "extracted TEXT, etag TEXT, last_modified TEXT, "
+            "expires_at REAL NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS http_cache_last_access ON http_cache (last_access)")
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config) -> Optional["HTTPCache"]:
+        """根据 agent.web.cache 配置创建缓存，未启用时返回 None"""
+        cache_config = config.get_config("agent.web.cache") or {}
+        if not cache_config.get("enabled", False):
+            return None
+        return cls(
+            path=config.resolve_path(cache_config.get("path", ".cache/http_cache.sqlite")),
+            max_bytes=cache_config.get("max_bytes", 100 * 1024 * 1024),
+            default_ttl=cache_config.get("default_ttl", 0),
+            domain_ttl=cache_config.get("domain_ttl"),
+        )
+
+    def _domain_ttl(self, url: str) -> Optional[float]:
+        """按域名（含上级域名）查找覆盖的缓存时间"""
+        host = (urlsplit(url).hostname or "").lower()
+        while host:
+            if host in self.domain_ttl:
+                return self.domain_ttl[host]
+            _, _, host = host.partition(".")
+        return None
+
+    def _expires_at(self, url: str, headers: Mapping[str, str], now: float) -> Optional[float]:
+        """计算新鲜期截止时间；不允许缓存时返回 None"""
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives:
+            return None
+
+        override = self._domain_ttl(url)
+        if override is not None:
+            return now + override
+        if "no-cache" in directives:
+            return now
+
+        max_age = directives.get("max-age")
+        if max_age is not None and re.fullmatch(r"\d+", max_age):
+            age = headers.get("age")
+            age = int(age) if age and age.isdigit() else 0
+            return now + max(int(max_age) - age, 0)
+
+        expires = _parse_http_date(headers.get("expires"))
+        if expires is not None:
+            date = _parse_http_date(headers.get("date")) or now
+            return now + max(expires - date, 0)
+
+        last_modified = _parse_http_date(headers.get("last-modified"))
+        if last_modified is not None:
+            return now + min(max(now - last_modified, 0) * HEURISTIC_FRACTION, HEURISTIC_MAX_TTL)
+        return now + self.default_ttl
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """查找缓存条目，返回 {"fresh", "extracted", "body", "headers", "etag", "last_modified"}"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT headers, body, extracted, etag, last_modified, expires_at FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            headers, body, extracted, etag, last_modified, expires_at = row
+            fresh = expires_at > now
+            if not fresh and not (etag or last_modified):
+                # 过期且无法重新验证，视为未命中
+                self._db.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                self._db.commit()
+                self._accessed.pop(url, None)
+                self._stats["misses"] += 1
+                return None
+            self._accessed[url] = now
+            self._stats["hits" if fresh else "stale"] += 1
+        return {
+            "fresh": fresh,
+            "headers": json.loads(headers),
+            "body": body,
+            "extracted": json.loads(extracted) if extracted else None,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """重新验证过期条目用的条件请求头"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, headers: Mapping[str, str], body: bytes,
+              extracted: Optional[Dict[str, Any]] = None) -> bool:
+        """保存响应；响应不允许缓存，或已过期且无法重新验证时返回 False"""
+        now = time.time()
+        headers = {k.lower(): v for k, v in headers.items()}
+        expires_at = self._expires_at(url, headers, now)
+        if expires_at is None:
+            return False
+        if expires_at <= now and not (headers.get("etag") or headers.get("last-modified")):
+            # 下次查找时会被当作未命中删除，没有必要写入
+            return False
+        size = len(body) + len(json.dumps(extracted or {}, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(url, headers, body, extracted, etag, last_modified, expires_at, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, json.dumps(headers), body,
+                 json.dumps(extracted, ensure_ascii=False) if extracted is not None else None,
+                 headers.get("etag"), headers.get("last-modified"), expires_at, size, now),
+            )
+            self._accessed.pop(url, None)
+            self._stats["stores"] += 1
+            self._flush_access()
+            self._evict()
+            self._db.commit()
+        return True
+
+    def revalidated(self, url: str, headers: Mapping[str, str]) -> None:
+        """服务器返回 304 后用新的响应头刷新新鲜期"""
+        now = time.time()
+        headers = {k.lower(): v for k, v in headers.items()}
+        with self._lock:
+            row = self._db.execute("SELECT headers, etag, last_modified FROM http_cache WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            self._accessed.pop(url, None)
+            merged = {**json.loads(row[0]), **headers}
+            expires_at = self._expires_at(url, merged, now)
+            if expires_at is None:
+                self._db.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            else:
+                self._db.execute(
+                    "UPDATE http_cache SET headers = ?, etag = ?, last_modified = ?, expires_at = ?, last_access = ? "
+                    "WHERE url = ?",
+                    (json.dumps(merged), merged.get("etag", row[1]), merged.get("last-modified", row[2]),
+                     expires_at, now, url),
+                )
+            self._stats["revalidated"] += 1
+            self._db.commit()
+
+    def _flush_access(self) -> None:
+        """把内存中记录的访问时间写回数据库（由调用方提交）"""
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE http_cache SET last_access = ? WHERE url = ?",
+                [(accessed, url) for url, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict(self) -> None:
+        """超出容量时按最近最少使用淘汰"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM http_cache ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            self._stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self) -> None:
+        """写回访问时间并关闭数据库"""
+        with self._lock:
+            self._flush_access()
+            self._db.commit()
+            self._db.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM http_cache")
+            self._db.commit()
+            self._accessed.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中、重新验证、未命中等统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        lookups = stats["hits"] + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        return stats
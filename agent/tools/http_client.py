@@ -0,0 +1,186 @@
+import asyncio
+import atexit
+import logging
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 AI Research Agent"}
+
+# 所有共享客户端，进程退出时统一关闭
+_instances: "weakref.WeakSet[SharedHTTPClient]" = weakref.WeakSet()
+
+
+def _build_timeout(timeout: Union[None, float, Dict[str, float]]) -> httpx.Timeout:
+    """支持单个数值或 connect/read/write/pool 分项配置"""
+    if timeout is None:
+        return httpx.Timeout(30.0)
+    if isinstance(timeout, dict):
+        default = timeout.get("default", 30.0)
+        return httpx.Timeout(
+            default,
+            connect=timeout.get("connect", default),
+            read=timeout.get("read", default),
+            write=timeout.get("write", default),
+            pool=timeout.get("pool", default),
+        )
+    return httpx.Timeout(float(timeout))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SharedHTTPClient:
+    """长期复用的异步HTTP客户端：keep-alive 连接池、可选 HTTP/2、每主机并发限制
+
+    httpx.AsyncClient 的连接绑定事件循环，因此每个事件循环各持有一个客户端。
+    """
+
+    def __init__(
+        self,
+        timeout: Union[None, float, Dict[str, float]] = None,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_connections_per_host: Optional[int] = 4,
+        host_delay: float = 0.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.timeout = _build_timeout(timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        # 礼貌间隔：同一主机相邻两次请求开始的最小间隔（秒）
+        self.host_delay = host_delay
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._host_next_start: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, float]]" = weakref.WeakKeyDictionary()
+        _instances.add(self)
+
+    @classmethod
+    def from_config(cls, config) -> "SharedHTTPClient":
+        """根据 agent.web 配置创建客户端"""
+        web_config = config.get_config("agent.web") or {}
+        return cls(
+            timeout=web_config.get("timeout"),
+            http2=bool(web_config.get("http2", False)),
+            max_connections=web_config.get("max_connections", 20),
+            max_keepalive_connections=web_config.get("max_keepalive_connections", 10),
+            keepalive_expiry=web_config.get("keepalive_expiry", 30.0),
+            max_connections_per_host=web_config.get("max_connections_per_host", 4),
+            host_delay=web_config.get("host_delay", 0.0),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """当前事件循环的客户端（首次使用时创建）"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers=self.headers,
+                follow_redirects=True,
+            )
+            self._clients[loop] = client
+        return client
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[None]:
+        """占用目标主机的一个并发名额，并保证同一主机的请求间隔"""
+        host = urlsplit(url).netloc.lower()
+        loop = asyncio.get_running_loop()
+        if not self.max_connections_per_host:
+            await self._wait_host_turn(loop, host)
+            yield
+            return
+        semaphores = self._host_semaphores.setdefault(loop, {})
+        semaphore = semaphores.get(host)
+        if semaphore is None:
+            semaphore = semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        async with semaphore:
+            await self._wait_host_turn(loop, host)
+            yield
+
+    async def _wait_host_turn(self, loop: asyncio.AbstractEventLoop, host: str) -> None:
+        """预约该主机的下一个请求时间，未到时间则等待"""
+        if not self.host_delay:
+            return
+        next_start = self._host_next_start.setdefault(loop, {})
+        now = loop.time()
+        start = max(now, next_start.get(host, now))
+        next_start[host] = start + self.host_delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """在主机并发限制内发送GET请求"""
+        async with self.host_slot(url):
+            return await self.client.get(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """流式请求：正文按需读取，读取期间一直占用主机并发名额"""
+        async with self.host_slot(url):
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的客户端"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        """关闭所有事件循环中的客户端；当前线程正在运行的事件循环中的客户端安排为后台任务关闭"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, client in list(self._clients.items()):
+            if client.is_closed or loop.is_closed():
+                continue
+            try:
+                if loop is running:
+                    loop.create_task(client.aclose())
+                elif loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+                else:
+                    loop.run_until_complete(client.aclose())
+            except Exception as e:
+                logger.debug("Failed to close HTTP client: %s", e)
+        self._clients.clear()
+
+
+async def aclose_shared_clients() -> None:
+    """关闭当前事件循环中所有共享客户端（异步入口退出前调用）"""
+    for instance in list(_instances):
+        await instance.aclose()
+
+
+@atexit.register
+def close_shared_clients() -> None:
+    """关闭所有共享客户端，进程退出时自动调用"""
+    for instance in list(_instances):
+        instance.close()
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import signal
+import sys
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_OUTPUT_BYTES = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+# 逐行输出回调: (流名称 "stdout"/"stderr", 一行文本)
+LineCallback = Callable[[str, str], None]
+
+
+class BoundedOutput:
+    """有界输出缓冲：保留开头和结尾各一半，中间部分只记录丢弃的字节数"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail: "deque[bytes]" = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        if len(self.head) < self.head_limit:
+            room = self.head_limit - len(self.head)
+            self.head += data[:room]
+            data = data[room:]
+        if not data or not self.tail_limit:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        # 只保留最后 tail_limit 字节
+        while self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.head) - min(self.tail_size, self.tail_limit)
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    def text(self) -> str:
+        tail = b"".join(self.tail)[-self.tail_limit:] if self.tail_limit else b""
+        head = bytes(self.head).decode("utf-8", errors="replace")
+        tail = tail.decode("utf-8", errors="replace")
+        if not self.truncated:
+            return head + tail
+        return f"{head}\n... [省略 {self.dropped} 字节] ...\n{tail}"
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """终止子进程及其创建的所有进程"""
+    if process.returncode is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _pump(stream: asyncio.StreamReader, name: str, output: BoundedOutput,
+                on_line: Optional[LineCallback]) -> None:
+    """按块读取输出流：写入有界缓冲，并逐行回调"""
+    pending = b""
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        output.write(chunk)
+        if on_line is None:
+            continue
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            on_line(name, line.decode("utf-8", errors="replace"))
+        # 超长的单行不无限累积
+        if len(pending) > READ_CHUNK_SIZE:
+            on_line(name, pending.decode("utf-8", errors="replace"))
+            pending = b""
+    if on_line is not None and pending:
+        on_line(name, pending.decode("utf-8", errors="replace"))
+
+
+async def run_command(
+    argv: List[str],
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    cwd: Optional[str] = None,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    on_line: Optional[LineCallback] = None,
+) -> Dict[str, Any]:
+    """异步执行命令（不经过shell），流式读取输出
+
+    返回 {"success", "output", "error", "return_code", "timed_out", "truncated"}。
+    超时或被取消时终止整个进程组。
+    """
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        # 子进程单独成组，超时时可以连同其子进程一起终止
+        start_new_session=sys.platform != "win32",
+    )
+    stdout = BoundedOutput(max_output_bytes)
+    stderr = BoundedOutput(max_output_bytes)
+    readers = asyncio.gather(
+        _pump(process.stdout, "stdout", stdout, on_line),
+        _pump(process.stderr, "stderr", stderr, on_line),
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.shield(readers), timeout)
+        # 进程可能关闭了输出但仍在运行，等待退出同样受截止时间限制
+        remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+        await asyncio.wait_for(process.wait(), remaining)
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill_process_group(process)
+    except BaseException:
+        # 任务被取消：不留下孤儿进程
+        _kill_process_group(process)
+        readers.cancel()
+        raise
+    finally:
+        if process.returncode is None:
+            await process.wait()
+
+    if timed_out:
+        # 进程组已终止，管道随之关闭
+        try:
+            await asyncio.wait_for(readers, 5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            readers.cancel()
+
+    error = stderr.text()
+    if timed_out:
+        error = f"命令执行超时（{timeout}秒），已终止\n{error}".rstrip()
+    return {
+        "success": process.returncode == 0 and not timed_out,
+        "output": stdout.text(),
+        "error": error,
+        "return_code": process.returncode,
+        "timed_out": timed_out,
+        "truncated": stdout.truncated or stderr.truncated,
+    }
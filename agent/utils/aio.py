@@ -0,0 +1,25 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+# 同步节点共用的后台事件循环，避免每次调用都创建和销毁事件循环
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）长期运行的后台事件循环"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="agent-event-loop", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """在后台事件循环中执行协程并同步等待结果"""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
@@ -0,0 +1,59 @@
+from typing import Any, Dict, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from agent.models.state import AgentState
+from metrics import NODE_DURATION, NODE_IN_FLIGHT, NODE_RUNS, TASKS_FINISHED, MetricsRegistry, get_metrics
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+def _record_tasks(registry: MetricsRegistry, state: AgentState, update: Any) -> None:
+    """统计本次更新中执行结束的任务（按任务类型和状态）"""
+    patches = update.get("tasks") if isinstance(update, dict) else None
+    if not patches:
+        return
+    tasks = state.get("tasks") or {}
+    for task_id, patch in patches.items():
+        status = patch.get("status")
+        if status in FINISHED_STATUSES:
+            task_type = patch.get("type") or (tasks.get(task_id) or {}).get("type", "unknown")
+            registry.inc(TASKS_FINISHED, task_type=task_type, status=status)
+
+
+def instrument_node(name: str, node: Runnable, registry: MetricsRegistry) -> Tuple[str, Runnable]:
+    """包装图节点：记录耗时直方图、运行次数（成功/出错）、正在运行的数量和任务结果"""
+
+    def _finish(state: AgentState, update: Any, outcome: str) -> None:
+        registry.inc(NODE_RUNS, node=name, outcome=outcome)
+        if outcome == "ok":
+            _record_tasks(registry, state, update)
+
+    def _run(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+        outcome, update = "error", None
+        try:
+            with registry.track(NODE_DURATION, NODE_IN_FLIGHT, node=name):
+                update = node.invoke(state, config)
+            outcome = "ok"
+            return update
+        finally:
+            _finish(state, update, outcome)
+
+    async def _arun(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+        outcome, update = "error", None
+        try:
+            with registry.track(NODE_DURATION, NODE_IN_FLIGHT, node=name):
+                update = await node.ainvoke(state, config)
+            outcome = "ok"
+            return update
+        finally:
+            _finish(state, update, outcome)
+
+    return name, RunnableLambda(_run, afunc=_arun, name=name)
+
+
+def register_stats(config, name: str, component: Any) -> None:
+    """启用指标时把组件的 stats()（缓存命中率等）注册为导出项；组件为 None 时忽略"""
+    registry = get_metrics(config)
+    if registry is not None and component is not None:
+        registry.register_collector(name, component.stats)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def touches(changed: List[str], sections: List[str]) -> bool:
+    """变化的配置路径是否涉及 sections 中的某一节（包括其上级和下级路径）"""
+    return any(
+        key == section or key.startswith(section + ".") or section.startswith(key + ".")
+        for key in changed for section in sections
+    )
+
+
+def close_replaced(old: Any, new: Any = None) -> None:
+    """关闭被替换的对象：对象本身或字典中的各项有 close（或只有 aclose）时调用，新值中仍在使用的对象除外"""
+    items = list(old.values()) if isinstance(old, dict) else [old]
+    kept = {id(item) for item in (new.values() if isinstance(new, dict) else [new])}
+    for item in items:
+        if item is None or id(item) in kept:
+            continue
+        try:
+            close = getattr(item, "close", None)
+            aclose = getattr(item, "aclose", None)
+            if callable(close):
+                close()
+            elif callable(aclose):
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    asyncio.run(aclose())
+                else:
+                    loop.create_task(aclose())
+        except Exception:
+            logger.exception("Failed to close replaced %s", type(item).__name__)
+
+
+class Reloadable(Generic[T]):
+    """由配置构建的设置或组件：相关配置节变化后，在下一次使用时重新构建
+
+    之后的调用拿到新对象，流程图无需重新编译。旧对象（或字典中的客户端、缓存等）被替换后关闭；
+    需要在一段时间内持续使用客户端、缓存的调用用 lease 取值，旧对象等到最后一个租约释放后才关闭，
+    正在执行的调用不受影响。
+    """
+
+    def __init__(self, config: Config, build: Callable[[Config], T], *sections: str):
+        self._config = config
+        self._build = build
+        self._sections = list(sections)
+        self._lock = threading.Lock()
+        self._stale = False
+        self._value = build(config)
+        # 各对象（按 id）的租约数，以及被替换后等待租约释放再关闭的对象
+        self._leases: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+        config.subscribe(self._on_change)
+
+    def _on_change(self, config: Config, changed: List[str]) -> None:
+        if touches(changed, self._sections):
+            self._stale = True
+
+    def _refresh(self) -> Optional[Any]:
+        """持有锁时调用：配置变化后重新构建，返回可以立即关闭的旧对象"""
+        if not self._stale:
+            return None
+        self._stale = False
+        previous = self._value
+        try:
+            self._value = self._build(self._config)
+        except Exception:
+            # 新配置无效时继续使用之前的设置
+            logger.exception("Failed to rebuild %s settings, keeping the previous ones",
+                             ", ".join(self._sections))
+            return None
+        if self._leases.get(id(previous)):
+            self._retired[id(previous)] = previous
+            return None
+        return previous
+
+    def get(self) -> T:
+        """取当前值，适合只在调用期间短暂使用的设置"""
+        if self._stale:
+            with self._lock:
+                previous = self._refresh()
+            if previous is not None:
+                close_replaced(previous, self._value)
+        return self._value
+
+    @contextmanager
+    def lease(self) -> Iterator[T]:
+        """取当前值并在 with 块内持有，期间即使配置变化也不会关闭它"""
+        with self._lock:
+            previous = self._refresh()
+            value = self._value
+            self._leases[id(value)] = self._leases.get(id(value), 0) + 1
+        if previous is not None:
+            close_replaced(previous, value)
+        try:
+            yield value
+        finally:
+            retired = None
+            with self._lock:
+                remaining = self._leases[id(value)] - 1
+                if remaining:
+                    self._leases[id(value)] = remaining
+                else:
+                    del self._leases[id(value)]
+                    retired = self._retired.pop(id(value), None)
+            if retired is not None:
+                close_replaced(retired, self._value)
@@ -0,0 +1,11 @@
+from typing import Callable
+
+from langgraph.config import get_stream_writer
+
+
+def get_writer() -> Callable:
+    """获取图的自定义流写入器；不在图中运行时返回空操作"""
+    try:
+        return get_stream_writer()
+    except (RuntimeError, KeyError):
+        return lambda chunk: None
@@ -0,0 +1,108 @@
+import importlib
+from typing import Callable, Dict, Iterable, List, Optional
+
+from agent.models.state import SubTask
+
+# 验证规则：返回验证结论；无法确定时返回 None，交给LLM验证
+Rule = Callable[[SubTask], Optional[str]]
+# 适用于所有任务类型的规则
+ANY_TYPE = "*"
+
+PASSED = "验证通过"
+FAILED = "验证失败"
+
+
+def check_empty_result(task: SubTask) -> Optional[str]:
+    """没有任何结果的任务直接判定失败"""
+    if not (task.get("result") or "").strip():
+        return f"{FAILED}: 任务没有产生结果"
+    return None
+
+
+def check_cli(task: SubTask) -> Optional[str]:
+    """根据退出码和超时判定命令行任务"""
+    details = task.get("details")
+    if not details:
+        return None
+    if details.get("timed_out"):
+        return f"{FAILED}: 命令执行超时"
+    return_code = details.get("return_code")
+    if task["status"] == "failed":
+        if return_code is None:
+            return f"{FAILED}: 命令未执行（安全限制或参数错误）"
+        return f"{FAILED}: 命令退出码为 {return_code}"
+    if return_code == 0:
+        note = "，输出已截断" if details.get("truncated") else ""
+        return f"{PASSED}: 命令成功执行（退出码 0{note}）"
+    return None
+
+
+def check_web(task: SubTask) -> Optional[str]:
+    """根据每个网址的访问结果判定网页任务；部分失败或正文为空时交给LLM"""
+    urls = (task.get("details") or {}).get("urls")
+    if not urls:
+        return None
+    failed = [u for u in urls if not u["success"]]
+    if len(failed) == len(urls):
+        statuses = "，".join(f"{u['url']} ({u.get('status_code') or '连接失败'})" for u in failed)
+        return f"{FAILED}: 所有网址访问失败: {statuses}"
+    if failed or any(not u.get("content_chars") for u in urls):
+        return None
+    return f"{PASSED}: 成功获取 {len(urls)} 个网址的正文内容"
+
+
+DEFAULT_RULES: Dict[str, List[Rule]] = {
+    ANY_TYPE: [check_empty_result],
+    "cli": [check_cli],
+    "web": [check_web],
+}
+
+
+def import_rule(path: str) -> Rule:
+    """按 "模块:函数" 路径导入自定义规则"""
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"Invalid rule path: {path!r}, expected 'module:function'")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class ValidationPolicy:
+    """验证策略：先按任务类型执行确定性规则，规则无法判定时才需要LLM验证"""
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, List[Rule]]] = None,
+        always_llm: Iterable[str] = (),
+        fast_path: bool = True,
+    ):
+        source = DEFAULT_RULES if rules is None else rules
+        self.rules: Dict[str, List[Rule]] = {task_type: list(r) for task_type, r in source.items()}
+        self.always_llm = frozenset(always_llm)
+        self.fast_path = fast_path
+
+    @classmethod
+    def from_config(cls, config) -> "ValidationPolicy":
+        """根据 agent.validator 配置创建策略"""
+        validator_config = config.get_config("agent.validator") or {}
+        policy = cls(
+            always_llm=validator_config.get("always_llm") or (),
+            fast_path=validator_config.get("fast_path", True),
+        )
+        for task_type, paths in (validator_config.get("rules") or {}).items():
+            for path in paths:
+                policy.register(task_type, import_rule(path))
+        return policy
+
+    def register(self, task_type: str, rule: Rule) -> None:
+        """添加规则，排在已有规则之前；task_type 为 "*" 时适用于所有类型"""
+        self.rules.setdefault(task_type, []).insert(0, rule)
+
+    def evaluate(self, task: SubTask) -> Optional[str]:
+        """用规则验证任务；需要LLM验证时返回 None"""
+        if not self.fast_path or task["type"] in self.always_llm:
+            return None
+        for rule in self.rules.get(ANY_TYPE, []) + self.rules.get(task["type"], []):
+            verdict = rule(task)
+            if verdict is not None:
+                return verdict
+        return None
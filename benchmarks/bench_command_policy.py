@@ -0,0 +1,47 @@
+"""命令白名单匹配基准：对比原来的字符串前缀扫描和预编译的 CommandPolicy
+
+用法: python -m benchmarks.bench_command_policy [--rules N] [--iterations N]
+"""
+import argparse
+import shlex
+import timeit
+
+from agent.tools.command_policy import CommandPolicy
+
+BASE_RULES = ["ls", "pwd", "echo", "cat", "find", "python --version", "python3 --version",
+              "date", "whoami", "hostname"]
+COMMANDS = ["ls -la /tmp", "lsblk", "python --version", "git status", "find . -name '*.py'", "hostnamectl"]
+
+
+def legacy_is_safe(command, safe_commands):
+    """原来的实现：每次调用都重新 shlex.split 全部规则并线性扫描"""
+    cmd = shlex.split(command)[0] if command else ""
+    if command in safe_commands:
+        return True
+    for safe_cmd in safe_commands:
+        if command.startswith(safe_cmd):
+            return True
+    return cmd in [shlex.split(c)[0] for c in safe_commands]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=200, help="额外生成的规则数，模拟较大的白名单")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rules = BASE_RULES + [f"tool{i} sub{i}" for i in range(args.rules)]
+    policy = CommandPolicy(rules)
+
+    print(f"{len(rules)} rules, {args.iterations} iterations per command")
+    print(f"{'command':<22}{'legacy':>12}{'policy':>12}{'speedup':>10}  legacy/policy verdict")
+    for command in COMMANDS:
+        legacy = timeit.timeit(lambda: legacy_is_safe(command, rules), number=args.iterations)
+        compiled = timeit.timeit(lambda: policy.is_allowed(command), number=args.iterations)
+        per_call = 1e6 / args.iterations
+        print(f"{command:<22}{legacy * per_call:>10.1f}us{compiled * per_call:>10.1f}us{legacy / compiled:>9.1f}x"
+              f"  {legacy_is_safe(command, rules)}/{policy.is_allowed(command)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Agent 流程图端到端基准：假LLM + 本地网页夹具，不访问任何模型或外网
+
+用法: python -m benchmarks.bench_graph [--scenario NAME ...] [--runs N] [--sessions N]
+      [--llm-latency S] [--tokens-per-second N] [--page-delay S]
+      [--save-baseline FILE] [--baseline FILE] [--tolerance R]
+
+与基准文件比较时，任一场景的延迟分位数变慢或吞吐下降超过 tolerance 则以退出码 1 结束。
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from agent.batch import percentile
+from agent.graph_builder import build_agent_graph
+from agent.runner import create_initial_state
+from agent.tools.http_client import aclose_shared_clients, close_shared_clients
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.fixture_server import FixtureServer
+from config import Config
+from llm.llm_factory import clear_llm_clients, register_llm_client
+from llm.metrics_client import MetricsLLMClient
+from metrics import NODE_DURATION, get_registry
+
+# 场景：任务数、并发会话数
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "single": {"description": "单个网页任务", "tasks": 1, "sessions": 1},
+    "plan10": {"description": "10 个任务的计划（网页 + 命令行，部分任务有依赖）", "tasks": 10, "sessions": 1},
+    "sessions": {"description": "多个并发会话，每个会话 3 个任务", "tasks": 3, "sessions": 20},
+}
+
+# 比较基准时检查的指标及方向：1 表示越小越好，-1 表示越大越好
+COMPARED = {"p50": 1, "p95": 1, "p99": 1, "runs_per_sec": -1}
+
+
+def make_plan(task_count: int, urls: List[str]) -> str:
+    """生成规划器返回的任务计划：偶数任务访问夹具页面，奇数任务执行 echo；每第 4 个任务依赖前一个"""
+    tasks = []
+    for i in range(task_count):
+        task: Dict[str, Any] = {"id": f"t{i + 1}", "description": f"子任务 {i + 1}", "depends_on": []}
+        if i % 2 == 0:
+            task.update(type="web", parameters={"url": urls[(i // 2) % len(urls)]})
+        else:
+            task.update(type="cli", parameters={"command": f"echo task{i + 1}"})
+        if i % 4 == 3:
+            task["depends_on"] = [f"t{i}"]
+        tasks.append(task)
+    return "```json\n" + json.dumps(tasks, ensure_ascii=False) + "\n```"
+
+
+def prepare_config(config: Config) -> None:
+    """关闭会让重复运行走捷径的缓存，并启用指标以统计各节点耗时"""
+    config.set_config("metrics.enabled", True)
+    config.set_config("agent.planner.plan_cache.enabled", False)
+    config.set_config("agent.web.cache.enabled", False)
+    config.set_config("agent.cli.cache.enabled", False)
+
+
+def node_times(runs: int) -> Dict[str, Dict[str, float]]:
+    """从指标中读取各节点的调用次数和平均每次运行的耗时"""
+    series = get_registry().snapshot()["metrics"].get(NODE_DURATION, {}).get("series", [])
+    return {
+        item["labels"]["node"]: {"calls": item["count"], "seconds_per_run": item["sum"] / runs}
+        for item in series
+    }
+
+
+async def _timed_run(graph, text: str) -> float:
+    start = time.perf_counter()
+    await graph.ainvoke(create_initial_state(text))
+    return time.perf_counter() - start
+
+
+async def _run_rounds(graph, rounds: int, sessions: int) -> List[float]:
+    """每轮同时启动 sessions 个会话，返回每次运行的端到端耗时"""
+    latencies: List[float] = []
+    try:
+        for round_index in range(rounds):
+            latencies.extend(await asyncio.gather(*(
+                _timed_run(graph, f"基准请求 {round_index}-{i}") for i in range(sessions)
+            )))
+    finally:
+        await aclose_shared_clients()
+    return latencies
+
+
+def _run_sync(graph, rounds: int) -> List[float]:
+    latencies = []
+    for round_index in range(rounds):
+        start = time.perf_counter()
+        graph.invoke(create_initial_state(f"基准请求 {round_index}"))
+        latencies.append(time.perf_counter() - start)
+    close_shared_clients()
+    return latencies
+
+
+def run_scenario(config: Config, name: str, fixtures: FixtureServer, args) -> Dict[str, Any]:
+    scenario = SCENARIOS[name]
+    sessions = args.sessions if args.sessions and scenario["sessions"] > 1 else scenario["sessions"]
+    llm = FakeLLMClient(make_plan(scenario["tasks"], fixtures.urls()), args.llm_latency, args.tokens_per_second)
+    registry = get_registry()
+    clear_llm_clients()
+    register_llm_client(config, MetricsLLMClient(llm, registry))
+    graph = build_agent_graph(config)
+
+    # 预热一次（建立连接、导入解析库），不计入结果
+    if args.sync and sessions == 1:
+        _run_sync(graph, 1)
+    else:
+        asyncio.run(_run_rounds(graph, 1, 1))
+    registry.reset()
+
+    start = time.perf_counter()
+    if args.sync and sessions == 1:
+        latencies = _run_sync(graph, args.runs)
+    else:
+        latencies = asyncio.run(_run_rounds(graph, args.runs, sessions))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "description": scenario["description"],
+        "runs": len(latencies),
+        "sessions": sessions,
+        "runs_per_sec": len(latencies) / elapsed,
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "nodes": node_times(len(latencies)),
+        "llm_calls": dict(llm.calls),
+    }
+
+
+def print_result(name: str, result: Dict[str, Any]) -> None:
+    print(f"\n== {name}: {result['description']}（{result['runs']} 次运行，并发 {result['sessions']}）")
+    print(f"   吞吐 {result['runs_per_sec']:.2f} runs/s   平均 {result['mean'] * 1000:.1f}ms   "
+          f"p50 {result['p50'] * 1000:.1f}ms   p95 {result['p95'] * 1000:.1f}ms   p99 {result['p99'] * 1000:.1f}ms")
+    print(f"   {'node':<14}{'calls':>8}{'ms/run':>10}")
+    for node, stats in sorted(result["nodes"].items(), key=lambda item: -item[1]["seconds_per_run"]):
+        print(f"   {node:<14}{stats['calls']:>8}{stats['seconds_per_run'] * 1000:>10.1f}")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """打印与基准的差异，返回超出容差的退化项"""
+    regressions = []
+    print(f"\n== 与基准比较（容差 {tolerance:.0%}）")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"   {name}: 基准中没有该场景")
+            continue
+        for key, direction in COMPARED.items():
+            if not base.get(key):
+                continue
+            change = (result[key] - base[key]) / base[key]
+            regressed = change * direction > tolerance
+            flag = "  <-- 退化" if regressed else ""
+            print(f"   {name:<10}{key:<14}{base[key]:>10.4f} -> {result[key]:>10.4f}  {change:+.1%}{flag}")
+            if regressed:
+                regressions.append(f"{name}.{key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="要运行的场景，可重复；默认全部")
+    parser.add_argument("--runs", type=int, default=10, help="每个场景的运行轮数（并发场景每轮运行所有会话）")
+    parser.add_argument("--sessions", type=int, default=0, help="覆盖并发场景的会话数")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="假LLM每次调用的固定延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="假LLM的生成速度，0 表示不限")
+    parser.add_argument("--page-delay", type=float, default=0.0, help="夹具页面的响应延迟（秒）")
+    parser.add_argument("--sync", action="store_true", help="单会话场景用同步 invoke 执行")
+    parser.add_argument("--save-baseline", metavar="FILE", help="把结果保存为基准文件")
+    parser.add_argument("--baseline", metavar="FILE", help="与基准文件比较")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="允许的退化比例")
+    args = parser.parse_args()
+
+    config = Config()
+    prepare_config(config)
+    results = {}
+    with FixtureServer(delay=args.page_delay) as fixtures:
+        for name in args.scenario or list(SCENARIOS):
+            results[name] = run_scenario(config, name, fixtures, args)
+            print_result(name, results[name])
+    clear_llm_clients()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n基准已保存到 {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""HTML 正文提取基准：在保存的网页语料上比较各提取后端
+
+用法: python -m benchmarks.bench_html_extract [--corpus DIR] [--repeat N] [--max-bytes N] [--synthetic-mb N]
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from agent.tools.html_extract import available_extractors, get_extractor
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def load_corpus(directory: str, max_bytes: int) -> List[Tuple[str, str]]:
+    """读取语料目录下的 .html 文件，按字节上限截断（与网页节点的读取方式一致）"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            body = f.read(max_bytes) if max_bytes else f.read()
+        pages.append((os.path.basename(path), body.decode("utf-8", errors="replace")))
+    return pages
+
+
+def synthetic_page(megabytes: float) -> str:
+    """生成一个大页面：大量脚本、导航和正文段落"""
+    block = ("<nav>" + "<a href='#'>link</a>" * 20 + "</nav>"
+             "<script>var data = '" + "x" * 2000 + "';</script>"
+             "<p>" + "Lorem ipsum dolor sit amet. " * 20 + "</p>")
+    count = max(1, int(megabytes * 1024 * 1024 / len(block)))
+    return f"<html><head><title>Synthetic</title></head><body><div class='content'>{block * count}</div></body></html>"
+
+
+def bench(backend: str, pages: List[Tuple[str, str]], repeat: int) -> Dict[str, float]:
+    extractor = get_extractor(backend)
+    timings = {}
+    for name, html in pages:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            extractor.extract(html)
+            samples.append(time.perf_counter() - start)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="保存的网页目录（*.html）")
+    parser.add_argument("--repeat", type=int, default=20, help="每个页面重复次数，取中位数")
+    parser.add_argument("--max-bytes", type=int, default=2 * 1024 * 1024, help="每个页面读取的字节上限，0 表示不限")
+    parser.add_argument("--synthetic-mb", type=float, default=0, help="额外加入指定大小（MB）的合成大页面")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.max_bytes)
+    if args.synthetic_mb:
+        html = synthetic_page(args.synthetic_mb)
+        if args.max_bytes:
+            html = html.encode("utf-8")[:args.max_bytes].decode("utf-8", errors="replace")
+        pages.append((f"synthetic_{args.synthetic_mb:g}mb", html))
+    if not pages:
+        parser.error(f"no *.html pages found in {args.corpus}")
+
+    backends = available_extractors()
+    results = {backend: bench(backend, pages, args.repeat) for backend in backends}
+
+    width = max(len(name) for name, _ in pages)
+    print(f"{'page':<{width}}  " + "  ".join(f"{b:>12}" for b in backends))
+    for name, _ in pages:
+        print(f"{name:<{width}}  " + "  ".join(f"{results[b][name] * 1000:>10.2f}ms" for b in backends))
+    print(f"{'total':<{width}}  " + "  ".join(f"{sum(results[b].values()) * 1000:>10.2f}ms" for b in backends))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""冷启动基准：用 python -X importtime 启动 main.py，测量到出现输入提示的时间和各模块的导入耗时
+
+用法: python -m benchmarks.bench_import [--runs N] [--top N]
+      [--save-baseline FILE] [--baseline FILE] [--tolerance R]
+
+每次运行都是新的解释器进程；第一次运行（编译 .pyc）不计入结果。
+与基准文件比较时，启动时间或导入时间变慢超过 tolerance 则以退出码 1 结束。
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from agent.batch import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+# main.py 读取第一个输入之前输出的提示
+PROMPT_MARK = "请输入您的请求"
+# 各LLM后端的SDK，只应导入配置选中的那个
+BACKEND_SDKS = ["langchain_ollama", "langchain_google_genai"]
+COMPARED = ["startup_p50", "import_total"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def parse_importtime(text: str) -> List[Tuple[str, int, int, int]]:
+    """解析 -X importtime 的输出，返回 (模块, 自身耗时us, 累计耗时us, 嵌套深度)"""
+    modules = []
+    for line in text.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def measure_once(timeout: float = 60.0) -> Dict[str, Any]:
+    """启动一次 main.py，等到输入提示出现后输入退出命令"""
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-X", "importtime", MAIN], cwd=ROOT, text=True, encoding="utf-8",
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        )
+        try:
+            for line in process.stdout:
+                if PROMPT_MARK in line:
+                    break
+            else:
+                raise RuntimeError("main.py 没有输出输入提示就退出了")
+            startup = time.perf_counter() - start
+            process.communicate("exit\n", timeout=timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        stderr.seek(0)
+        modules = parse_importtime(stderr.read())
+
+    top_level = [m for m in modules if m[3] == 0]
+    names = {m[0] for m in modules}
+    return {
+        "startup": startup,
+        "import_total": sum(m[2] for m in top_level) / 1e6,
+        "modules": {name: cumulative / 1e6 for name, _, cumulative, _ in modules},
+        "backends": [sdk for sdk in BACKEND_SDKS if sdk in names],
+    }
+
+
+def run(runs: int) -> Dict[str, Any]:
+    measure_once()
+    samples = [measure_once() for _ in range(runs)]
+    startups = [s["startup"] for s in samples]
+    imports = [s["import_total"] for s in samples]
+    # 各模块取所有运行的中位数
+    modules = {name: percentile([s["modules"].get(name, 0.0) for s in samples], 0.5)
+               for name in samples[-1]["modules"]}
+    return {
+        "runs": runs,
+        "startup_p50": percentile(startups, 0.5),
+        "startup_min": min(startups),
+        "import_total": percentile(imports, 0.5),
+        "backends": samples[-1]["backends"],
+        "modules": modules,
+    }
+
+
+def print_result(result: Dict[str, Any], top: int) -> None:
+    print(f"\n== main.py 冷启动（{result['runs']} 次运行）")
+    print(f"   到输入提示 p50 {result['startup_p50'] * 1000:.1f}ms   最快 {result['startup_min'] * 1000:.1f}ms   "
+          f"导入 {result['import_total'] * 1000:.1f}ms")
+    print(f"   已导入的LLM后端SDK: {', '.join(result['backends']) or '无'}")
+    print(f"   {'module':<48}{'cumulative ms':>14}")
+    for name, seconds in sorted(result["modules"].items(), key=lambda item: -item[1])[:top]:
+        print(f"   {name:<48}{seconds * 1000:>14.1f}")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """打印与基准的差异，返回超出容差的退化项"""
+    regressions = []
+    print(f"\n== 与基准比较（容差 {tolerance:.0%}）")
+    for key in COMPARED:
+        if not baseline.get(key):
+            continue
+        change = (result[key] - baseline[key]) / baseline[key]
+        regressed = change > tolerance
+        flag = "  <-- 退化" if regressed else ""
+        print(f"   {key:<14}{baseline[key]:>10.4f} -> {result[key]:>10.4f}  {change:+.1%}{flag}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="计入结果的启动次数")
+    parser.add_argument("--top", type=int, default=20, help="输出累计导入耗时最长的模块数")
+    parser.add_argument("--save-baseline", metavar="FILE", help="把结果保存为基准文件")
+    parser.add_argument("--baseline", metavar="FILE", help="与基准文件比较")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="允许的退化比例")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print_result(result, args.top)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n基准已保存到 {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\n启动变慢: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
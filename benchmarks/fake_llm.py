@@ -0,0 +1,95 @@
+"""确定性的假LLM：不访问任何模型，按提示词类型返回预设回复并模拟延迟和生成速度"""
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from agent.memory.context_builder import SUMMARY_PROMPT
+from agent.nodes.planner import PLANNER_PROMPT
+from agent.nodes.validator import BATCH_VALIDATION_PROMPT, VALIDATION_PROMPT
+from llm.llm_client import LLMClient
+from llm.tokens import count_tokens
+
+# 按各节点提示词的开头识别调用来源
+PLANNER_PREFIX = PLANNER_PROMPT[:20]
+BATCH_VALIDATION_PREFIX = BATCH_VALIDATION_PROMPT[:30]
+VALIDATION_PREFIX = VALIDATION_PROMPT[:12]
+SUMMARY_PREFIX = SUMMARY_PROMPT[:5]
+
+DEFAULT_REPORT = "## 执行报告\n\n" + "所有子任务均已执行完毕，结果汇总如下。" * 10
+
+
+def _chunks(text: str, size: int = 4) -> List[str]:
+    """按固定字符数切分，模拟逐 token 输出"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeLLMClient(LLMClient):
+    """假LLM：延迟 = latency + 回复 token 数 / tokens_per_second
+
+    规划提示返回预设的任务计划 JSON，批量验证返回每个任务编号的结论，
+    其余提示（单任务验证、结果概括、报告）返回固定文本。
+    """
+    model_name = "fake"
+
+    def __init__(self, plan: str = "[]", latency: float = 0.05, tokens_per_second: float = 200.0,
+                 report: str = DEFAULT_REPORT):
+        self.plan = plan
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.report = report
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def reply(self, prompt: str) -> str:
+        """按提示词类型生成回复，并记录调用次数"""
+        if prompt.startswith(PLANNER_PREFIX):
+            kind, text = "planner", self.plan
+        elif prompt.startswith(BATCH_VALIDATION_PREFIX):
+            ids = re.findall(r"^编号: (\S+)$", prompt, re.MULTILINE)
+            kind = "batch_validation"
+            text = "```json\n" + json.dumps([{"id": i, "verdict": "任务成功"} for i in ids], ensure_ascii=False) + "\n```"
+        elif prompt.startswith(VALIDATION_PREFIX):
+            kind, text = "validation", "任务成功执行"
+        elif prompt.startswith(SUMMARY_PREFIX):
+            kind, text = "summary", "结果概括：页面内容已获取。"
+        else:
+            kind, text = "report", self.report
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+        return text
+
+    def _generation_time(self, text: str) -> float:
+        return count_tokens(text) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        text = self.reply(prompt)
+        time.sleep(self.latency + self._generation_time(text))
+        return text
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        text = self.reply(prompt)
+        await asyncio.sleep(self.latency + self._generation_time(text))
+        return text
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        text = self.reply(prompt)
+        time.sleep(self.latency)
+        for chunk in _chunks(text):
+            time.sleep(self._generation_time(chunk))
+            yield chunk
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        text = self.reply(prompt)
+        await asyncio.sleep(self.latency)
+        for chunk in _chunks(text):
+            await asyncio.sleep(self._generation_time(chunk))
+            yield chunk
+
+    def chat(self, messages: list, config: Dict[str, Any]) -> str:
+        return self.generate_text(messages[-1]["content"], config)
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        return await self.agenerate_text(messages[-1]["content"], config)
@@ -0,0 +1,88 @@
+"""本地网页夹具服务：在后台线程中提供固定的页面，供网页访问节点离线测试和基准使用"""
+import glob
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def load_pages(directory: str = CORPUS_DIR) -> Dict[str, bytes]:
+    """读取语料目录下的 .html 文件：文件名 -> 内容"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.delay:
+            time.sleep(server.delay)
+        name = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        body = server.pages.get(name)
+        if body is None:
+            self.send_response(404)
+            body = b"not found"
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """/pages/<文件名> 返回对应页面，其余路径返回 404；delay 为每个响应的延迟（秒）"""
+
+    def __init__(self, pages: Optional[Dict[str, bytes]] = None, delay: float = 0.0, host: str = "127.0.0.1"):
+        self.pages = load_pages() if pages is None else pages
+        self.delay = delay
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "FixtureServer":
+        server = ThreadingHTTPServer((self.host, 0), _FixtureHandler)
+        server.daemon_threads = True
+        server.pages = self.pages
+        server.delay = self.delay
+        server.lock = threading.Lock()
+        server.request_count = 0
+        threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+        self._server = server
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    @property
+    def request_count(self) -> int:
+        return self._server.request_count if self._server else 0
+
+    def urls(self) -> List[str]:
+        """所有页面的URL，按文件名排序"""
+        return [f"{self.base_url}/pages/{name}" for name in sorted(self.pages)]
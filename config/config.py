@@ -1,44 +1,141 @@
-import json
+import copy
+import logging
 import os
-import yaml 
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 环境变量覆盖：AGENT_CONFIG__LLM__OLLAMA__MODEL_NAME=mistral 对应 llm.ollama.model_name
+ENV_PREFIX = "AGENT_CONFIG__"
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# 订阅者: callback(config, changed_keys)，changed_keys 为发生变化的配置路径（如 "agent.cli.timeout"）
+Subscriber = Callable[["Config", List[str]], None]
+
+
+def _env_value(text: str) -> Any:
+    """按 YAML 解析环境变量的值（数字、布尔值、列表等），无法解析时保留字符串"""
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError:
+        return text
+
+
+def _set_path(data: Dict, keys: List[str], value: Any) -> None:
+    for key in keys[:-1]:
+        if not isinstance(data.get(key), dict):
+            data[key] = {}
+        data = data[key]
+    data[keys[-1]] = value
+
+
+def _merge(base: Dict, overlay: Dict) -> None:
+    """把 overlay 逐层合并到 base（原地修改）"""
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+
+
+def _diff(old: Any, new: Any, prefix: str = "") -> List[str]:
+    """两份配置之间发生变化的路径（到叶子节点或类型不同的节点为止）"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = []
+        for key in sorted(set(old) | set(new), key=str):
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if key not in old or key not in new:
+                changed.append(path)
+            else:
+                changed.extend(_diff(old[key], new[key], path))
+        return changed
+    return [] if old == new else [prefix]
+
 
 class Config:
+    """进程级单例配置
+
+    读取 config.yaml（不存在时读取 config.yaml.template），再叠加环境变量和 set_config 的修改。
+    加载时不写任何文件。配置变化时整体替换为新的字典，读取方拿到的总是某一个完整版本；
+    订阅者在变化后收到通知，可用 start_watching 轮询文件修改时间自动重新加载。
+    """
     _instance = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(Config, cls).__new__(cls)
-            cls._instance.config_data = {}
-            cls._instance._load_config()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(Config, cls).__new__(cls)
+                    instance._init(PROJECT_ROOT)
+                    cls._instance = instance
         return cls._instance
 
-    def _load_config(self):
-        config_dir = os.path.dirname(__file__)
-        project_root = os.path.dirname(os.path.dirname(__file__))
-        
-        config_path = os.path.join(project_root, 'config.yaml')
-        template_path = os.path.join(project_root, 'config.yaml.template')
-
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as file:
-                self.config_data = yaml.safe_load(file)
-        elif os.path.exists(template_path):
-            with open(template_path, 'r') as file:
-                self.config_data = yaml.safe_load(file)
+    def _init(self, root: str):
+        self.root = root
+        self.config_path = os.path.join(root, 'config.yaml')
+        self.template_path = os.path.join(root, 'config.yaml.template')
+        self._lock = threading.RLock()
+        # set_config 的修改，重新加载文件后仍然保留
+        self._overrides: Dict = {}
+        self._subscribers: List[Tuple[Any, bool]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        # 每次配置变化加一，供组件判断缓存的设置是否过期
+        self.version = 0
+        self._source = self._source_stamp()
+        self.config_data = self._load_config()
+
+    def _source_path(self) -> Optional[str]:
+        if os.path.exists(self.config_path):
+            return self.config_path
+        if os.path.exists(self.template_path):
+            return self.template_path
+        return None
+
+    def _source_stamp(self) -> Optional[Tuple[str, int, int]]:
+        """配置文件的 (路径, 修改时间, 大小)，用于发现文件变化"""
+        path = self._source_path()
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def _load_config(self) -> Dict:
+        """读取配置文件并叠加环境变量和 set_config 的修改，返回新的配置字典"""
+        path = self._source_path()
+        if path is not None:
+            with open(path, 'r', encoding='utf-8') as file:
+                config_data = yaml.safe_load(file) or {}
         else:
-            self._load_default_config()
+            config_data = self._default_config()
+
+        for name, value in os.environ.items():
+            if name.startswith(ENV_PREFIX) and len(name) > len(ENV_PREFIX):
+                keys = [key.lower() for key in name[len(ENV_PREFIX):].split('__')]
+                _set_path(config_data, keys, _env_value(value))
 
-        # Create config.yaml if it doesn't exist
-        if not os.path.exists(config_path):
-            self.save_config()
+        _merge(config_data, self._overrides)
+        return config_data
 
     def save_config(self):
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.yaml')
-        with open(config_path, 'w') as file:
-            yaml.safe_dump(self.config_data, file, default_flow_style=False)
+        """把当前配置写入 config.yaml（先写临时文件再替换）"""
+        tmp_path = self.config_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump(self.config_data, file, default_flow_style=False, allow_unicode=True)
+        os.replace(tmp_path, self.config_path)
 
-    def _load_default_config(self):
-        self.config_data = {
+    @staticmethod
+    def _default_config() -> Dict:
+        return {
             'llm': {
                 'client_type': 'ollama',
                 'ollama': {
@@ -51,14 +148,99 @@ class Config:
             }
         }
 
+    def reload(self) -> List[str]:
+        """重新读取配置文件，有变化时替换配置并通知订阅者；返回变化的配置路径
+
+        文件无法解析时保留当前配置。
+        """
+        with self._lock:
+            self._source = self._source_stamp()
+            try:
+                config_data = self._load_config()
+            except (OSError, yaml.YAMLError) as e:
+                logger.warning("Failed to reload configuration, keeping the current one: %s", e)
+                return []
+            changed = _diff(self.config_data, config_data)
+            if changed:
+                self._swap(config_data)
+        if changed:
+            self._notify(changed)
+        return changed
+
+    def _swap(self, config_data: Dict) -> None:
+        self.config_data = config_data
+        self.version += 1
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """订阅配置变化，返回取消订阅的函数
+
+        绑定方法只保存弱引用，对象被回收后自动取消订阅。
+        """
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            entry = (weakref.WeakMethod(callback), True)
+        else:
+            entry = (callback, False)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _notify(self, changed: List[str]) -> None:
+        with self._lock:
+            self._subscribers = [(ref, weak) for ref, weak in self._subscribers if not weak or ref() is not None]
+            callbacks = [ref() if weak else ref for ref, weak in self._subscribers]
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback(self, changed)
+            except Exception:
+                logger.exception("Configuration subscriber failed")
+
+    def start_watching(self, interval: Optional[float] = None) -> None:
+        """启动后台线程，按 interval 秒轮询配置文件的修改时间，变化时重新加载"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop_watching.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval or DEFAULT_WATCH_INTERVAL,), name="config-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_watching.wait(interval):
+            if self._source_stamp() != self._source:
+                self.reload()
+
     def set_config(self, key_path, value):
+        """修改一项配置：复制从根到该项路径上的字典后整体替换，不影响正在读取旧版本的线程"""
         keys = key_path.split('.')
-        current = self.config_data
-        for key in keys[:-1]:
-            if key not in current:
-                current[key] = {}
-            current = current[key]
-        current[keys[-1]] = value
+        with self._lock:
+            _set_path(self._overrides, keys, copy.deepcopy(value))
+            config_data = dict(self.config_data)
+            current = config_data
+            for key in keys[:-1]:
+                child = current.get(key)
+                current[key] = dict(child) if isinstance(child, dict) else {}
+                current = current[key]
+            changed = current.get(keys[-1], object()) != value
+            current[keys[-1]] = value
+            if changed:
+                self._swap(config_data)
+        if changed:
+            self._notify([key_path])
 
     def get_config(self, key_path):
         keys = key_path.split('.')
@@ -69,6 +251,12 @@ class Config:
             current = current[key]
         return current
 
+    def resolve_path(self, path):
+        """把配置中的相对路径解析为基于项目根目录的绝对路径"""
+        if not path or os.path.isabs(path):
+            return path
+        return os.path.join(self.root, path)
+
     def print_config(self):
         print(yaml.dump(self.config_data, default_flow_style=False))
 
@@ -77,4 +265,4 @@ if __name__ == '__main__':
     config = Config()
     config.set_config("llm_client_type", "ollama")
     config.set_config("ollama_model_name", "llama2")
-    config.print_config()
\ No newline at end of file
+    config.print_config()
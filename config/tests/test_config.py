@@ -1,3 +1,6 @@
+import gc
+import os
+import threading
 import pytest
 from config import Config
 
@@ -14,4 +17,105 @@ def test_nested_config(config):
     assert config.get_config('nested.key1.key2') == 'nested_value'
 
 def test_nonexistent_config(config):
-    assert config.get_config('nonexistent.key') is None
\ No newline at end of file
+    assert config.get_config('nonexistent.key') is None
+
+def _isolated(root):
+    """不经过单例，直接从指定目录加载的配置实例"""
+    instance = object.__new__(Config)
+    instance._init(str(root))
+    return instance
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    # 保证修改时间变化，避免依赖文件系统的时间精度
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_load_does_not_write_files(tmp_path):
+    _write(tmp_path / "config.yaml.template", "llm:\n  client_type: gemini\n")
+    config = _isolated(tmp_path)
+    assert config.get_config("llm.client_type") == "gemini"
+    assert os.listdir(tmp_path) == ["config.yaml.template"]
+
+def test_default_config_without_files(tmp_path):
+    assert _isolated(tmp_path).get_config("llm.ollama.model_name") == "llama2"
+
+def test_environment_overlay(tmp_path, monkeypatch):
+    _write(tmp_path / "config.yaml", "llm:\n  ollama:\n    model_name: llama2\nagent:\n  cli:\n    timeout: 30\n")
+    monkeypatch.setenv("AGENT_CONFIG__LLM__OLLAMA__MODEL_NAME", "mistral")
+    monkeypatch.setenv("AGENT_CONFIG__AGENT__CLI__TIMEOUT", "5")
+    monkeypatch.setenv("AGENT_CONFIG__AGENT__CLI__SAFE_COMMANDS", "[ls, echo]")
+    config = _isolated(tmp_path)
+    assert config.get_config("llm.ollama.model_name") == "mistral"
+    assert config.get_config("agent.cli.timeout") == 5
+    assert config.get_config("agent.cli.safe_commands") == ["ls", "echo"]
+
+def test_reload_swaps_config_and_notifies(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "llm:\n  ollama:\n    model_name: llama2\nagent:\n  cli:\n    timeout: 30\n")
+    config = _isolated(tmp_path)
+    config.set_config("agent.cli.max_concurrency", 2)
+    old_data, old_version = config.config_data, config.version
+    notifications = []
+    config.subscribe(lambda cfg, changed: notifications.append(changed))
+
+    _write(path, "llm:\n  ollama:\n    model_name: mistral\nagent:\n  cli:\n    timeout: 30\n")
+    assert config.reload() == ["llm.ollama.model_name"]
+    assert notifications == [["llm.ollama.model_name"]]
+    assert config.get_config("llm.ollama.model_name") == "mistral"
+    # 旧版本不被修改，读取方拿到的总是完整的某一版本
+    assert old_data["llm"]["ollama"]["model_name"] == "llama2"
+    assert config.version == old_version + 1
+    # set_config 的修改在重新加载后保留
+    assert config.get_config("agent.cli.max_concurrency") == 2
+    # 没有变化时不通知
+    assert config.reload() == []
+    assert len(notifications) == 1
+
+def test_invalid_file_keeps_current_config(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "llm:\n  client_type: ollama\n")
+    config = _isolated(tmp_path)
+    _write(path, "llm: [unclosed\n")
+    assert config.reload() == []
+    assert config.get_config("llm.client_type") == "ollama"
+
+def test_set_config_copies_on_write(tmp_path):
+    config = _isolated(tmp_path)
+    before = config.config_data
+    config.set_config("llm.ollama.model_name", "mistral")
+    assert before["llm"]["ollama"]["model_name"] == "llama2"
+    assert config.get_config("llm.ollama.model_name") == "mistral"
+    assert config.get_config("llm.gemini.model_name") == "gemini-pro"
+
+def test_watcher_reloads_changed_file(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "agent:\n  cli:\n    timeout: 30\n")
+    config = _isolated(tmp_path)
+    changed = threading.Event()
+    config.subscribe(lambda cfg, keys: changed.set())
+    config.start_watching(0.02)
+    try:
+        _write(path, "agent:\n  cli:\n    timeout: 10\n")
+        assert changed.wait(2)
+        assert config.get_config("agent.cli.timeout") == 10
+    finally:
+        config.stop_watching()
+
+def test_bound_method_subscribers_are_weak(tmp_path):
+    config = _isolated(tmp_path)
+
+    class Listener:
+        calls = 0
+
+        def on_change(self, cfg, changed):
+            Listener.calls += 1
+
+    listener = Listener()
+    config.subscribe(listener.on_change)
+    config.set_config("a.b", 1)
+    del listener
+    gc.collect()
+    config.set_config("a.b", 2)
+    assert Listener.calls == 1
+    assert config._subscribers == []
@@ -0,0 +1,248 @@
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+from llm.llm_client import BatchResult, LLMClient
+from llm.response_cache import ResponseCache
+
+class CachedLLMClient(LLMClient):
+    """
+    LLMClient wrapper that serves repeated requests from a ResponseCache.
+
+    Callers opt out per request by passing {"cache": False} in the config.
+    """
+
+    def __init__(self, client: LLMClient, cache: ResponseCache, backend: str):
+        """
+        Initializes CachedLLMClient.
+
+        Args:
+            client (LLMClient): The client that actually talks to the model.
+            cache (ResponseCache): The cache used for responses.
+            backend (str): The backend name used in cache keys (e.g. "ollama").
+        """
+        self.client = client
+        self.cache = cache
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> Any:
+        # 其余属性（model_name 等）交给被包装的客户端
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _split_config(self, config: Dict[str, Any]):
+        """Separates the cache switch from the generation parameters."""
+        config = dict(config or {})
+        use_cache = config.pop("cache", True)
+        return use_cache, config
+
+    def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        """
+        Generates text, returning the cached response when one exists.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+
+        Returns:
+            str: The generated text.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return self.client.generate_text(prompt, params)
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, prompt, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.client.generate_text(prompt, params)
+        self.cache.set(key, response)
+        return response
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams text; a cached response is yielded as a single chunk.
+
+        The response is stored only after the stream has been fully consumed.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            yield from self.client.stream_text(prompt, params)
+            return
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, prompt, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in self.client.stream_text(prompt, params):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
+
+    def chat(self, messages: list, config: Dict[str, Any]) -> str:
+        """
+        Chats with the model, returning the cached response when one exists.
+
+        Args:
+            messages (list): A list of messages in the chat session.
+            config (Dict[str, Any]): Chat parameters; "cache": False bypasses the cache.
+
+        Returns:
+            str: The response from the LLM.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return self.client.chat(messages, params)
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, {"chat": messages}, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.client.chat(messages, params)
+        self.cache.set(key, response)
+        return response
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously generates text, returning the cached response when one exists.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+
+        Returns:
+            str: The generated text.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return await self.client.agenerate_text(prompt, params)
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, prompt, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.client.agenerate_text(prompt, params)
+        self.cache.set(key, response)
+        return response
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Asynchronously streams text; a cached response is yielded as a single chunk.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            async for chunk in self.client.astream_text(prompt, params):
+                yield chunk
+            return
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, prompt, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for chunk in self.client.astream_text(prompt, params):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously chats with the model, returning the cached response when one exists.
+
+        Args:
+            messages (list): A list of messages in the chat session.
+            config (Dict[str, Any]): Chat parameters; "cache": False bypasses the cache.
+
+        Returns:
+            str: The response from the LLM.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return await self.client.achat(messages, params)
+
+        key = ResponseCache.make_key(self.backend, self.client.model_name, {"chat": messages}, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.client.achat(messages, params)
+        self.cache.set(key, response)
+        return response
+
+    def _batch_lookup(self, prompts: List[str], params: Dict[str, Any]) -> Tuple[List[Optional[BatchResult]], List[str]]:
+        """Returns the cached results (None for misses) and the cache keys of all prompts."""
+        keys = [ResponseCache.make_key(self.backend, self.client.model_name, prompt, params) for prompt in prompts]
+        return [self.cache.get(key) for key in keys], keys
+
+    def _batch_store(self, results: List[Optional[BatchResult]], keys: List[str],
+                     missing: List[int], responses: List[BatchResult]) -> List[BatchResult]:
+        """Fills the misses with the fresh responses and caches the successful ones."""
+        for index, response in zip(missing, responses):
+            results[index] = response
+            if not isinstance(response, Exception):
+                self.cache.set(keys[index], response)
+        return results
+
+    def generate_batch(self, prompts: List[str], config: Dict[str, Any],
+                       max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Generates text for many prompts; only the cache misses are sent to the model.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return self.client.generate_batch(prompts, params, max_concurrency)
+
+        results, keys = self._batch_lookup(prompts, params)
+        missing = [i for i, result in enumerate(results) if result is None]
+        responses = self.client.generate_batch([prompts[i] for i in missing], params, max_concurrency) if missing else []
+        return self._batch_store(results, keys, missing, responses)
+
+    async def agenerate_batch(self, prompts: List[str], config: Dict[str, Any],
+                              max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Asynchronously generates text for many prompts; only the cache misses are sent to the model.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Generation parameters; "cache": False bypasses the cache.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        use_cache, params = self._split_config(config)
+        if not use_cache:
+            return await self.client.agenerate_batch(prompts, params, max_concurrency)
+
+        results, keys = self._batch_lookup(prompts, params)
+        missing = [i for i, result in enumerate(results) if result is None]
+        responses = await self.client.agenerate_batch([prompts[i] for i in missing], params, max_concurrency) if missing else []
+        return self._batch_store(results, keys, missing, responses)
+
+    def warm_up(self) -> None:
+        self.client.warm_up()
+
+    def close(self) -> None:
+        self.client.close()
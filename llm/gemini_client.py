@@ -1,23 +1,45 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
-from llm.llm_client import LLMClient
+from llm.llm_client import BatchResult, LLMClient
 
 class GeminiClient(LLMClient):
     """
     LLM client for Google Gemini models.
     """
 
-    def __init__(self, model_name: str = "gemini-pro", api_key: str = None):
+    def __init__(self, model_name: str = "gemini-pro", api_key: str = None, max_concurrency: Optional[int] = None):
         """
         Initializes GeminiClient with the specified model name and API key.
 
         Args:
             model_name (str): The name of the Gemini model to use. Defaults to "gemini-pro".
             api_key (str): The API key for Google Gemini.
+            max_concurrency (Optional[int]): Maximum number of requests sent at the same time.
         """
         self.model_name = model_name
         self.api_key = api_key
         self.llm = ChatGoogleGenerativeAI(model=self.model_name, google_api_key=self.api_key)
+        self.set_max_concurrency(max_concurrency)
+
+    @classmethod
+    def from_config(cls, config) -> "GeminiClient":
+        """
+        Builds the client from `llm.gemini` and `llm.max_concurrency`.
+
+        Args:
+            config: An instance of the Config class.
+
+        Returns:
+            GeminiClient: The new client.
+
+        Raises:
+            ValueError: If no API key is configured.
+        """
+        api_key = config.get_config("llm.gemini.api_key")
+        if not api_key:
+            raise ValueError("API key is required for Gemini client.")
+        return cls(api_key=api_key, model_name=config.get_config("llm.gemini.model_name"),
+                   max_concurrency=config.get_config("llm.max_concurrency"))
 
     def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
         """
@@ -30,7 +52,101 @@ class GeminiClient(LLMClient):
         Returns:
             str: The generated text from Gemini.
         """
-        return self.llm.predict(prompt)
+        with self.request_slot():
+            return self.llm.predict(prompt)
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams text from Gemini as chunks arrive.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        with self.request_slot():
+            for chunk in self.llm.stream(prompt):
+                if chunk.text:
+                    yield chunk.text
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously generates text using Gemini's async API.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Returns:
+            str: The generated text from Gemini.
+        """
+        async with self.async_request_slot():
+            return (await self.llm.ainvoke(prompt)).text
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Asynchronously streams text from Gemini as chunks arrive.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        async with self.async_request_slot():
+            async for chunk in self.llm.astream(prompt):
+                if chunk.text:
+                    yield chunk.text
+
+    def generate_batch(self, prompts: List[str], config: Dict[str, Any],
+                       max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Generates text for many prompts through the model's batch path.
+
+        Requests run concurrently, bounded by max_concurrency (or the client's limit).
+        A failing prompt yields its exception without affecting the others.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters applied to every prompt.
+            max_concurrency (Optional[int]): Maximum number of requests sent at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+        responses = self.llm.batch(
+            prompts,
+            config={"max_concurrency": self._batch_concurrency(max_concurrency, len(prompts))},
+            return_exceptions=True,
+        )
+        return [r if isinstance(r, Exception) else r.text for r in responses]
+
+    async def agenerate_batch(self, prompts: List[str], config: Dict[str, Any],
+                              max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Asynchronously generates text for many prompts through the model's batch path.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters applied to every prompt.
+            max_concurrency (Optional[int]): Maximum number of requests sent at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+        responses = await self.llm.abatch(
+            prompts,
+            config={"max_concurrency": self._batch_concurrency(max_concurrency, len(prompts))},
+            return_exceptions=True,
+        )
+        return [r if isinstance(r, Exception) else r.text for r in responses]
 
     def chat(self, messages: list, config: Dict[str, Any]) -> str:
         """
@@ -44,4 +160,20 @@ class GeminiClient(LLMClient):
             str: The response from Gemini.
         """
         formatted_messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
-        return self.llm.predict_messages(formatted_messages).content
+        with self.request_slot():
+            return self.llm.predict_messages(formatted_messages).content
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously chats with Gemini.
+
+        Args:
+            messages (list): A list of messages in the chat session.
+            config (Dict[str, Any]): Configuration parameters for the chat session.
+
+        Returns:
+            str: The response from Gemini.
+        """
+        formatted_messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        async with self.async_request_slot():
+            return (await self.llm.ainvoke(formatted_messages)).content
@@ -1,11 +1,132 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Deque, Dict, Any, AsyncIterator, Iterator, List, Optional, Union
+
+# Default number of batch items processed at the same time when neither the
+# call nor the client sets a limit.
+DEFAULT_BATCH_CONCURRENCY = 4
+
+# One batch item: the generated text, or the exception raised for that prompt.
+BatchResult = Union[str, Exception]
+
+# 保护各客户端的进行中请求数和关闭状态
+_lifecycle_lock = threading.Lock()
+
+class _Waiter:
+    """A caller queued for a RequestLimiter slot."""
+
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+        self.granted = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class RequestLimiter:
+    """
+    Concurrency budget shared by sync and async callers in every thread and event loop.
+
+    Released slots are handed to the waiters in FIFO order, so a limit of N
+    means at most N requests in flight no matter how they are issued.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters: Deque[_Waiter] = deque()
+
+    def _try_acquire(self) -> bool:
+        # 调用方持有锁；有等待者时名额都被占用，新来的调用方排队
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            return True
+        return False
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Takes a slot, blocking the calling thread until one is free.
+
+        Args:
+            blocking (bool): When False, return immediately if no slot is free.
+
+        Returns:
+            bool: Whether a slot was taken.
+        """
+        event = threading.Event()
+        with self._lock:
+            if self._try_acquire():
+                return True
+            if not blocking:
+                return False
+            self._waiters.append(_Waiter(event.set))
+        event.wait()
+        return True
+
+    async def acquire_async(self) -> None:
+        """
+        Takes a slot without blocking the event loop.
+
+        A caller cancelled while waiting gives up its place, or passes on the
+        slot if it was already handed over.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = _Waiter(lambda: loop.call_soon_threadsafe(_resolve, future))
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """
+        Returns a slot, handing it to the longest waiting caller if there is one.
+        """
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                try:
+                    waiter.wake()
+                    return
+                except RuntimeError:
+                    # 等待方的事件循环已关闭，名额交给下一个等待者
+                    continue
+            if self._in_use <= 0:
+                raise ValueError("RequestLimiter released too many times")
+            self._in_use -= 1
+
 
 class LLMClient(ABC):
     """
     Abstract base class for LLM clients.
     """
 
+    _request_limiter: Optional[RequestLimiter] = None
+    _max_concurrency: Optional[int] = None
+    _in_flight = 0
+    _closing = False
+    _released = False
+
     @abstractmethod
     def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
         """
@@ -33,3 +154,262 @@ class LLMClient(ABC):
             str: The response from the LLM.
         """
         pass
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generates text and yields it in chunks as the model produces them.
+
+        The default implementation yields the whole generate_text result at once;
+        backends that support streaming override it.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        yield self.generate_text(prompt, config)
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously generates text based on the given prompt and configuration.
+
+        The default implementation runs generate_text in a worker thread;
+        backends with a native async API override it.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Returns:
+            str: The generated text.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, config)
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously chats with the LLM.
+
+        The default implementation runs chat in a worker thread.
+
+        Args:
+            messages (list): A list of messages in the chat session.
+            config (Dict[str, Any]): Configuration parameters for the chat session.
+
+        Returns:
+            str: The response from the LLM.
+        """
+        return await asyncio.to_thread(self.chat, messages, config)
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Asynchronously generates text and yields it in chunks.
+
+        The default implementation yields the whole agenerate_text result at once.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        yield await self.agenerate_text(prompt, config)
+
+    def _batch_concurrency(self, max_concurrency: Optional[int], size: int) -> int:
+        """Resolves the pool size for a batch of the given size."""
+        limit = max_concurrency or self._max_concurrency or DEFAULT_BATCH_CONCURRENCY
+        return max(1, min(limit, size))
+
+    def generate_batch(self, prompts: List[str], config: Dict[str, Any],
+                       max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Generates text for many independent prompts.
+
+        The default implementation runs generate_text on a bounded thread pool.
+        A failing prompt does not affect the others: its slot in the result holds
+        the exception instead of the text.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters applied to every prompt.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+                Defaults to the client's max_concurrency.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+
+        def _generate(prompt: str) -> BatchResult:
+            try:
+                return self.generate_text(prompt, config)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self._batch_concurrency(max_concurrency, len(prompts))) as pool:
+            return list(pool.map(_generate, prompts))
+
+    async def agenerate_batch(self, prompts: List[str], config: Dict[str, Any],
+                              max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Asynchronously generates text for many independent prompts.
+
+        The default implementation runs agenerate_text concurrently, at most
+        max_concurrency prompts at a time, with per-item error isolation.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters applied to every prompt.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+                Defaults to the client's max_concurrency.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+        semaphore = asyncio.Semaphore(self._batch_concurrency(max_concurrency, len(prompts)))
+
+        async def _generate(prompt: str) -> BatchResult:
+            async with semaphore:
+                try:
+                    return await self.agenerate_text(prompt, config)
+                except Exception as e:
+                    return e
+
+        return list(await asyncio.gather(*(_generate(prompt) for prompt in prompts)))
+
+    @classmethod
+    def from_config(cls, config) -> "LLMClient":
+        """
+        Builds the client from the `llm` section of the configuration.
+
+        Backends registered in llm.llm_factory are created through this method.
+        The default implementation passes the keys of the `llm.<client_type>`
+        section to the constructor as keyword arguments, so a backend whose
+        constructor accepts those keys does not need to override it, and then
+        applies `llm.max_concurrency`.
+
+        Args:
+            config: An instance of the Config class.
+
+        Returns:
+            LLMClient: The new client.
+
+        Raises:
+            TypeError: If the constructor does not accept the keys of the section.
+        """
+        section = config.get_config(f"llm.{config.get_config('llm.client_type')}") or {}
+        if not isinstance(section, dict):
+            raise TypeError(f"llm.{config.get_config('llm.client_type')} must be a mapping of "
+                            f"{cls.__name__} constructor arguments")
+        client = cls(**section)
+        client.set_max_concurrency(config.get_config("llm.max_concurrency"))
+        return client
+
+    def warm_up(self) -> None:
+        """
+        Prepares the backend before the first real request (e.g. loads the model).
+
+        The default implementation does nothing.
+        """
+        pass
+
+    def set_max_concurrency(self, max_concurrency: Optional[int]) -> None:
+        """
+        Limits the number of requests this client sends at the same time.
+
+        Args:
+            max_concurrency (Optional[int]): Maximum number of in-flight requests.
+                None or a value below 1 removes the limit.
+        """
+        if max_concurrency and max_concurrency > 0:
+            self._max_concurrency = max_concurrency
+            self._request_limiter = RequestLimiter(max_concurrency)
+        else:
+            self._max_concurrency = None
+            self._request_limiter = None
+
+    def close(self) -> None:
+        """
+        Releases the client's connections once its in-flight requests have finished.
+
+        Requests still running when close is called complete normally; the last
+        one to finish releases the resources. Safe to call more than once.
+        """
+        with _lifecycle_lock:
+            self._closing = True
+            idle = self._in_flight == 0
+        if idle:
+            self._release()
+
+    def release_resources(self) -> None:
+        """
+        Closes connection pools and other handles. Called once by close.
+
+        The default implementation does nothing; backends holding connections override it.
+        """
+        pass
+
+    def _release(self) -> None:
+        with _lifecycle_lock:
+            if self._released:
+                return
+            self._released = True
+        self.release_resources()
+
+    def _enter_request(self) -> None:
+        with _lifecycle_lock:
+            self._in_flight += 1
+
+    def _exit_request(self) -> None:
+        with _lifecycle_lock:
+            self._in_flight -= 1
+            idle = self._closing and self._in_flight == 0
+        if idle:
+            self._release()
+
+    @contextmanager
+    def request_slot(self) -> Iterator[None]:
+        """
+        Context manager that holds one concurrency slot for the duration of a request.
+
+        While the slot is held the client is not closed under the request.
+        """
+        limiter = self._request_limiter
+        self._enter_request()
+        try:
+            if limiter is None:
+                yield
+                return
+            limiter.acquire()
+            try:
+                yield
+            finally:
+                limiter.release()
+        finally:
+            self._exit_request()
+
+    @asynccontextmanager
+    async def async_request_slot(self) -> AsyncIterator[None]:
+        """
+        Async context manager that holds one concurrency slot without blocking the event loop.
+
+        Sync and async requests draw from the same budget, in every thread and event loop.
+        """
+        limiter = self._request_limiter
+        self._enter_request()
+        try:
+            if limiter is None:
+                yield
+                return
+            await limiter.acquire_async()
+            try:
+                yield
+            finally:
+                limiter.release()
+        finally:
+            self._exit_request()
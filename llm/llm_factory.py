@@ -1,12 +1,96 @@
-from typing import Dict, Any
+import importlib
+import json
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Tuple, Type, Union
 from llm.llm_client import LLMClient
-from llm.ollama_client import OllamaClient
-from llm.gemini_client import GeminiClient
+from llm.cached_client import CachedLLMClient
+from llm.metrics_client import MetricsLLMClient
+from llm.response_cache import ResponseCache
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# 后端注册表: client_type -> 客户端类或 "模块:类" 路径，路径在首次使用时才导入
+BACKENDS: Dict[str, Union[str, Type[LLMClient]]] = {
+    "ollama": "llm.ollama_client:OllamaClient",
+    "gemini": "llm.gemini_client:GeminiClient",
+}
+# 第三方包通过该入口点组提供其他后端
+BACKEND_ENTRY_POINT_GROUP = "agent.llm_backends"
+_backend_classes: Dict[str, Type[LLMClient]] = {}
+
+# 进程级共享客户端注册表: llm 配置 -> 客户端实例；配置变化后只保留当前配置的客户端
+_client_registry: Dict[str, LLMClient] = {}
+_registry_lock = threading.Lock()
+# 最近一次计算的注册表键: (配置版本, 键)
+_last_key: Tuple[Optional[int], str] = (None, "")
+# 响应缓存按配置共享，同一个磁盘文件只打开一次
+_response_caches: Dict[str, ResponseCache] = {}
+
+def register_backend(name: str, backend: Union[str, Type[LLMClient]]) -> None:
+    """
+    Registers an LLM backend under a `llm.client_type` name.
+
+    Args:
+        name (str): The client type name used in the configuration.
+        backend (Union[str, Type[LLMClient]]): The client class, or a "module:Class" path
+            that is imported the first time the backend is used.
+    """
+    with _registry_lock:
+        BACKENDS[name] = backend
+        _backend_classes.pop(name, None)
+
+def _import_backend(path: str) -> Type[LLMClient]:
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"Invalid backend path: {path}. Expected 'module:Class'.")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def _entry_point(name: str):
+    return next(iter(entry_points(group=BACKEND_ENTRY_POINT_GROUP, name=name)), None)
+
+def load_backend(client_type: str) -> Type[LLMClient]:
+    """
+    Resolves a client type to its client class, importing only that backend.
+
+    Built-in and registered backends are looked up first, then the
+    `agent.llm_backends` entry points of installed packages. A client type
+    containing ":" is imported directly as a "module:Class" path.
+
+    Args:
+        client_type (str): The `llm.client_type` value.
+
+    Returns:
+        Type[LLMClient]: The client class.
+
+    Raises:
+        ValueError: If no backend is known under this name.
+    """
+    backend_class = _backend_classes.get(client_type)
+    if backend_class is not None:
+        return backend_class
+
+    backend = BACKENDS.get(client_type)
+    if backend is None and ":" in client_type:
+        backend = client_type
+    if backend is None:
+        entry_point = _entry_point(client_type)
+        if entry_point is None:
+            raise ValueError(f"Invalid client type: {client_type}. "
+                             f"Supported types are {', '.join(repr(name) for name in BACKENDS)}.")
+        backend = entry_point.value
+    backend_class = _import_backend(backend) if isinstance(backend, str) else backend
+    _backend_classes[client_type] = backend_class
+    return backend_class
 
 def create_llm_client(config) -> LLMClient:
     """
     Factory method to create LLM clients based on the given configuration.
 
+    Only the module of the selected backend is imported.
+
     Args:
         config: An instance of the Config class containing the LLM configuration.
 
@@ -17,20 +101,140 @@ def create_llm_client(config) -> LLMClient:
         ValueError: If client_type is not provided or an invalid client type is specified.
     """
     client_type = config.get_config("llm.client_type")
-    print(f"Client type: {client_type}")  # 调试输出
 
     if not client_type:
         raise ValueError("Configuration must contain 'llm.client_type' to specify the LLM client.")
 
-    if client_type == "ollama":
-        model_name = config.get_config("llm.ollama.model_name")
-        return OllamaClient(model_name=model_name)
-    elif client_type == "gemini":
-        api_key = config.get_config("llm.gemini.api_key")
-        print(f"API key: {api_key}")  # 调试输出
-        model_name = config.get_config("llm.gemini.model_name")
-        if not api_key:
-            raise ValueError("API key is required for Gemini client.")
-        return GeminiClient(api_key=api_key, model_name=model_name)
-    else:
-        raise ValueError(f"Invalid client type: {client_type}. Supported types are 'ollama', 'gemini'.")
+    return load_backend(client_type).from_config(config)
+
+def _registry_key(config) -> str:
+    """
+    Builds the registry key from the whole `llm` section and the metrics switch, so any change yields a new client.
+
+    The key is recomputed only when the configuration version changes, which keeps
+    the per-call lookup done by the graph nodes cheap.
+    """
+    global _last_key
+    version = getattr(config, "version", None)
+    cached_version, key = _last_key
+    if version is None or version != cached_version:
+        key = json.dumps([config.get_config("llm") or {}, bool(config.get_config("metrics.enabled"))],
+                         sort_keys=True, default=str)
+        if version is not None:
+            _last_key = (version, key)
+    return key
+
+def get_response_cache(config) -> ResponseCache:
+    """
+    Returns the shared response cache described by the `llm.cache` section.
+
+    Args:
+        config: An instance of the Config class.
+
+    Returns:
+        ResponseCache: The shared cache; relative paths are resolved against the project root.
+    """
+    cache_config = config.get_config("llm.cache") or {}
+    path = config.resolve_path(cache_config.get("path"))
+    key = json.dumps([path, cache_config], sort_keys=True, default=str)
+    cache = _response_caches.get(key)
+    if cache is None:
+        # 缓存配置变化后不再保留旧缓存，仍在使用它的客户端释放后数据库连接随之关闭
+        _response_caches.clear()
+        cache = ResponseCache(
+            memory_entries=cache_config.get("memory_entries", 256),
+            path=path,
+            disk_entries=cache_config.get("disk_entries", 10000),
+            ttl=cache_config.get("ttl"),
+        )
+        _response_caches[key] = cache
+    return cache
+
+def _install(key: str, client: LLMClient) -> List[LLMClient]:
+    """Makes the client the only shared client and returns the ones it replaces; the caller holds the lock."""
+    replaced = [old for old_key, old in _client_registry.items() if old_key != key and old is not client]
+    _client_registry.clear()
+    _client_registry[key] = client
+    return replaced
+
+def _close_replaced(clients: List[LLMClient]) -> None:
+    """Closes clients built for an outdated configuration; their in-flight requests finish first."""
+    for client in clients:
+        close = getattr(client, "close", None)
+        if not callable(close):
+            continue
+        try:
+            close()
+        except Exception as e:
+            logger.warning("Failed to close replaced LLM client: %s", e)
+
+def get_llm_client(config) -> LLMClient:
+    """
+    Returns the process-wide shared LLM client for the given configuration.
+
+    The client is created on first use and reused by every node and every graph
+    afterwards, so its connection pool and concurrency limit are shared as well.
+    When `llm.warm_up` is enabled, the backend is warmed up once at creation.
+    When `llm.cache.enabled` is set, the client is wrapped in a CachedLLMClient.
+    When `metrics.enabled` is set, the outermost wrapper is a MetricsLLMClient, so
+    cache hits are measured too and the cache statistics are exported.
+    When the `llm` section changes, the client built for the old configuration
+    is dropped and closed once its in-flight requests have finished.
+
+    Args:
+        config: An instance of the Config class containing the LLM configuration.
+
+    Returns:
+        LLMClient: The shared LLMClient instance.
+
+    Raises:
+        ValueError: If the configuration is invalid (see create_llm_client).
+    """
+    key = _registry_key(config)
+    client = _client_registry.get(key)
+    if client is not None:
+        return client
+
+    replaced = []
+    with _registry_lock:
+        client = _client_registry.get(key)
+        if client is None:
+            client = create_llm_client(config)
+            if config.get_config("llm.warm_up"):
+                try:
+                    client.warm_up()
+                except Exception as e:
+                    logger.warning("LLM warm-up failed: %s", e)
+            if config.get_config("llm.cache.enabled"):
+                client = CachedLLMClient(client, get_response_cache(config), config.get_config("llm.client_type"))
+            registry = get_metrics(config)
+            if registry is not None:
+                if isinstance(client, CachedLLMClient):
+                    registry.register_collector("llm_response_cache", client.cache.stats)
+                client = MetricsLLMClient(client, registry)
+            replaced = _install(key, client)
+    _close_replaced(replaced)
+    return client
+
+def register_llm_client(config, client: LLMClient) -> None:
+    """
+    Installs a pre-built client as the shared client for the given configuration.
+
+    Benchmarks and tests use this to run the graph against a fake backend; the
+    client is used as is, without the cache or metrics wrappers.
+
+    Args:
+        config: An instance of the Config class.
+        client (LLMClient): The client returned by get_llm_client from now on.
+    """
+    with _registry_lock:
+        replaced = _install(_registry_key(config), client)
+    _close_replaced(replaced)
+
+def clear_llm_clients() -> None:
+    """
+    Drops all shared clients, so the next get_llm_client call builds a new one.
+    """
+    with _registry_lock:
+        _client_registry.clear()
+        _response_caches.clear()
@@ -0,0 +1,185 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional
+from llm.llm_client import BatchResult, LLMClient
+from llm.tokens import count_tokens
+from metrics import (
+    LLM_COMPLETION_TOKENS, LLM_DURATION, LLM_FIRST_TOKEN, LLM_IN_FLIGHT,
+    LLM_PROMPT_TOKENS, LLM_REQUESTS, MetricsRegistry,
+)
+
+class MetricsLLMClient(LLMClient):
+    """
+    LLMClient wrapper that records latency, token and outcome metrics for every call.
+
+    Token counts are estimated from the prompt and response text, since the
+    backends only return plain strings.
+    """
+
+    def __init__(self, client: LLMClient, registry: MetricsRegistry,
+                 token_counter: Callable[[str], int] = count_tokens):
+        """
+        Initializes MetricsLLMClient.
+
+        Args:
+            client (LLMClient): The wrapped client (possibly a CachedLLMClient).
+            registry (MetricsRegistry): Where the metrics are recorded.
+            token_counter (Callable[[str], int]): Estimates the token count of a text.
+        """
+        self.client = client
+        self.registry = registry
+        self.count_tokens = token_counter
+
+    def __getattr__(self, name: str) -> Any:
+        # 其余属性（model_name、cache 等）交给被包装的客户端
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _prompt_tokens(self, prompt: Any) -> int:
+        if isinstance(prompt, str):
+            return self.count_tokens(prompt)
+        # 对话消息列表
+        return sum(self.count_tokens(str(m.get("content", "")) if isinstance(m, dict) else str(m)) for m in prompt)
+
+    def _record(self, method: str, prompt: Any, response: Optional[str], outcome: str) -> None:
+        """Counts one prompt; response holds whatever text was received (None if nothing)."""
+        registry = self.registry
+        registry.inc(LLM_REQUESTS, method=method, outcome=outcome)
+        registry.inc(LLM_PROMPT_TOKENS, self._prompt_tokens(prompt), method=method)
+        if response is not None:
+            registry.inc(LLM_COMPLETION_TOKENS, self.count_tokens(response), method=method)
+
+    @contextmanager
+    def _call(self, method: str, prompt: Any):
+        """
+        Times one call; the caller appends the response (or each streamed chunk) to the yielded list.
+
+        The outcome is "ok", "error" for an exception from the backend, or
+        "cancelled" when the caller stops early (a closed stream or a cancelled task).
+        """
+        response: List[str] = []
+        outcome = "ok"
+        with self.registry.track(LLM_DURATION, LLM_IN_FLIGHT, method=method):
+            try:
+                yield response
+            except Exception:
+                outcome = "error"
+                raise
+            except BaseException:
+                # GeneratorExit（消费方提前停止读取流）、CancelledError 等
+                outcome = "cancelled"
+                raise
+            finally:
+                self._record(method, prompt, "".join(response) if response else None, outcome)
+
+    def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        with self._call("generate", prompt) as response:
+            response.append(self.client.generate_text(prompt, config))
+        return response[0]
+
+    def chat(self, messages: list, config: Dict[str, Any]) -> str:
+        with self._call("chat", messages) as response:
+            response.append(self.client.chat(messages, config))
+        return response[0]
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        with self._call("generate", prompt) as response:
+            response.append(await self.client.agenerate_text(prompt, config))
+        return response[0]
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        with self._call("chat", messages) as response:
+            response.append(await self.client.achat(messages, config))
+        return response[0]
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams text, recording the time to the first chunk and the total stream time.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        start = time.perf_counter()
+        with self._call("stream", prompt) as chunks:
+            for chunk in self.client.stream_text(prompt, config):
+                if not chunks:
+                    self.registry.observe(LLM_FIRST_TOKEN, time.perf_counter() - start, method="stream")
+                chunks.append(chunk)
+                yield chunk
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Asynchronously streams text, recording the time to the first chunk and the total stream time.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        start = time.perf_counter()
+        with self._call("stream", prompt) as chunks:
+            async for chunk in self.client.astream_text(prompt, config):
+                if not chunks:
+                    self.registry.observe(LLM_FIRST_TOKEN, time.perf_counter() - start, method="stream")
+                chunks.append(chunk)
+                yield chunk
+
+    def _record_batch(self, prompts: List[str], results: List[BatchResult]) -> None:
+        for prompt, result in zip(prompts, results):
+            if isinstance(result, Exception):
+                self._record("batch", prompt, None, "error")
+            else:
+                self._record("batch", prompt, result, "ok")
+
+    def generate_batch(self, prompts: List[str], config: Dict[str, Any],
+                       max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Generates text for many prompts; the whole batch is timed as one call and every prompt is counted.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+        with self.registry.track(LLM_DURATION, LLM_IN_FLIGHT, method="batch"):
+            results = self.client.generate_batch(prompts, config, max_concurrency)
+        self._record_batch(prompts, results)
+        return results
+
+    async def agenerate_batch(self, prompts: List[str], config: Dict[str, Any],
+                              max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Asynchronously generates text for many prompts; see generate_batch.
+
+        Args:
+            prompts (List[str]): The input prompts.
+            config (Dict[str, Any]): Configuration parameters for text generation.
+            max_concurrency (Optional[int]): Maximum number of prompts processed at the same time.
+
+        Returns:
+            List[BatchResult]: One result per prompt, in the same order as the prompts.
+        """
+        if not prompts:
+            return []
+        with self.registry.track(LLM_DURATION, LLM_IN_FLIGHT, method="batch"):
+            results = await self.client.agenerate_batch(prompts, config, max_concurrency)
+        self._record_batch(prompts, results)
+        return results
+
+    def warm_up(self) -> None:
+        self.client.warm_up()
+
+    def close(self) -> None:
+        self.client.close()
@@ -1,21 +1,71 @@
-from typing import Dict, Any
+import asyncio
+import logging
+from typing import Dict, Any, AsyncIterator, Iterator, Optional, Union
+import httpx
 from langchain_ollama import OllamaLLM
 from llm.llm_client import LLMClient
 
+logger = logging.getLogger(__name__)
+
 class OllamaClient(LLMClient):
     """
     LLM client for Ollama models.
     """
 
-    def __init__(self, model_name: str = "llama2"):
+    def __init__(
+        self,
+        model_name: str = "llama2",
+        base_url: Optional[str] = None,
+        keep_alive: Optional[Union[int, str]] = None,
+        pool: Optional[Dict[str, Any]] = None,
+        max_concurrency: Optional[int] = None,
+    ):
         """
         Initializes OllamaClient with the specified model name.
 
         Args:
             model_name (str): The name of the Ollama model to use. Defaults to "llama2".
+            base_url (Optional[str]): Address of the Ollama server. Defaults to the Ollama default.
+            keep_alive (Optional[Union[int, str]]): How long Ollama keeps the model loaded after a request.
+            pool (Optional[Dict[str, Any]]): Keep-alive connection pool settings
+                (max_connections, max_keepalive_connections, keepalive_expiry).
+            max_concurrency (Optional[int]): Maximum number of requests sent at the same time.
         """
         self.model_name = model_name
-        self.llm = OllamaLLM(model=self.model_name)
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        pool = pool or {}
+        limits = httpx.Limits(
+            max_connections=pool.get("max_connections", 10),
+            max_keepalive_connections=pool.get("max_keepalive_connections", 5),
+            keepalive_expiry=pool.get("keepalive_expiry", 60),
+        )
+        self.llm = OllamaLLM(
+            model=self.model_name,
+            base_url=self.base_url,
+            keep_alive=self.keep_alive,
+            client_kwargs={"limits": limits},
+        )
+        self.set_max_concurrency(max_concurrency)
+
+    @classmethod
+    def from_config(cls, config) -> "OllamaClient":
+        """
+        Builds the client from `llm.ollama`, `llm.pool` and `llm.max_concurrency`.
+
+        Args:
+            config: An instance of the Config class.
+
+        Returns:
+            OllamaClient: The new client.
+        """
+        return cls(
+            model_name=config.get_config("llm.ollama.model_name"),
+            base_url=config.get_config("llm.ollama.base_url"),
+            keep_alive=config.get_config("llm.ollama.keep_alive"),
+            pool=config.get_config("llm.pool"),
+            max_concurrency=config.get_config("llm.max_concurrency"),
+        )
 
     def generate_text(self, prompt: str, config: Dict[str, Any]) -> str:
         """
@@ -28,7 +78,54 @@ class OllamaClient(LLMClient):
         Returns:
             str: The generated text from Ollama.
         """
-        return self.llm.invoke(prompt)
+        with self.request_slot():
+            return self.llm.invoke(prompt)
+
+    def stream_text(self, prompt: str, config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streams text from Ollama token by token.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation (not used for Ollama).
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        with self.request_slot():
+            for chunk in self.llm.stream(prompt):
+                if chunk:
+                    yield chunk
+
+    async def agenerate_text(self, prompt: str, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously generates text using Ollama's async client.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation (not used for Ollama).
+
+        Returns:
+            str: The generated text from Ollama.
+        """
+        async with self.async_request_slot():
+            return await self.llm.ainvoke(prompt)
+
+    async def astream_text(self, prompt: str, config: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Asynchronously streams text from Ollama token by token.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            config (Dict[str, Any]): Configuration parameters for text generation (not used for Ollama).
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        async with self.async_request_slot():
+            async for chunk in self.llm.astream(prompt):
+                if chunk:
+                    yield chunk
 
     def chat(self, messages: list, config: Dict[str, Any]) -> str:
         """
@@ -43,3 +140,40 @@ class OllamaClient(LLMClient):
         """
         prompt = messages[-1]['content'] if messages else ""
         return self.generate_text(prompt, config)
+
+    async def achat(self, messages: list, config: Dict[str, Any]) -> str:
+        """
+        Asynchronously chats with Ollama (only the last message is used as prompt).
+
+        Args:
+            messages (list): A list of messages in the chat session.
+            config (Dict[str, Any]): Configuration parameters for the chat session (not used for Ollama).
+
+        Returns:
+            str: The response from Ollama.
+        """
+        prompt = messages[-1]['content'] if messages else ""
+        return await self.agenerate_text(prompt, config)
+
+    def warm_up(self) -> None:
+        """
+        Preloads the model into Ollama memory. An empty prompt only loads the model.
+        """
+        with self.request_slot():
+            self.llm.invoke("")
+
+    def release_resources(self) -> None:
+        """
+        Closes the connection pools of the underlying sync and async Ollama clients.
+        """
+        self.llm._client.close()
+        async_close = self.llm._async_client.close()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                asyncio.run(async_close)
+            except Exception as e:
+                logger.debug("Failed to close the async Ollama client: %s", e)
+        else:
+            loop.create_task(async_close)
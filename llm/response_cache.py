@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses: an in-memory LRU in front of an on-disk SQLite store.
+
+    Both tiers evict by TTL and by size (least recently used entries go first).
+    """
+
+    # 每写入多少次清理一次磁盘层
+    PRUNE_INTERVAL = 64
+
+    def __init__(
+        self,
+        memory_entries: int = 256,
+        path: Optional[str] = None,
+        disk_entries: int = 10000,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Initializes the cache.
+
+        Args:
+            memory_entries (int): Maximum number of entries kept in memory.
+            path (Optional[str]): SQLite file for the disk tier. None disables the disk tier.
+            disk_entries (int): Maximum number of entries kept on disk.
+            ttl (Optional[float]): Entry lifetime in seconds. None keeps entries until evicted by size.
+        """
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+        # 磁盘命中只在内存中记录访问时间，下一次写入时再批量更新，读取不提交事务
+        self._accessed: Dict[str, float] = {}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(backend: str, model: str, prompt: Any, params: Dict[str, Any]) -> str:
+        """
+        Builds a cache key from the backend, model, prompt and generation parameters.
+
+        Args:
+            backend (str): The LLM backend (e.g. "ollama").
+            model (str): The model name.
+            prompt (Any): The prompt string or chat messages.
+            params (Dict[str, Any]): Generation parameters.
+
+        Returns:
+            str: A stable hex digest.
+        """
+        payload = json.dumps([backend, model, prompt, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a response, checking memory first and then disk.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._accessed[key] = now
+                        self._remember(key, value, expires_at)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._accessed.pop(key, None)
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores a response in both tiers.
+
+        Args:
+            key (str): The cache key.
+            value (str): The response to store.
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._accessed.pop(key, None)
+                self._flush_access()
+                self._db.commit()
+                self._writes += 1
+                if self._writes % self.PRUNE_INTERVAL == 0:
+                    self._prune_disk(now)
+
+    def _remember(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        """Puts an entry in the memory tier and evicts the least recently used ones."""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _flush_access(self) -> None:
+        """Writes the access times recorded by disk hits; the caller commits."""
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _prune_disk(self, now: float) -> None:
+        """Drops expired entries and trims the disk tier to its size limit."""
+        self._flush_access()
+        self._db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        cursor = self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.disk_entries,),
+        )
+        self._stats["evictions"] += max(cursor.rowcount, 0)
+        self._db.commit()
+
+    def prune(self) -> None:
+        """
+        Applies TTL and size eviction to the disk tier right away.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._prune_disk(time.time())
+
+    def clear(self) -> None:
+        """
+        Removes all entries from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._accessed.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters.
+
+        Returns:
+            Dict[str, Any]: Counters plus the current hit rate and memory size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_size"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
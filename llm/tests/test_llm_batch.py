@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from llm.cached_client import CachedLLMClient
+from llm.gemini_client import GeminiClient
+from llm.llm_client import LLMClient
+from llm.response_cache import ResponseCache
+
+class SlowClient(LLMClient):
+    """按提示词长度延迟返回；提示词为 "boom" 时抛出异常，并记录同时进行的请求数"""
+    model_name = "slow"
+
+    def __init__(self, max_concurrency=None):
+        self.set_max_concurrency(max_concurrency)
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def _enter(self, prompt):
+        with self.lock:
+            self.calls.append(prompt)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def generate_text(self, prompt, config):
+        self._enter(prompt)
+        try:
+            time.sleep(0.05 / len(prompt))
+            if prompt == "boom":
+                raise RuntimeError("failed")
+            return prompt.upper()
+        finally:
+            self._exit()
+
+    async def agenerate_text(self, prompt, config):
+        self._enter(prompt)
+        try:
+            await asyncio.sleep(0.05 / len(prompt))
+            if prompt == "boom":
+                raise RuntimeError("failed")
+            return prompt.upper()
+        finally:
+            self._exit()
+
+    def chat(self, messages, config):
+        raise NotImplementedError
+
+PROMPTS = ["a", "bb", "boom", "dddd", "eeeee", "ffffff"]
+
+def _check(results):
+    assert results[:2] == ["A", "BB"] and results[3:] == ["DDDD", "EEEEE", "FFFFFF"]
+    assert isinstance(results[2], RuntimeError)
+
+def test_generate_batch_keeps_order_and_isolates_errors():
+    client = SlowClient()
+    _check(client.generate_batch(PROMPTS, {}, max_concurrency=3))
+    assert client.peak <= 3
+    assert client.generate_batch([], {}) == []
+
+def test_agenerate_batch_keeps_order_and_isolates_errors():
+    client = SlowClient(max_concurrency=2)
+    _check(asyncio.run(client.agenerate_batch(PROMPTS, {})))
+    assert client.peak <= 2
+
+def test_cached_batch_only_sends_misses():
+    client = SlowClient()
+    cached = CachedLLMClient(client, ResponseCache(), "slow")
+    cached.generate_batch(["a", "bb"], {})
+    _check(cached.generate_batch(PROMPTS, {}))
+    assert sorted(client.calls) == sorted(PROMPTS)
+    # 失败的结果不缓存
+    asyncio.run(cached.agenerate_batch(["boom", "a"], {}))
+    assert client.calls.count("boom") == 2 and client.calls.count("a") == 1
+
+def test_gemini_batch_uses_model_batch_path():
+    client = GeminiClient(model_name="gemini-pro", api_key="test-key")
+
+    def fake_model(prompt):
+        if prompt == "boom":
+            raise RuntimeError("failed")
+        return AIMessage(content=prompt.upper())
+
+    client.llm = RunnableLambda(fake_model)
+    _check(client.generate_batch(PROMPTS, {}))
+    _check(asyncio.run(client.agenerate_batch(PROMPTS, {})))
@@ -1,12 +1,26 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
 import pytest
-from llm.llm_factory import create_llm_client
+from llm import llm_factory
+from llm.llm_factory import BACKENDS, create_llm_client, get_llm_client, clear_llm_clients, load_backend, register_backend
 from config import Config
+from llm.llm_client import LLMClient, RequestLimiter
 from llm.gemini_client import GeminiClient
 from llm.ollama_client import OllamaClient
 
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 @pytest.fixture
-def config():
-    return Config()
+def config(tmp_path):
+    # 响应缓存写到临时目录，不读写用户的 .cache
+    config = Config()
+    previous = config.get_config("llm.cache.path")
+    config.set_config("llm.cache.path", str(tmp_path / "llm_responses.sqlite"))
+    yield config
+    config.set_config("llm.cache.path", previous)
 
 def test_create_ollama_client(config):
     config.set_config("llm.client_type", "ollama")
@@ -39,3 +53,187 @@ def test_missing_api_key_for_gemini(config):
     
     with pytest.raises(ValueError, match="API key is required for Gemini client."):
         create_llm_client(config)
+
+def test_get_llm_client_is_shared(config):
+    config.set_config("llm.client_type", "ollama")
+    config.set_config("llm.ollama.model_name", "llama2")
+    clear_llm_clients()
+
+    first = get_llm_client(config)
+    second = get_llm_client(config)
+    assert first is second
+
+def test_get_llm_client_follows_config_changes(config):
+    config.set_config("llm.client_type", "ollama")
+    config.set_config("llm.ollama.model_name", "llama2")
+    clear_llm_clients()
+
+    first = get_llm_client(config)
+    config.set_config("llm.ollama.model_name", "mistral")
+    second = get_llm_client(config)
+    assert first is not second
+    assert second.model_name == "mistral"
+
+def test_max_concurrency_limits_requests(config):
+    config.set_config("llm.client_type", "ollama")
+    config.set_config("llm.ollama.model_name", "llama2")
+    config.set_config("llm.max_concurrency", 1)
+
+    client = create_llm_client(config)
+    with client.request_slot():
+        assert not client._request_limiter.acquire(blocking=False)
+    assert client._request_limiter.acquire(blocking=False)
+    client._request_limiter.release()
+    config.set_config("llm.max_concurrency", None)
+
+def test_sync_and_async_requests_share_one_budget():
+    limiter = RequestLimiter(1)
+    limiter.acquire()
+    entered = threading.Event()
+
+    async def scenario():
+        async def waiter():
+            await limiter.acquire_async()
+            entered.set()
+            limiter.release()
+
+        cancelled = asyncio.create_task(limiter.acquire_async())
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.05)
+        # 同步调用方占着唯一的名额，异步调用方只能等待
+        assert not entered.is_set()
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        await asyncio.to_thread(limiter.release)
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(scenario())
+    assert entered.is_set()
+    # 被取消的等待者不占用名额
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
+    limiter.release()
+
+def test_replaced_client_is_closed_after_in_flight_requests(config):
+    config.set_config("llm.client_type", "ollama")
+    config.set_config("llm.ollama.model_name", "llama2")
+    clear_llm_clients()
+    try:
+        first = get_llm_client(config)
+        inner = first.client if hasattr(first, "client") else first
+        released = []
+        inner.release_resources = lambda: released.append(True)
+        with inner.request_slot():
+            config.set_config("llm.ollama.model_name", "mistral")
+            second = get_llm_client(config)
+            # 旧配置的客户端不再保留，但正在进行的请求结束前不关闭
+            assert list(llm_factory._client_registry.values()) == [second]
+            assert released == []
+        assert released == [True]
+    finally:
+        config.set_config("llm.ollama.model_name", "llama2")
+        clear_llm_clients()
+
+def test_metrics_wrapper_follows_config(config):
+    from llm.metrics_client import MetricsLLMClient
+    from metrics import get_registry
+    config.set_config("llm.client_type", "ollama")
+    config.set_config("llm.ollama.model_name", "llama2")
+    clear_llm_clients()
+    try:
+        config.set_config("metrics.enabled", True)
+        client = get_llm_client(config)
+        assert isinstance(client, MetricsLLMClient)
+        if config.get_config("llm.cache.enabled"):
+            assert "llm_response_cache" in get_registry().snapshot()["collectors"]
+        config.set_config("metrics.enabled", False)
+        assert not isinstance(get_llm_client(config), MetricsLLMClient)
+    finally:
+        config.set_config("metrics.enabled", False)
+        clear_llm_clients()
+
+def test_register_llm_client(config):
+    from llm.llm_factory import register_llm_client
+    config.set_config("llm.client_type", "ollama")
+    clear_llm_clients()
+    fake = object()
+    register_llm_client(config, fake)
+    try:
+        assert get_llm_client(config) is fake
+    finally:
+        clear_llm_clients()
+
+class StubClient(OllamaClient):
+    @classmethod
+    def from_config(cls, config):
+        client = cls(model_name="stub")
+        client.created_from = config.get_config("llm.client_type")
+        return client
+
+class PluginClient(LLMClient):
+    """没有覆盖 from_config 的第三方后端"""
+
+    def __init__(self, model_name="default", temperature=0.0):
+        self.model_name = model_name
+        self.temperature = temperature
+
+    def generate_text(self, prompt, config):
+        return prompt
+
+    def chat(self, messages, config):
+        return messages[-1]["content"]
+
+def test_default_from_config_passes_backend_section(config):
+    register_backend("thirdparty", PluginClient)
+    try:
+        config.set_config("llm.client_type", "thirdparty")
+        config.set_config("llm.thirdparty", {"model_name": "tiny", "temperature": 0.5})
+        config.set_config("llm.max_concurrency", 2)
+        client = create_llm_client(config)
+        assert (client.model_name, client.temperature) == ("tiny", 0.5)
+        assert client._max_concurrency == 2
+        # 构造函数不接受的配置项在创建时就报错，而不是等到第一次请求
+        config.set_config("llm.thirdparty", {"model_name": "tiny", "unknown": 1})
+        with pytest.raises(TypeError):
+            create_llm_client(config)
+    finally:
+        BACKENDS.pop("thirdparty")
+        llm_factory._backend_classes.pop("thirdparty", None)
+        config.set_config("llm.client_type", "ollama")
+        config.set_config("llm.max_concurrency", None)
+
+def test_only_selected_backend_is_imported():
+    code = ("import sys; from config import Config; from llm.llm_factory import create_llm_client; "
+            "config = Config(); config.set_config('llm.client_type', 'ollama'); create_llm_client(config); "
+            "print('llm.ollama_client' in sys.modules, 'llm.gemini_client' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["True", "False"]
+
+def test_register_backend(config):
+    register_backend("stub", StubClient)
+    try:
+        config.set_config("llm.client_type", "stub")
+        client = create_llm_client(config)
+        assert isinstance(client, StubClient)
+        assert client.created_from == "stub"
+    finally:
+        BACKENDS.pop("stub")
+        config.set_config("llm.client_type", "ollama")
+
+def test_backend_from_string_path(config):
+    config.set_config("llm.client_type", "llm.ollama_client:OllamaClient")
+    config.set_config("llm.ollama.model_name", "llama2")
+    try:
+        assert isinstance(create_llm_client(config), OllamaClient)
+    finally:
+        config.set_config("llm.client_type", "ollama")
+
+def test_backend_from_entry_point(monkeypatch):
+    class EntryPoint:
+        value = "llm.ollama_client:OllamaClient"
+
+    monkeypatch.setattr(llm_factory, "_entry_point", lambda name: EntryPoint() if name == "plugin" else None)
+    assert load_backend("plugin") is OllamaClient
+    with pytest.raises(ValueError, match="Supported types are 'ollama', 'gemini'"):
+        load_backend("unknown")
+    llm_factory._backend_classes.pop("plugin")
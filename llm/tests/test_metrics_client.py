@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from llm.llm_client import LLMClient
+from llm.metrics_client import MetricsLLMClient
+from metrics.registry import MetricsRegistry
+
+class EchoClient(LLMClient):
+    """返回大写的提示词；提示词为 "boom" 时抛出异常"""
+    model_name = "echo"
+
+    def generate_text(self, prompt, config):
+        if prompt == "boom":
+            raise RuntimeError("failed")
+        return prompt.upper()
+
+    def chat(self, messages, config):
+        return self.generate_text(messages[-1]["content"], config)
+
+    def stream_text(self, prompt, config):
+        yield from self.generate_text(prompt, config)
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+@pytest.fixture
+def client(registry):
+    return MetricsLLMClient(EchoClient(), registry)
+
+def test_generate_records_latency_and_tokens(client, registry):
+    assert client.generate_text("abcdefgh", {}) == "ABCDEFGH"
+    assert client.chat([{"role": "user", "content": "你好"}], {}) == "你好"
+    assert registry.value("llm_requests_total", method="generate", outcome="ok") == 1
+    assert registry.value("llm_prompt_tokens_total", method="generate") == 2
+    assert registry.value("llm_completion_tokens_total", method="generate") == 2
+    assert registry.value("llm_prompt_tokens_total", method="chat") == 2
+    assert registry.value("llm_request_duration_seconds", method="generate")["count"] == 1
+    assert registry.value("llm_requests_in_flight", method="generate") == 0
+    assert client.model_name == "echo"
+
+def test_errors_are_counted(client, registry):
+    with pytest.raises(RuntimeError):
+        client.generate_text("boom", {})
+    assert registry.value("llm_requests_total", method="generate", outcome="error") == 1
+    assert registry.value("llm_completion_tokens_total", method="generate") is None
+
+def test_stream_records_first_token(client, registry):
+    assert "".join(client.stream_text("abcd", {})) == "ABCD"
+    assert registry.value("llm_first_token_seconds", method="stream")["count"] == 1
+    assert registry.value("llm_completion_tokens_total", method="stream") == 1
+
+    async def consume():
+        return [chunk async for chunk in client.astream_text("xy", {})]
+
+    assert asyncio.run(consume()) == ["XY"]
+    assert registry.value("llm_requests_total", method="stream", outcome="ok") == 2
+
+def test_stream_stopped_early_is_cancelled_not_error(client, registry):
+    stream = client.stream_text("abcdefgh", {})
+    assert next(stream) == "A"
+    stream.close()
+    assert registry.value("llm_requests_total", method="stream", outcome="cancelled") == 1
+    assert registry.value("llm_requests_total", method="stream", outcome="error") is None
+    # 已收到的部分计入生成的 token
+    assert registry.value("llm_completion_tokens_total", method="stream") == 1
+
+    async def consume_one():
+        async for chunk in client.astream_text("xyz", {}):
+            return chunk
+
+    async def cancelled_call():
+        task = asyncio.create_task(client.agenerate_text("slow", {}))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    async def scenario():
+        chunk = await consume_one()
+        await asyncio.sleep(0)  # 让被放弃的异步生成器完成清理
+        await cancelled_call()
+        return chunk
+
+    assert asyncio.run(scenario()) == "XYZ"
+    assert registry.value("llm_requests_total", method="stream", outcome="cancelled") == 2
+    assert registry.value("llm_requests_total", method="generate", outcome="cancelled") == 1
+
+def test_batch_counts_every_prompt(client, registry):
+    results = client.generate_batch(["ab", "boom", "cd"], {})
+    assert results[0] == "AB" and isinstance(results[1], RuntimeError)
+    assert registry.value("llm_requests_total", method="batch", outcome="ok") == 2
+    assert registry.value("llm_requests_total", method="batch", outcome="error") == 1
+    assert registry.value("llm_request_duration_seconds", method="batch")["count"] == 1
+
+    asyncio.run(client.agenerate_batch(["ef"], {}))
+    assert registry.value("llm_requests_total", method="batch", outcome="ok") == 3
+    assert client.generate_batch([], {}) == []
@@ -0,0 +1,90 @@
+import time
+import pytest
+from llm.llm_client import LLMClient
+from llm.cached_client import CachedLLMClient
+from llm.response_cache import ResponseCache
+
+class CountingClient(LLMClient):
+    model_name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_text(self, prompt, config):
+        self.calls += 1
+        return f"response to {prompt}"
+
+    def chat(self, messages, config):
+        self.calls += 1
+        return f"chat reply {len(messages)}"
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / "responses.sqlite")
+
+def test_key_depends_on_every_part():
+    base = ResponseCache.make_key("ollama", "llama2", "hi", {"temperature": 0})
+    assert base == ResponseCache.make_key("ollama", "llama2", "hi", {"temperature": 0})
+    assert base != ResponseCache.make_key("gemini", "llama2", "hi", {"temperature": 0})
+    assert base != ResponseCache.make_key("ollama", "mistral", "hi", {"temperature": 0})
+    assert base != ResponseCache.make_key("ollama", "llama2", "hello", {"temperature": 0})
+    assert base != ResponseCache.make_key("ollama", "llama2", "hi", {"temperature": 1})
+
+def test_memory_lru_eviction():
+    cache = ResponseCache(memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_disk_tier_survives_new_instance(disk_path):
+    ResponseCache(path=disk_path).set("k", "v")
+    cache = ResponseCache(path=disk_path)
+    assert cache.get("k") == "v"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_ttl_expiry(disk_path):
+    cache = ResponseCache(path=disk_path, ttl=0.05)
+    cache.set("k", "v")
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+def test_disk_size_eviction(disk_path):
+    cache = ResponseCache(memory_entries=1, path=disk_path, disk_entries=3)
+    for i in range(5):
+        cache.set(str(i), str(i))
+    cache.prune()
+    assert cache.get("0") is None
+    assert cache.get("4") == "4"
+
+def test_disk_hits_do_not_write_until_next_store(disk_path):
+    cache = ResponseCache(memory_entries=1, path=disk_path, disk_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    changes = cache._db.total_changes
+    assert cache.get("a") == "1"
+    assert cache._db.total_changes == changes
+    # 下一次写入时补上访问时间，"a" 比 "b" 更近被使用
+    cache.set("c", "3")
+    cache.prune()
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+def test_cached_client_hits_and_opt_out(disk_path):
+    inner = CountingClient()
+    client = CachedLLMClient(inner, ResponseCache(path=disk_path), "fake")
+
+    assert client.generate_text("p", {}) == "response to p"
+    assert client.generate_text("p", {}) == "response to p"
+    assert inner.calls == 1
+
+    client.generate_text("p", {"cache": False})
+    assert inner.calls == 2
+
+    stats = client.cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert client.model_name == "counting"
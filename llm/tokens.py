@@ -0,0 +1,22 @@
+import math
+import re
+
+_CJK = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text without a tokenizer.
+
+    CJK characters count as about one token each; other text as about four characters per token.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
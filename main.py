@@ -1,46 +1,180 @@
+import asyncio
+import sys
+from typing import Optional
 from agent.graph_builder import build_agent_graph
+from agent.memory.checkpointer import SqliteCheckpointer
+from agent.runner import create_initial_state, run_config, run_status
+from agent.server import serve
+from agent.tools.http_client import aclose_shared_clients, close_shared_clients
 from config import Config
-from langchain_core.messages import HumanMessage
+from metrics import get_metrics
+from metrics.server import start_from_config
+
+EXIT_COMMANDS = ["退出", "exit", "quit"]
+STREAM_MODES = ["updates", "custom"]
+
+class ReplyPrinter:
+    """输出流式执行事件：节点完成时输出进度，报告逐token输出"""
+
+    def __init__(self):
+        self.replied = False
+        self.streaming_report = False
+
+    def handle(self, mode: str, chunk) -> None:
+        if mode == "custom":
+            if "token" not in chunk:
+                # 其他节点的进度事件（如命令输出行），结果会在节点完成时输出
+                return
+            if not self.streaming_report:
+                print("\nAI: ", end="", flush=True)
+                self.streaming_report = True
+            print(chunk["token"], end="", flush=True)
+            return
+
+        for node_name, update in chunk.items():
+            print(f"\n[{node_name}] 完成")
+            if node_name == "report" and self.streaming_report:
+                # 报告已逐token输出
+                print()
+                self.replied = True
+                continue
+            messages = (update or {}).get("messages", [])
+            for msg in messages:
+                if hasattr(msg, "type") and msg.type == "ai":
+                    print(f"\nAI: {msg.content}")
+                    self.replied = True
+
+    def finish(self) -> None:
+        if not self.replied:
+            print("\nAI: 处理完成，但没有生成回复。")
+
+def _resume_arg() -> Optional[str]:
+    """命令行参数 --resume <运行ID>"""
+    args = sys.argv[1:]
+    if "--resume" not in args:
+        return None
+    index = args.index("--resume")
+    if index + 1 >= len(args):
+        sys.exit("用法: python main.py [--async | --serve] [--resume <运行ID>]")
+    return args[index + 1]
+
+def _build_graph(config: Config):
+    """构建流程图；启用检查点时返回 (流程图, 检查点存储)"""
+    checkpointer = SqliteCheckpointer.from_config(config)
+    # 启用指标且配置了端口时启动导出服务
+    start_from_config(config, get_metrics(config))
+    # 配置文件修改后自动重新加载
+    if config.get_config("config_reload.enabled"):
+        config.start_watching(config.get_config("config_reload.interval"))
+    return build_agent_graph(config, checkpointer), checkpointer
+
+def _start_run(graph, user_input: Optional[str], thread_id: Optional[str] = None):
+    """返回 (流程图输入, 运行配置)；user_input 为 None 表示恢复 thread_id 对应的运行"""
+    if graph.checkpointer is None:
+        return create_initial_state(user_input), None
+    run_cfg = run_config(thread_id)
+    if user_input is not None:
+        print(f"[运行ID: {run_cfg['configurable']['thread_id']}]")
+    return (create_initial_state(user_input) if user_input is not None else None), run_cfg
+
+def _check_resume(graph, thread_id: str) -> bool:
+    """检查是否可以恢复运行，不能恢复时输出原因"""
+    if graph.checkpointer is None:
+        print("未启用检查点（agent.checkpoint.enabled），无法恢复运行")
+        return False
+    status = run_status(graph, thread_id)
+    if status is None:
+        print(f"未找到运行 {thread_id} 的记录")
+        return False
+    if status == "finished":
+        print(f"运行 {thread_id} 已完成，无需恢复")
+        return False
+    print(f"正在恢复运行 {thread_id} ...")
+    return True
+
+def _report_error(e: BaseException, run_cfg) -> None:
+    message = "运行已中断" if isinstance(e, KeyboardInterrupt) else f"执行过程中发生错误: {e}"
+    print(f"\n{message}")
+    if run_cfg is not None:
+        print(f"可使用 python main.py --resume {run_cfg['configurable']['thread_id']} 从中断处继续")
+
+def _run_sync(graph, user_input: Optional[str], thread_id: Optional[str] = None) -> None:
+    """流式执行一次运行（或恢复运行），输出进度和回复"""
+    inputs, run_cfg = _start_run(graph, user_input, thread_id)
+    try:
+        printer = ReplyPrinter()
+        for mode, chunk in graph.stream(inputs, config=run_cfg, stream_mode=STREAM_MODES):
+            printer.handle(mode, chunk)
+        printer.finish()
+    except (Exception, KeyboardInterrupt) as e:
+        _report_error(e, run_cfg)
+
+async def _arun(graph, user_input: Optional[str], thread_id: Optional[str] = None) -> None:
+    inputs, run_cfg = _start_run(graph, user_input, thread_id)
+    try:
+        printer = ReplyPrinter()
+        async for mode, chunk in graph.astream(inputs, config=run_cfg, stream_mode=STREAM_MODES):
+            printer.handle(mode, chunk)
+        printer.finish()
+    except (Exception, asyncio.CancelledError) as e:
+        _report_error(e, run_cfg)
 
 def main():
     # 初始化配置
     config = Config()
-    
+
     # 构建智能Agent流程图
-    graph = build_agent_graph(config)
-    
+    graph, checkpointer = _build_graph(config)
+
+    # 恢复中断的运行
+    resume_id = _resume_arg()
+    if resume_id and _check_resume(graph, resume_id):
+        _run_sync(graph, None, resume_id)
+
     # 交互式测试
     print("智能Agent已启动，请输入您的请求（输入'退出'结束）")
     while True:
         user_input = input("\n用户: ")
-        if user_input.lower() in ["退出", "exit", "quit"]:
+        if user_input.lower() in EXIT_COMMANDS:
             break
-            
-        # 准备初始状态
-        initial_state = {
-            "messages": [HumanMessage(content=user_input)],
-            "tasks": [],
-            "current_task_id": None,
-            "working_memory": {},
-            "execution_history": []
-        }
-        
-        # 执行流程图
-        try:
-            result = graph.invoke(initial_state)
-            
-            # 打印AI回复
-            if "messages" in result and result["messages"]:
-                ai_messages = [msg for msg in result["messages"] if hasattr(msg, "type") and msg.type == "ai"]
-                if ai_messages:
-                    for msg in ai_messages:
-                        print(f"\nAI: {msg.content}")
-                else:
-                    print("\nAI: 没有生成回复。")
-            else:
-                print("\nAI: 处理完成，但没有生成回复。")
-        except Exception as e:
-            print(f"执行过程中发生错误: {e}")
+
+        # 流式执行流程图
+        _run_sync(graph, user_input)
+
+    close_shared_clients()
+    if checkpointer is not None:
+        checkpointer.close()
+
+async def amain():
+    """异步模式：整个会话共用一个事件循环，节点以异步方式执行"""
+    config = Config()
+    graph, checkpointer = _build_graph(config)
+
+    resume_id = _resume_arg()
+    if resume_id and _check_resume(graph, resume_id):
+        await _arun(graph, None, resume_id)
+
+    print("智能Agent已启动（异步模式），请输入您的请求（输入'退出'结束）")
+    while True:
+        user_input = await asyncio.to_thread(input, "\n用户: ")
+        if user_input.lower() in EXIT_COMMANDS:
+            break
+
+        await _arun(graph, user_input)
+
+    # 事件循环结束前关闭绑定在该循环上的HTTP连接
+    await aclose_shared_clients()
+    if checkpointer is not None:
+        checkpointer.close()
 
 if __name__ == "__main__":
-    main()
+    if "--serve" in sys.argv[1:]:
+        # HTTP 服务模式：一个流程图服务多个并发运行
+        try:
+            asyncio.run(serve(Config()))
+        except KeyboardInterrupt:
+            pass
+    elif "--async" in sys.argv[1:]:
+        asyncio.run(amain())
+    else:
+        main()
@@ -0,0 +1,53 @@
+from typing import Optional
+
+from .registry import COUNTER, DEFAULT_BUCKETS, GAUGE, HISTOGRAM, MetricsRegistry
+
+# 节点指标
+NODE_DURATION = "agent_node_duration_seconds"
+NODE_RUNS = "agent_node_runs_total"
+NODE_IN_FLIGHT = "agent_node_in_flight"
+TASKS_FINISHED = "agent_tasks_finished_total"
+# LLM 调用指标
+LLM_DURATION = "llm_request_duration_seconds"
+LLM_FIRST_TOKEN = "llm_first_token_seconds"
+LLM_REQUESTS = "llm_requests_total"
+LLM_IN_FLIGHT = "llm_requests_in_flight"
+LLM_PROMPT_TOKENS = "llm_prompt_tokens_total"
+LLM_COMPLETION_TOKENS = "llm_completion_tokens_total"
+
+_DESCRIPTIONS = (
+    (NODE_DURATION, HISTOGRAM, "Graph node latency in seconds"),
+    (NODE_RUNS, COUNTER, "Graph node runs by outcome"),
+    (NODE_IN_FLIGHT, GAUGE, "Graph nodes currently running"),
+    (TASKS_FINISHED, COUNTER, "Finished subtasks by type and status"),
+    (LLM_DURATION, HISTOGRAM, "LLM call latency in seconds"),
+    (LLM_FIRST_TOKEN, HISTOGRAM, "Time to the first streamed chunk in seconds"),
+    (LLM_REQUESTS, COUNTER, "LLM prompts by method and outcome"),
+    (LLM_IN_FLIGHT, GAUGE, "LLM calls currently running"),
+    (LLM_PROMPT_TOKENS, COUNTER, "Estimated prompt tokens sent to the LLM"),
+    (LLM_COMPLETION_TOKENS, COUNTER, "Estimated completion tokens received from the LLM"),
+)
+
+_registry = MetricsRegistry()
+for _name, _kind, _help in _DESCRIPTIONS:
+    _registry.describe(_name, _kind, _help)
+
+
+def get_registry() -> MetricsRegistry:
+    """进程共享的指标注册表"""
+    return _registry
+
+
+def get_metrics(config) -> Optional[MetricsRegistry]:
+    """metrics.enabled 开启时返回共享注册表，否则返回 None（不安装任何埋点）"""
+    if not config.get_config("metrics.enabled"):
+        return None
+    return _registry
+
+
+__all__ = [
+    "MetricsRegistry", "DEFAULT_BUCKETS", "get_registry", "get_metrics",
+    "NODE_DURATION", "NODE_RUNS", "NODE_IN_FLIGHT", "TASKS_FINISHED",
+    "LLM_DURATION", "LLM_FIRST_TOKEN", "LLM_REQUESTS", "LLM_IN_FLIGHT",
+    "LLM_PROMPT_TOKENS", "LLM_COMPLETION_TOKENS",
+]
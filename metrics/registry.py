@@ -0,0 +1,241 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 延迟直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# JSON 快照中按分桶估算的分位数
+SNAPSHOT_QUANTILES = (0.5, 0.95, 0.99)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# 标签: 按名称排序的 (名称, 值) 元组
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶线性插值估算分位数（与 Prometheus histogram_quantile 相同）；超出最大分桶时返回最大分桶上界"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, previous = 0.0, 0
+        for bound, cumulative in zip(self.buckets, self.cumulative()):
+            if cumulative >= rank:
+                in_bucket = cumulative - previous
+                return lower + (bound - lower) * ((rank - previous) / in_bucket if in_bucket else 0)
+            lower, previous = bound, cumulative
+        return self.buckets[-1]
+
+
+class _Metric:
+    __slots__ = ("kind", "help", "series")
+
+    def __init__(self, kind: str, help_text: str):
+        self.kind = kind
+        self.help = help_text
+        self.series: Dict[Labels, Any] = {}
+
+
+class MetricsRegistry:
+    """进程内指标注册表：计数器、仪表和直方图，线程安全
+
+    可以导出为 Prometheus 文本格式或 JSON 快照。已有组件的 stats()（缓存命中率等）
+    通过 register_collector 在导出时读取。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """声明指标的类型和说明（导出到 Prometheus 的 HELP 行）"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                self._metrics[name] = _Metric(kind, help_text)
+            else:
+                metric.help = help_text
+
+    def _metric(self, name: str, kind: str) -> _Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = _Metric(kind, "")
+        elif metric.kind != kind:
+            raise ValueError(f"Metric {name!r} is a {metric.kind}, not a {kind}")
+        return metric
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """计数器加 value"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._metric(name, COUNTER).series
+            series[key] = series.get(key, 0) + value
+
+    def add(self, name: str, delta: float, **labels: Any) -> None:
+        """仪表加 delta（可以为负数）"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._metric(name, GAUGE).series
+            series[key] = series.get(key, 0) + delta
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._metric(name, GAUGE).series[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """直方图记录一个观测值"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._metric(name, HISTOGRAM).series
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def track(self, histogram: str, in_flight: Optional[str] = None, **labels: Any) -> Iterator[None]:
+        """记录代码块的耗时；指定 in_flight 时执行期间该仪表加一"""
+        if in_flight:
+            self.add(in_flight, 1, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(histogram, time.perf_counter() - start, **labels)
+            if in_flight:
+                self.add(in_flight, -1, **labels)
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """注册导出时读取的统计函数，数值项导出为 <name>_<键> 仪表；同名覆盖"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def value(self, name: str, **labels: Any) -> Any:
+        """读取一个序列的当前值；直方图返回 {"count", "sum"}，不存在时返回 None"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            entry = metric.series.get(_labels(labels)) if metric else None
+            if isinstance(entry, _Histogram):
+                return {"count": entry.count, "sum": entry.sum}
+            return entry
+
+    def reset(self) -> None:
+        """清空所有指标值，保留指标说明和统计函数"""
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.series.clear()
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        results = {}
+        for name, collect in collectors.items():
+            try:
+                results[name] = dict(collect())
+            except Exception as e:
+                results[name] = {"error": str(e)}
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON 快照：{"metrics": {名称: {type, help, series: [...]}}, "collectors": {...}}"""
+        metrics = {}
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                series = []
+                for labels, entry in metric.series.items():
+                    item: Dict[str, Any] = {"labels": dict(labels)}
+                    if isinstance(entry, _Histogram):
+                        item.update(count=entry.count, sum=entry.sum,
+                                    buckets=dict(zip(map(str, entry.buckets), entry.cumulative())))
+                        for q in SNAPSHOT_QUANTILES:
+                            item[f"p{round(q * 100)}"] = entry.quantile(q)
+                    else:
+                        item["value"] = entry
+                    series.append(item)
+                metrics[name] = {"type": metric.kind, "help": metric.help, "series": series}
+        return {"timestamp": time.time(), "metrics": metrics, "collectors": self._collect()}
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                if not metric.series:
+                    continue
+                if metric.help:
+                    lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                for labels, entry in sorted(metric.series.items()):
+                    if not isinstance(entry, _Histogram):
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(entry)}")
+                        continue
+                    for bound, cumulative in zip(entry.buckets, entry.cumulative()):
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {entry.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(entry.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {entry.count}")
+        for collector, stats in sorted(self._collect().items()):
+            for key, value in sorted(stats.items()):
+                # 只导出数值项
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{collector}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,50 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .registry import MetricsRegistry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry: MetricsRegistry = self.server.registry
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = registry.to_prometheus(), PROMETHEUS_CONTENT_TYPE
+        elif path == "/metrics.json":
+            body, content_type = registry.to_json(), "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 不在控制台输出抓取日志
+        pass
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """在后台线程启动指标导出服务：/metrics 为 Prometheus 文本，/metrics.json 为 JSON 快照
+
+    port 为 0 时使用随机端口（server.server_address 中可以读到实际端口）。
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def start_from_config(config, registry: Optional[MetricsRegistry]) -> Optional[ThreadingHTTPServer]:
+    """metrics.port 配置了端口且指标已启用时启动导出服务"""
+    port = config.get_config("metrics.port")
+    if registry is None or port is None:
+        return None
+    return start_metrics_server(registry, port, config.get_config("metrics.host") or "127.0.0.1")
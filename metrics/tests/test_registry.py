@@ -0,0 +1,107 @@
+import json
+import threading
+import urllib.request
+import pytest
+from metrics import get_metrics, get_registry
+from metrics.registry import MetricsRegistry
+from metrics.server import start_metrics_server
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(buckets=(0.1, 0.5, 1.0))
+    registry.describe("requests_total", "counter", "Requests")
+    return registry
+
+def test_counters_and_gauges(registry):
+    registry.inc("requests_total", node="a")
+    registry.inc("requests_total", 2, node="a")
+    registry.inc("requests_total", node="b")
+    registry.add("in_flight", 1)
+    registry.add("in_flight", -1)
+    assert registry.value("requests_total", node="a") == 3
+    assert registry.value("requests_total", node="b") == 1
+    assert registry.value("in_flight") == 0
+    assert registry.value("missing") is None
+    with pytest.raises(ValueError):
+        registry.observe("requests_total", 1.0)
+
+def test_histogram_quantiles(registry):
+    for value in (0.05, 0.05, 0.3, 0.7, 5.0):
+        registry.observe("latency_seconds", value, node="a")
+    assert registry.value("latency_seconds", node="a") == {"count": 5, "sum": pytest.approx(6.1)}
+    series, = registry.snapshot()["metrics"]["latency_seconds"]["series"]
+    assert series["buckets"] == {"0.1": 2, "0.5": 3, "1.0": 4}
+    assert 0.1 < series["p50"] <= 0.5
+    # 超出最大分桶的观测值按最大分桶上界估计
+    assert series["p99"] == 1.0
+
+def test_track_records_duration_and_in_flight(registry):
+    with pytest.raises(RuntimeError):
+        with registry.track("work_seconds", "work_in_flight", kind="x"):
+            assert registry.value("work_in_flight", kind="x") == 1
+            raise RuntimeError("boom")
+    assert registry.value("work_in_flight", kind="x") == 0
+    assert registry.value("work_seconds", kind="x")["count"] == 1
+
+def test_prometheus_text(registry):
+    registry.inc("requests_total", node='say "hi"')
+    registry.observe("latency_seconds", 0.2)
+    registry.register_collector("cache", lambda: {"hits": 3, "hit_rate": 0.75, "enabled": True, "path": "x"})
+    text = registry.to_prometheus()
+    assert "# HELP requests_total Requests\n# TYPE requests_total counter\n" in text
+    assert 'requests_total{node="say \\"hi\\""} 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="0.5"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+    assert "cache_hits 3\n" in text and "cache_hit_rate 0.75\n" in text
+    assert "cache_enabled" not in text and "cache_path" not in text
+
+def test_json_snapshot_and_reset(registry):
+    registry.inc("requests_total", node="a")
+    registry.register_collector("broken", lambda: 1 / 0)
+    snapshot = json.loads(registry.to_json())
+    assert snapshot["metrics"]["requests_total"]["series"] == [{"labels": {"node": "a"}, "value": 1}]
+    assert "error" in snapshot["collectors"]["broken"]
+    registry.reset()
+    assert registry.value("requests_total", node="a") is None
+    assert registry.snapshot()["metrics"]["requests_total"]["help"] == "Requests"
+
+def test_thread_safety(registry):
+    def work():
+        for _ in range(1000):
+            registry.inc("requests_total")
+            registry.observe("latency_seconds", 0.2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.value("requests_total") == 8000
+    assert registry.value("latency_seconds")["count"] == 8000
+
+def test_export_server(registry):
+    registry.inc("requests_total", node="a")
+    server = start_metrics_server(registry, 0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert 'requests_total{node="a"} 1' in response.read().decode()
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            assert "requests_total" in json.loads(response.read())["metrics"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_get_metrics_follows_config():
+    class FakeConfig:
+        def __init__(self, enabled):
+            self.enabled = enabled
+
+        def get_config(self, key):
+            return self.enabled if key == "metrics.enabled" else None
+
+    assert get_metrics(FakeConfig(False)) is None
+    assert get_metrics(FakeConfig(True)) is get_registry()